@@ -0,0 +1,40 @@
+"""
+Fixtures shared by each system's `benchmark_query.py`.
+"""
+
+import importlib.util
+import warnings
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "golden", Path(__file__).resolve().parent / "results" / "golden.py"
+)
+golden_results = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(golden_results)
+
+
+class UncheckedResults:
+    """
+    Stands in for the golden results of a dataset that they haven't been computed for, so that
+    the benchmarks still run (without checking their values) on a fresh checkout.
+    """
+
+    def check(self, query_id: int, result) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def golden(request):
+    # Each system's benchmarks live in a directory named after the system
+    system = request.path.parent.name
+    golden = golden_results.load_golden(system)
+    if golden is None:
+        warnings.warn(
+            f"No golden results for the dataset that {system} was built from, so the query "
+            "results aren't checked. Run `uv run golden.py` in the results directory first.",
+            stacklevel=1,
+        )
+        return UncheckedResults()
+    return golden
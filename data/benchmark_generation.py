@@ -0,0 +1,137 @@
+"""
+Micro-benchmarks for the data generation scripts.
+
+Each benchmark times the original (row-by-row) code path against its vectorized replacement
+and reports throughput, so that the speedup at larger scales can be tracked over time.
+
+```
+uv run benchmark_generation.py --sizes 10000 100000 1000000
+```
+"""
+
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+import polars as pl
+
+import create_edges_follows
+import create_nodes_person
+
+
+def timeit(func: Callable, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def benchmark_persons(sizes: list[int], max_faker_size: int, seed: int) -> None:
+    print("\nPerson profiles (persons/sec)")
+    rows = []
+    for size in sizes:
+        vectorized_elapsed, _ = timeit(create_nodes_person.generate_profiles_vectorized, size, seed)
+        faker_elapsed = None
+        if size <= max_faker_size:
+            faker_elapsed, _ = timeit(create_nodes_person.generate_profiles_faker, size, seed)
+        rows.append((size, faker_elapsed, vectorized_elapsed))
+
+    print(f"{'persons':>12} | {'faker':>14} | {'vectorized':>14} | {'speedup':>8}")
+    for size, faker_elapsed, vectorized_elapsed in rows:
+        faker_rate = f"{size / faker_elapsed:,.0f}" if faker_elapsed else "skipped"
+        speedup = f"{faker_elapsed / vectorized_elapsed:.1f}x" if faker_elapsed else "n/a"
+        print(
+            f"{size:>12,} | {faker_rate:>14} | {size / vectorized_elapsed:>14,.0f} | {speedup:>8}"
+        )
+
+
+def run_per_node_super_node_path(
+    persons_df: pl.DataFrame, super_nodes_df: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    The previous super node implementation, kept here as a baseline: one Python call and one
+    `np.random.choice(..., replace=False)` over the whole person column per super node.
+    """
+    return (
+        super_nodes_df.with_columns(
+            pl.col("num_connections")
+            .map_elements(
+                lambda x: list(np.random.choice(persons_df["id"], size=x, replace=False)),
+                return_dtype=pl.List(pl.Int64),
+            )
+            .alias("connections")
+        )
+        .explode("connections")
+        .filter(pl.col("id") != pl.col("connections"))
+        .sort(["id", "connections"])
+        .select(["id", "connections"])
+    )
+
+
+def run_vectorized_super_node_path(
+    persons_df: pl.DataFrame, super_nodes_df: pl.DataFrame
+) -> pl.DataFrame:
+    rng = np.random.default_rng(0)
+    person_ids = persons_df["id"].to_numpy()
+    super_node_idx, follower_pos = create_edges_follows.sample_distinct_per_group(
+        rng, super_nodes_df["num_connections"].to_numpy(), len(person_ids)
+    )
+    return (
+        pl.DataFrame(
+            {
+                "id": super_nodes_df["id"].to_numpy()[super_node_idx],
+                "connections": person_ids[follower_pos],
+            }
+        )
+        .filter(pl.col("id") != pl.col("connections"))
+        .sort(["id", "connections"])
+    )
+
+
+def benchmark_super_nodes(sizes: list[int], num_super_nodes: int, seed: int) -> None:
+    """
+    The full super node edge set grows quadratically with the number of persons, so both paths
+    are timed on the same sample of `num_super_nodes` super nodes (with follower counts drawn
+    from the same 0.5-5% range), and throughput is reported in super nodes/sec.
+    """
+    print(f"\nSuper node followers ({num_super_nodes} super nodes, super nodes/sec)")
+    print(
+        f"{'persons':>12} | {'edges':>12} | {'per-node':>10} | {'vectorized':>10} | "
+        f"{'speedup':>8}"
+    )
+    for size in sizes:
+        np.random.seed(seed)
+        rng = np.random.default_rng(seed)
+        persons_df = pl.DataFrame({"id": np.arange(1, size + 1, dtype=np.int64)})
+        super_nodes_df = pl.DataFrame(
+            {
+                "id": rng.choice(size, size=num_super_nodes, replace=False) + 1,
+                "num_connections": rng.integers(
+                    size * 5 // 1000, size * 5 // 100, num_super_nodes
+                ),
+            }
+        )
+        per_node_elapsed, _ = timeit(run_per_node_super_node_path, persons_df, super_nodes_df)
+        vectorized_elapsed, edges_df = timeit(
+            run_vectorized_super_node_path, persons_df, super_nodes_df
+        )
+        print(
+            f"{size:>12,} | {len(edges_df):>12,} | {num_super_nodes / per_node_elapsed:>10,.1f} | "
+            f"{num_super_nodes / vectorized_elapsed:>10,.1f} | "
+            f"{per_node_elapsed / vectorized_elapsed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Number of persons to generate per run")
+    parser.add_argument("--max_faker_size", type=int, default=100_000, help="Skip the (slow) Faker path above this size")
+    parser.add_argument("--super_node_sizes", type=int, nargs="+", default=[1_000_000, 10_000_000], help="Number of persons for the super node benchmark")
+    parser.add_argument("--num_super_nodes", type=int, default=50, help="Number of super nodes to sample followers for")
+    parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    # fmt: on
+
+    benchmark_persons(args.sizes, args.max_faker_size, args.seed)
+    benchmark_super_nodes(args.super_node_sizes, args.num_super_nodes, args.seed)
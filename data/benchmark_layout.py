@@ -0,0 +1,136 @@
+"""
+Benchmark how the Parquet layout of the dataset affects ingest time into each system.
+
+The current `output/nodes` and `output/edges` files are rewritten once per layout (see
+`PARQUET_LAYOUTS` in `common.py`) into `output/layouts/<name>`, and each system's
+`build_graph.py` is then run against that copy, writing its database to a temporary directory.
+Systems whose Python package isn't installed are skipped.
+
+```
+uv run benchmark_layout.py --layouts default snappy uncompressed clustered-by-from
+```
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import io
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+import polars as pl
+
+from common import PARQUET_LAYOUTS, write_parquet
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def write_layout(name: str, output_path: Path) -> tuple[Path, float]:
+    """Rewrite the base dataset with the given layout, returning its path and total size in MB"""
+    layout_path = output_path / "layouts" / name
+    shutil.rmtree(layout_path, ignore_errors=True)
+    size = 0
+    for subdir in ("nodes", "edges"):
+        for path in sorted((output_path / subdir).rglob("*.parquet")):
+            target = layout_path / path.relative_to(output_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            write_parquet(pl.read_parquet(path), target, PARQUET_LAYOUTS[name])
+            size += target.stat().st_size
+    return layout_path, size / 1024**2
+
+
+def load_build_script(system: str) -> ModuleType:
+    """Import `<system>/build_graph.py` as a module (raises ImportError if the system isn't installed)"""
+    spec = importlib.util.spec_from_file_location(
+        f"{system}_build_graph", REPO_ROOT / system / "build_graph.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ingest_kuzu(module: ModuleType, layout_path: Path, db_path: Path) -> None:
+    module.NODES_PATH = layout_path / "nodes"
+    module.EDGES_PATH = layout_path / "edges"
+    db = module.kuzu.Database(str(db_path / "social_network.kuzu"))
+    asyncio.run(module.main(module.kuzu.AsyncConnection(db), []))
+
+
+def ingest_ladybug(module: ModuleType, layout_path: Path, db_path: Path) -> None:
+    module.NODES_PATH = layout_path / "nodes"
+    module.EDGES_PATH = layout_path / "edges"
+    db = module.lb.Database(str(db_path / "social_network.lbdb"))
+    asyncio.run(module.main(module.lb.AsyncConnection(db), []))
+
+
+def ingest_lance(module: ModuleType, layout_path: Path, db_path: Path) -> None:
+    module.NODES_ROOT = layout_path / "nodes"
+    module.EDGES_ROOT = layout_path / "edges"
+    module.GRAPH_ROOT = db_path / "graph_lance"
+    module.main([])
+
+
+INGESTERS: dict[str, Callable[[ModuleType, Path, Path], None]] = {
+    "kuzu": ingest_kuzu,
+    "ladybug": ingest_ladybug,
+    "lance_graph": ingest_lance,
+}
+
+
+def time_ingest(system: str, layout_path: Path, repeats: int) -> float | None:
+    """Best-of-`repeats` ingest time in seconds, or None if the system isn't installed"""
+    try:
+        module = load_build_script(system)
+    except ImportError:
+        return None
+    timings = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                INGESTERS[system](module, layout_path, Path(tmp_dir))
+            timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    rows = []
+    for name in LAYOUTS:
+        layout_path, size_mb = write_layout(name, OUTPUT_PATH)
+        timings = [time_ingest(system, layout_path, REPEATS) for system in SYSTEMS]
+        rows.append((name, size_mb, timings))
+        if not KEEP:
+            shutil.rmtree(layout_path)
+
+    print(f"\nIngest time by Parquet layout (best of {REPEATS}, seconds)")
+    header = " | ".join(f"{system:>11}" for system in SYSTEMS)
+    print(f"{'layout':>18} | {'size (MB)':>9} | {header}")
+    for name, size_mb, timings in rows:
+        cells = " | ".join(
+            f"{elapsed:>11.3f}" if elapsed is not None else f"{'skipped':>11}" for elapsed in timings
+        )
+        print(f"{name:>18} | {size_mb:>9.1f} | {cells}")
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layouts", type=str, nargs="+", default=list(PARQUET_LAYOUTS), choices=list(PARQUET_LAYOUTS), help="Parquet layouts to benchmark")
+    parser.add_argument("--systems", type=str, nargs="+", default=list(INGESTERS), choices=list(INGESTERS), help="Systems to ingest each layout into")
+    parser.add_argument("--repeats", "-r", type=int, default=3, help="Number of ingest runs per layout and system")
+    parser.add_argument("--keep", action="store_true", help="Keep the rewritten files in output/layouts")
+    args = parser.parse_args()
+    # fmt: on
+
+    LAYOUTS = args.layouts
+    SYSTEMS = args.systems
+    REPEATS = args.repeats
+    KEEP = args.keep
+    OUTPUT_PATH = Path("output")
+
+    main()
@@ -0,0 +1,219 @@
+"""
+Helpers shared by the data generation scripts
+"""
+
+import hashlib
+import json
+import os
+import resource
+import shutil
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MANIFEST_FILE = "manifest.json"
+# Directories of the output path that make up the dataset (e.g. not `layouts`)
+DATASET_DIRS = ("nodes", "edges", "deltas", "events")
+
+
+@dataclass(frozen=True)
+class ParquetLayout:
+    """
+    Physical layout of the Parquet files written by the data generation scripts.
+    The contents of the files are the same for every layout (up to row order, with `sort_by`).
+    """
+
+    compression: str = "zstd"
+    # `None` uses the codec's default level
+    compression_level: int | None = None
+    # `None` uses PyArrow's default (1Mi rows per row group)
+    row_group_size: int | None = None
+    use_dictionary: bool = True
+    statistics: bool = True
+    # Rows are sorted by these columns before writing, for files that have all of them
+    # (e.g. `("from", "to")` clusters edge files by source, and doesn't affect node files)
+    sort_by: tuple[str, ...] = ()
+
+    def writer_options(self) -> dict[str, Any]:
+        """Keyword arguments for `pq.write_table` and `pq.ParquetWriter`"""
+        return {
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "use_dictionary": self.use_dictionary,
+            "write_statistics": self.statistics,
+        }
+
+
+PARQUET_LAYOUTS = {
+    "default": ParquetLayout(),
+    "snappy": ParquetLayout(compression="snappy"),
+    "lz4": ParquetLayout(compression="lz4"),
+    "uncompressed": ParquetLayout(compression="none"),
+    "zstd-9": ParquetLayout(compression_level=9),
+    "small-row-groups": ParquetLayout(row_group_size=64 * 1024),
+    "no-dictionary": ParquetLayout(use_dictionary=False),
+    "no-statistics": ParquetLayout(statistics=False),
+    "clustered-by-from": ParquetLayout(sort_by=("from", "to")),
+}
+
+
+def get_parquet_layout() -> ParquetLayout:
+    """
+    The layout is selected by name via the `PARQUET_LAYOUT` environment variable, so that it
+    applies to every script (and to the worker processes they start) without extra arguments.
+    """
+    name = os.environ.get("PARQUET_LAYOUT", "default")
+    if name not in PARQUET_LAYOUTS:
+        raise ValueError(f"Unknown Parquet layout {name!r}, choose from {list(PARQUET_LAYOUTS)}")
+    return PARQUET_LAYOUTS[name]
+
+
+def write_parquet(df: pl.DataFrame, path: Path, layout: ParquetLayout | None = None) -> None:
+    """Write a node or edge file with the shared Parquet layout"""
+    layout = layout or get_parquet_layout()
+    if layout.sort_by and all(col in df.columns for col in layout.sort_by):
+        df = df.sort(list(layout.sort_by))
+    pq.write_table(
+        df.to_arrow(), path, row_group_size=layout.row_group_size, **layout.writer_options()
+    )
+
+
+def get_persons_path(nodes_path: Path) -> Path:
+    """
+    Person nodes are either written to a single `persons.parquet` file, or, when generated
+    with `--workers`, sharded into a `persons/part-XXXX.parquet` directory.
+    Return a path (or glob) that Polars can read in both cases.
+    """
+    shards_path = nodes_path / "persons"
+    if shards_path.is_dir():
+        return shards_path / "*.parquet"
+    return nodes_path / "persons.parquet"
+
+
+def read_persons(nodes_path: Path, columns: list[str] | None = None) -> pl.DataFrame:
+    """Read person nodes (single file or sharded), sorted by ID"""
+    return pl.read_parquet(get_persons_path(nodes_path), columns=columns).sort("id")
+
+
+def get_person_id_range(nodes_path: Path) -> tuple[int, int]:
+    """
+    Return the (min, max) person ID without loading the persons into memory.
+    The generators assign contiguous IDs, which is checked here.
+    """
+    stats = (
+        pl.scan_parquet(get_persons_path(nodes_path))
+        .select(
+            pl.len().alias("count"),
+            pl.col("id").min().alias("min"),
+            pl.col("id").max().alias("max"),
+        )
+        .collect()
+        .row(0, named=True)
+    )
+    if stats["count"] != stats["max"] - stats["min"] + 1:
+        raise ValueError(f"Person IDs are not contiguous: {stats}")
+    return stats["min"], stats["max"]
+
+
+def get_delta_path(output_path: Path, batch: int) -> Path:
+    """
+    Incremental datasets (see `create_delta.py`) are written as numbered batches under
+    `deltas/batch-XXXX`, each with the same `nodes`/`edges` layout as the base dataset.
+    """
+    return output_path / "deltas" / f"batch-{batch:04d}"
+
+
+def list_delta_batches(output_path: Path) -> list[int]:
+    """Numbers of the delta batches written so far, in order"""
+    return sorted(int(path.name.split("-")[1]) for path in output_path.glob("deltas/batch-*"))
+
+
+def remove_deltas(output_path: Path) -> None:
+    """Deltas extend the base dataset they were generated on, so are removed when it's rebuilt"""
+    shutil.rmtree(output_path / "deltas", ignore_errors=True)
+
+
+def get_file_checksum(path: Path) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def read_file_info(path: Path) -> tuple[int, pa.Schema]:
+    """Row count and Arrow schema of a Parquet or Arrow IPC file, from its metadata"""
+    if path.suffix == ".arrow":
+        with pa.ipc.open_file(path) as reader:
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+            return rows, reader.schema
+    return pq.read_metadata(path).num_rows, pq.read_schema(path)
+
+
+def get_schema_hash(schema: pa.Schema) -> str:
+    """Hash of an Arrow schema, ignoring the writer's key-value metadata"""
+    schema = schema.remove_metadata()
+    return hashlib.blake2b(schema.to_string().encode(), digest_size=8).hexdigest()
+
+
+def read_manifest(output_path: Path) -> dict[str, Any]:
+    manifest_path = output_path / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {}
+    return json.loads(manifest_path.read_text())
+
+
+def update_manifest(output_path: Path, script: str, params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Record the dataset's current files in `output/manifest.json`, with their row counts, schema
+    hashes and checksums, along with the parameters of the script that last changed it. Each
+    script calls this after writing its output, and each system's `build_graph.py` compares the
+    manifest with the one it last built from, to skip rebuilding from unchanged files.
+
+    Checksums are only recomputed for files whose size or modification time changed.
+    """
+    manifest = read_manifest(output_path)
+    previous_files = manifest.get("files", {})
+    files = {}
+    for dataset_dir in DATASET_DIRS:
+        paths = (output_path / dataset_dir).rglob("*")
+        for path in sorted(path for path in paths if path.suffix in (".parquet", ".arrow")):
+            name = path.relative_to(output_path).as_posix()
+            stat = path.stat()
+            entry = previous_files.get(name, {})
+            if (entry.get("bytes"), entry.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                rows, schema = read_file_info(path)
+                entry = {
+                    "rows": rows,
+                    "bytes": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "schema_hash": get_schema_hash(schema),
+                    "checksum": get_file_checksum(path),
+                }
+            files[name] = entry
+    params = {**params, "parquet_layout": os.environ.get("PARQUET_LAYOUT", "default")}
+    manifest["params"] = {**manifest.get("params", {}), script: params}
+    # Number of persons in the base dataset (excluding delta batches)
+    manifest["scale"] = sum(
+        entry["rows"] for name, entry in files.items() if name.startswith("nodes/persons")
+    )
+    manifest["files"] = files
+    # Write to a temporary file first, so that a builder never reads a partial manifest
+    tmp_path = output_path / f"{MANIFEST_FILE}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2, default=str))
+    tmp_path.replace(output_path / MANIFEST_FILE)
+    return manifest
+
+
+def get_peak_rss_mb() -> float:
+    """Peak resident set size of the current process, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is reported in bytes on macOS, and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
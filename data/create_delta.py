@@ -0,0 +1,128 @@
+"""
+Generate an incremental "delta" batch on top of the existing dataset, to benchmark how each
+system handles growth (incremental ingest versus a full rebuild).
+
+Each batch adds `--num` new persons, with IDs continuing after the current max person ID
+(across the base dataset and all previous batches), along with:
+  - follows edges: each new person follows `--edges_per_person` persons, and is followed by as
+    many, drawn uniformly from all persons, so most of these edges point into the existing graph
+  - lives_in and interested_in edges for the new persons, drawn the same way as the base dataset
+Batches are written to `output/deltas/batch-XXXX`, with the same `nodes`/`edges` layout (and
+schemas) as `output`. Every edge in a batch has at least one new person as an endpoint, so it
+can't duplicate an edge of the base dataset or an earlier batch.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from common import (
+    get_delta_path,
+    get_person_id_range,
+    list_delta_batches,
+    update_manifest,
+    write_parquet,
+)
+from create_edges_follows import add_edge_properties
+from create_edges_interests import create_interested_in_edges
+from create_edges_location import create_lives_in_edges
+from create_nodes_person import generate_profiles_vectorized
+
+
+def get_max_person_id(output_path: Path) -> int:
+    """Max person ID over the base dataset and all delta batches (which must be contiguous)"""
+    _, max_id = get_person_id_range(output_path / "nodes")
+    for batch in list_delta_batches(output_path):
+        delta_path = get_delta_path(output_path, batch)
+        batch_min_id, batch_max_id = get_person_id_range(delta_path / "nodes")
+        if batch_min_id != max_id + 1:
+            raise ValueError(
+                f"Delta batch {batch} starts at person ID {batch_min_id}, expected {max_id + 1}"
+            )
+        max_id = batch_max_id
+    return max_id
+
+
+def create_delta_follows_edges(
+    rng: np.random.Generator,
+    new_ids: np.ndarray,
+    min_id: int,
+    max_id: int,
+    edges_per_person: int,
+) -> pl.DataFrame:
+    """
+    Follows edges for the new persons, in both directions, with the other endpoint drawn
+    uniformly from all person IDs (`min_id` to `max_id`, which includes the new persons).
+    """
+    num_edges = len(new_ids) * edges_per_person
+    new_endpoints = np.repeat(new_ids, edges_per_person)
+    # New persons following anyone, and anyone following new persons
+    other_endpoints = rng.integers(min_id, max_id + 1, size=(2, num_edges))
+    edges_df = (
+        pl.DataFrame(
+            {
+                "from": np.concatenate([new_endpoints, other_endpoints[1]]),
+                "to": np.concatenate([other_endpoints[0], new_endpoints]),
+            }
+        )
+        # Prevent self-connecting edges
+        .filter(pl.col("to") != pl.col("from"))
+        .unique()
+        .sort(["to", "from"])
+    )
+    return edges_df
+
+
+def main() -> None:
+    batch = max(list_delta_batches(OUTPUT_PATH), default=0) + 1
+    min_id, _ = get_person_id_range(OUTPUT_PATH / "nodes")
+    start_id = get_max_person_id(OUTPUT_PATH) + 1
+    # Each batch gets its own seed, so that batches don't repeat each other, split into
+    # independent streams for the profiles and the edges
+    profile_seed, edge_seed = np.random.SeedSequence([SEED, batch]).spawn(2)
+    persons_df = generate_profiles_vectorized(NUM, profile_seed, start_id=start_id)
+    rng = np.random.default_rng(edge_seed)
+    new_ids = persons_df["id"].to_numpy()
+    max_id = start_id + NUM - 1
+    follows_df = create_delta_follows_edges(rng, new_ids, min_id, max_id, EDGES_PER_PERSON)
+    follows_df = add_edge_properties(follows_df, rng)
+    cities_df = pl.read_parquet(OUTPUT_PATH / "nodes" / "cities.parquet")
+    lives_in_df = create_lives_in_edges(persons_df, cities_df, int(rng.integers(2**31)))
+    interests_df = pl.read_parquet(OUTPUT_PATH / "nodes" / "interests.parquet")
+    interested_in_df = create_interested_in_edges(
+        persons_df, interests_df, int(rng.integers(2**31))
+    )
+    # Write the batch with the same layout as the base dataset
+    delta_path = get_delta_path(OUTPUT_PATH, batch)
+    (delta_path / "nodes").mkdir(parents=True)
+    (delta_path / "edges").mkdir(parents=True)
+    write_parquet(persons_df, delta_path / "nodes" / "persons.parquet")
+    write_parquet(follows_df, delta_path / "edges" / "follows.parquet")
+    write_parquet(lives_in_df, delta_path / "edges" / "lives_in.parquet")
+    write_parquet(interested_in_df, delta_path / "edges" / "interested_in.parquet")
+    num_existing = (follows_df["from"] < start_id).sum() + (follows_df["to"] < start_id).sum()
+    print(
+        f"Wrote delta batch {batch} to {delta_path}: {NUM} persons (IDs {start_id}-{max_id}), "
+        f"{len(follows_df)} follows edges ({num_existing} into the existing graph), "
+        f"{len(lives_in_df)} lives_in edges, {len(interested_in_df)} interested_in edges"
+    )
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num", "-n", type=int, default=1000, help="Number of new persons in the batch")
+    parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    parser.add_argument("--edges_per_person", type=int, default=10, help="Number of follows and followers per new person")
+    args = parser.parse_args()
+    # fmt: on
+
+    SEED = args.seed
+    NUM = args.num
+    EDGES_PER_PERSON = args.edges_per_person
+    OUTPUT_PATH = Path("output")
+
+    main()
+    update_manifest(Path("output"), "create_delta", vars(args))
@@ -4,22 +4,56 @@ Generate edges between persons and their followers (who are also persons in the
 The aim is to scale up the generation of edges based on the number of nodes in the graph,
 while also keeping edges between nodes in a way that's not a uniform distribution.
 In the real world, some people are way more connected than others.
+
+The default `uniform` model draws uniform random edges, plus a small fraction of "super nodes"
+with many followers. `--model` selects a heavy-tailed or community-structured graph instead:
+  - `chung-lu`: expected in/out-degrees follow a Zipf (power-law) distribution
+  - `preferential`: preferential attachment, where new persons tend to follow popular persons
+  - `communities`: uniform random edges, plus planted dense communities (near-cliques)
+Every in-memory run prints degree-distribution statistics, to tie benchmark results to graph skew.
+
+Every edge gets two columnar properties, drawn independently of the graph structure:
+  - `since`: the date on which the follow was created
+  - `weight`: an interaction weight in [0, 1], skewed towards 0 (most follows see little
+    interaction)
+
+With `--streaming`, edges of the `uniform` model are generated chunk by chunk over ranges of
+the `to` ID, so that each chunk can be deduplicated and sorted on its own and appended to the
+output as Parquet row groups. Peak memory is then bounded by `--memory_limit_mb` rather than by
+the graph size.
 """
 
 import argparse
+import time
+from datetime import date
 from pathlib import Path
 
 import numpy as np
 import polars as pl
+import pyarrow.parquet as pq
 
+from common import (
+    get_parquet_layout,
+    get_peak_rss_mb,
+    get_person_id_range,
+    read_persons,
+    update_manifest,
+    write_parquet,
+)
 
-def select_random_ids(df: pl.DataFrame, num: int) -> list[int]:
-    """Select random IDs from a column of a dataframe"""
-    connections = list(np.random.choice(df["id"], size=num, replace=False))
-    return connections
+# Approximate peak bytes per edge while a chunk is generated, deduplicated and sorted
+# (the int64 `from`/`to` arrays, their sort keys, the deduplicated copy of the keys,
+# and the edge properties)
+BYTES_PER_EDGE = 144
+# Follows are created between these dates (both ends inclusive)
+SINCE_START = date(2010, 1, 1)
+SINCE_END = date(2024, 12, 31)
+EPOCH = date(1970, 1, 1)
 
 
-def get_initial_person_edges(persons_df: pl.DataFrame) -> pl.DataFrame:
+def get_initial_person_edges(
+    persons_df: pl.DataFrame, random_state: np.random.RandomState
+) -> pl.DataFrame:
     """
     Produce an initial list of person-person edges.
       - The number of edges is 10x the number of persons
@@ -28,8 +62,8 @@ def get_initial_person_edges(persons_df: pl.DataFrame) -> pl.DataFrame:
     """
     NUM_EDGES = len(persons_df) * 10
     # Obtain a random list of person IDs with repetition
-    ids_1 = np.random.choice(persons_df["id"], size=NUM_EDGES, replace=True)
-    ids_2 = np.random.choice(persons_df["id"], size=NUM_EDGES, replace=True)
+    ids_1 = random_state.choice(persons_df["id"], size=NUM_EDGES, replace=True)
+    ids_2 = random_state.choice(persons_df["id"], size=NUM_EDGES, replace=True)
     # Create edges dataframe
     edges_df = pl.DataFrame({"to": ids_1, "from": ids_2})
     # Prevent self-connecting edges
@@ -38,69 +72,425 @@ def get_initial_person_edges(persons_df: pl.DataFrame) -> pl.DataFrame:
     return edges_df
 
 
-def create_super_node_edges(persons_df: pl.DataFrame) -> pl.DataFrame:
+def get_property_rng(seed: int) -> np.random.Generator:
+    """
+    Edge properties are drawn from their own random stream, so that adding them doesn't
+    change which edges are generated for a given seed.
+    """
+    return np.random.default_rng([seed, 1])
+
+
+def add_edge_properties(edges_df: pl.DataFrame, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Add the `since` and `weight` properties to follows edges, column-wise.
+      - `since` is uniform over `SINCE_START`-`SINCE_END`
+      - `weight` is the square of a uniform draw (rounded to 4 decimals), so that it is
+        skewed towards 0
+    """
+    num_edges = len(edges_df)
+    start = (SINCE_START - EPOCH).days
+    end = (SINCE_END - EPOCH).days
+    since = rng.integers(start, end + 1, size=num_edges, dtype=np.int32)
+    weight = np.round(rng.random(num_edges) ** 2, 4)
+    return edges_df.with_columns(
+        pl.Series("since", since).cast(pl.Date),
+        pl.Series("weight", weight),
+    )
+
+
+def get_super_nodes(rng: np.random.Generator, num_persons: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Select the super nodes, and the number of followers each one has.
+    Returns the sorted positions (0-based) of the super nodes among all persons, and
+    their follower counts.
+      - The number of super nodes is set as a fraction of the total number of persons in the graph
+      - Super nodes are connected to anywhere between 0.5-5% of the graph
+    """
+    num_super_nodes = num_persons * 5 // 1000 if num_persons > 0 else 1
+    super_node_pos = np.sort(rng.choice(num_persons, size=num_super_nodes, replace=False))
+    lower_bound = num_persons * 5 // 1000
+    upper_bound = num_persons * 5 // 100
+    num_connections = rng.integers(lower_bound, upper_bound, size=num_super_nodes)
+    print(f"Generated {num_super_nodes} super nodes for {num_persons} persons")
+    return super_node_pos, num_connections
+
+
+def sample_distinct_per_group(
+    rng: np.random.Generator, counts: np.ndarray, population: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For each group `g`, sample `counts[g]` distinct values from `range(population)` without
+    replacement, for all groups at once.
+      - One bulk draw (with replacement) is made for all groups, then duplicates within a group
+        are dropped and redrawn until every group has its requested number of distinct values
+      - The procedure treats all values symmetrically, so each group's sample is a uniform random
+        subset, exactly like `np.random.choice(..., replace=False)`
+    Returns the group index and the sampled value of each draw, sorted by (group, value).
+    """
+    groups = np.arange(len(counts))
+    missing = np.asarray(counts)
+    keys = np.empty(0, dtype=np.int64)
+    while missing.sum() > 0:
+        new_groups = np.repeat(groups, missing)
+        # (group, value) pairs are encoded into a single key, so one sort orders and groups them
+        new_keys = new_groups * population + rng.integers(0, population, size=len(new_groups))
+        new_keys.sort()
+        is_first = np.empty(len(new_keys), dtype=bool)
+        is_first[:1] = True
+        np.not_equal(new_keys[1:], new_keys[:-1], out=is_first[1:])
+        new_keys = new_keys[is_first]
+        # Only redraws (a small fraction of the first draw) need to be checked against and
+        # merged into the keys accepted so far
+        if len(keys) > 0:
+            positions = np.searchsorted(keys, new_keys)
+            is_new = keys[np.minimum(positions, len(keys) - 1)] != new_keys
+            new_keys = new_keys[is_new]
+            keys = np.insert(keys, positions[is_new], new_keys)
+        else:
+            keys = new_keys
+        missing = missing - np.bincount(new_keys // population, minlength=len(counts))
+    return np.divmod(keys, population)
+
+
+def create_super_node_edges(persons_df: pl.DataFrame, rng: np.random.Generator) -> pl.DataFrame:
     """
     Add some super nodes to the graph to make it more interesting.
     A "super node" is a person who has a large number of followers.
       - The aim is to have a select few persons act as as concentration points in the graph
-      - The number of super nodes is set as a fraction of the total number of persons in the graph
+      - The followers of all super nodes are sampled in bulk, with no per-super-node Python calls
     """
-    NUM_SUPER_NODES = len(persons_df) * 5 // 1000 if len(persons_df) > 0 else 1
-    super_node_ids = np.random.choice(persons_df["id"], size=NUM_SUPER_NODES, replace=False)
-    # Convert to dataframe
-    super_nodes_df = pl.DataFrame({"id": super_node_ids}).sort("id")
-    print(f"Generated {len(super_nodes_df)} super nodes for {len(persons_df)} persons")
-    # Let's assume super nodes are connected to anywhere between 0.5-5% of the graph
-    lower_bound = len(persons_df) * 5 // 1000
-    upper_bound = len(persons_df) * 5 // 100
-    # Generate a random number between lower/upper bounds for each super node to connect to
-    super_nodes_df = super_nodes_df.with_columns(
-        pl.lit(
-            np.random.randint(
-                lower_bound,
-                upper_bound,
-                len(super_nodes_df),
-            )
-        ).alias("num_connections")
-    )
-    # Generate a list of edge connections for each super node, with length between lower/upper bounds
+    person_ids = persons_df["id"].to_numpy()
+    super_node_pos, num_connections = get_super_nodes(rng, len(person_ids))
+    super_node_idx, follower_pos = sample_distinct_per_group(rng, num_connections, len(person_ids))
     super_nodes_df = (
-        # Take in the column val of num_connections and return a list of IDs from persons_df
-        super_nodes_df.with_columns(
-            pl.col("num_connections")
-            .map_elements(
-                lambda x: select_random_ids(persons_df, x), return_dtype=pl.List(pl.Int64)
-            )
-            .alias("connections")
+        pl.DataFrame(
+            {
+                "to": person_ids[super_node_pos][super_node_idx],
+                "from": person_ids[follower_pos],
+            }
         )
-        # Explode the connections column to create a row for each connection
-        .explode("connections")
-        .filter(pl.col("id") != pl.col("connections"))
-        .sort(["id", "connections"])
-        .select(["id", "connections"])
+        .filter(pl.col("to") != pl.col("from"))
+        .sort(["to", "from"])
     )
-    # Ensure columns have the same name as edges_df for concatenation
-    super_nodes_df = super_nodes_df.rename({"id": "to", "connections": "from"})
     return super_nodes_df
 
 
-def main() -> None:
-    persons_df = pl.read_parquet(NODES_PATH / "persons.parquet")
-    np.random.seed(SEED)
-    edges_df = get_initial_person_edges(persons_df)
+def get_chunk_end(
+    start: int,
+    max_id: int,
+    edges_per_person: int,
+    edge_budget: int,
+    super_node_ids: np.ndarray,
+    super_node_load: np.ndarray,
+) -> int:
+    """
+    Find the (exclusive) end of the `to` ID range that starts at `start`, such that the
+    expected number of edges in the range (uniform edges plus super node followers) fits
+    within the edge budget. A range always contains at least one person.
+    """
+    end = min(start + max(edge_budget // edges_per_person, 1), max_id + 1)
+    while True:
+        lo, hi = np.searchsorted(super_node_ids, [start, end])
+        load = edges_per_person * (end - start) + (super_node_load[hi] - super_node_load[lo])
+        if load <= edge_budget or end - start == 1:
+            return end
+        end = start + (end - start) // 2
+
+
+def generate_edge_chunk(
+    rng: np.random.Generator,
+    start: int,
+    end: int,
+    num_edges: int,
+    min_id: int,
+    max_id: int,
+    super_node_ids: np.ndarray,
+    num_connections: np.ndarray,
+) -> pl.DataFrame:
+    """
+    Generate the deduplicated, sorted edges whose `to` ID lies in [start, end).
+      - `num_edges` uniform random edges with `to` in the range and `from` anywhere in the graph
+      - all followers of the super nodes in the range
+    """
+    to_ids = [rng.integers(start, end, size=num_edges)]
+    from_ids = [rng.integers(min_id, max_id + 1, size=num_edges)]
+    lo, hi = np.searchsorted(super_node_ids, [start, end])
+    super_node_idx, follower_pos = sample_distinct_per_group(
+        rng, num_connections[lo:hi], max_id - min_id + 1
+    )
+    to_ids.append(super_node_ids[lo:hi][super_node_idx])
+    from_ids.append(follower_pos + min_id)
+    # Encode each edge as a single integer key that orders by (`to`, `from`), so that one
+    # in-place sort both orders the chunk and places duplicates next to each other
+    span = max_id - min_id + 1
+    keys = (np.concatenate(to_ids) - start) * span + (np.concatenate(from_ids) - min_id)
+    del to_ids, from_ids
+    keys.sort()
+    is_first = np.empty(len(keys), dtype=bool)
+    is_first[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=is_first[1:])
+    keys = keys[is_first]
+    to_col, from_col = np.divmod(keys, span)
+    del keys
+    edges_df = pl.DataFrame({"from": from_col + min_id, "to": to_col + start})
+    # Prevent self-connecting edges
+    edges_df = edges_df.filter(pl.col("to") != pl.col("from"))
+    return edges_df
+
+
+def main_streaming() -> None:
+    """
+    Generate the follows edges in chunks of `to` IDs, and append each chunk to the output file
+    as it is produced. Because chunks cover disjoint `to` ranges in increasing order, the output
+    is globally deduplicated and sorted by (`to`, `from`), like the in-memory path.
+    """
+    start_time = time.perf_counter()
+    layout = get_parquet_layout()
+    if layout.sort_by and layout.sort_by != ("to", "from"):
+        # Chunks are appended in order of `to`, so no other order can be applied here
+        raise ValueError(f"Streaming output is sorted by (to, from), not {layout.sort_by}")
+    min_id, max_id = get_person_id_range(NODES_PATH)
+    num_persons = max_id - min_id + 1
+    rng = np.random.default_rng(SEED)
+    property_rng = get_property_rng(SEED)
+    edge_budget = max(MEMORY_LIMIT_MB * 2**20 // BYTES_PER_EDGE, 1)
+    edges_per_person = 10
+    super_node_pos, num_connections = get_super_nodes(rng, num_persons)
+    super_node_ids = super_node_pos + min_id
+    # Cumulative follower counts, to estimate the edges in any range of super nodes
+    super_node_load = np.concatenate([[0], np.cumsum(num_connections)])
+    # Uniform edges are split across chunks one chunk at a time (a sequential multinomial draw)
+    remaining_edges = num_persons * edges_per_person
+
+    num_written = 0
+    num_chunks = 0
+    start = min_id
+    writer = None
+    while start <= max_id and num_written < NUM:
+        end = get_chunk_end(
+            start, max_id, edges_per_person, edge_budget, super_node_ids, super_node_load
+        )
+        num_edges = rng.binomial(remaining_edges, (end - start) / (max_id + 1 - start))
+        remaining_edges -= num_edges
+        edges_df = generate_edge_chunk(
+            rng, start, end, num_edges, min_id, max_id, super_node_ids, num_connections
+        )
+        # Limit the number of edges
+        edges_df = edges_df.head(NUM - num_written).select("from", "to")
+        edges_df = add_edge_properties(edges_df, property_rng)
+        table = edges_df.to_arrow()
+        if writer is None:
+            writer = pq.ParquetWriter(
+                Path("output/edges") / "follows.parquet", table.schema, **layout.writer_options()
+            )
+        writer.write_table(table, row_group_size=layout.row_group_size or ROW_GROUP_SIZE)
+        num_written += len(edges_df)
+        num_chunks += 1
+        start = end
+    if writer is not None:
+        writer.close()
+    if num_written >= NUM:
+        print(f"Limiting edges to {NUM} per the `--num` argument")
+
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Wrote {num_written} edges for {num_persons} persons in {num_chunks} chunks "
+        f"({elapsed:.2f}s, peak RSS {get_peak_rss_mb():.0f} MB)"
+    )
+
+
+def generate_chung_lu_edges(
+    rng: np.random.Generator, num_persons: int, avg_degree: float, exponent: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Chung-Lu model with Zipf weights: the person of rank `r` gets a weight of
+    `(r + 1) ** (-1 / (exponent - 1))`, so that expected degrees follow a power law with the
+    given exponent.
+      - Both endpoints of every edge are drawn independently, proportionally to the weights
+        (by inverse-CDF sampling), with separate random rankings for followers and followed
+    Returns the (from, to) positions of the edges.
+    """
+    num_edges = int(num_persons * avg_degree)
+    weights = np.arange(1, num_persons + 1, dtype=np.float64) ** (-1 / (exponent - 1))
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    to_rank = np.minimum(np.searchsorted(cdf, rng.random(num_edges)), num_persons - 1)
+    from_rank = np.minimum(np.searchsorted(cdf, rng.random(num_edges)), num_persons - 1)
+    return rng.permutation(num_persons)[from_rank], rng.permutation(num_persons)[to_rank]
+
+
+def generate_preferential_attachment_edges(
+    rng: np.random.Generator, num_persons: int, edges_per_person: int, uniform_fraction: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Preferential attachment (Price's model), generated without a sequential loop.
+      - Persons join in a random order, and each new person follows `edges_per_person` earlier
+        persons (the first `edges_per_person` persons form the seed and follow no one)
+      - Each followed person is chosen uniformly among earlier persons with probability
+        `uniform_fraction`, or else by copying the followed person of a uniformly chosen earlier
+        edge, which picks persons proportionally to their number of followers so far
+      - Copies can point to edges that are themselves copies, so the chains are resolved by
+        pointer jumping, which takes a logarithmic number of vectorized passes
+    Returns the (from, to) positions of the edges.
+    """
+    m = max(int(edges_per_person), 1)
+    if num_persons <= m:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    num_edges = (num_persons - m) * m
+    edge_idx = np.arange(num_edges)
+    # Join order of the person creating each edge, and the number of edges created before it
+    src = m + edge_idx // m
+    num_earlier_edges = (src - m) * m
+    is_uniform = (rng.random(num_edges) < uniform_fraction) | (num_earlier_edges == 0)
+    dst = (rng.random(num_edges) * src).astype(np.int64)
+    # Resolved (uniform) edges point to themselves, copies point to an earlier edge
+    pointer = np.where(
+        is_uniform, edge_idx, (rng.random(num_edges) * num_earlier_edges).astype(np.int64)
+    )
+    while True:
+        next_pointer = pointer[pointer]
+        if np.array_equal(next_pointer, pointer):
+            break
+        pointer = next_pointer
+    dst = dst[pointer]
+    join_order = rng.permutation(num_persons)
+    return join_order[src], join_order[dst]
+
+
+def generate_community_edges(
+    rng: np.random.Generator,
+    num_persons: int,
+    num_communities: int,
+    community_size: int,
+    density: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Planted communities: disjoint groups of `community_size` persons, in which every ordered pair
+    of members is connected with probability `density` (1.0 gives cliques).
+    Communities are processed in batches, so that the pair masks stay small.
+    Returns the (from, to) positions of the edges.
+    """
+    community_size = min(community_size, num_persons)
+    num_communities = min(num_communities, num_persons // max(community_size, 1))
+    members = rng.permutation(num_persons)[: num_communities * community_size].reshape(
+        num_communities, community_size
+    )
+    batch_size = max(10_000_000 // max(community_size**2, 1), 1)
+    from_pos, to_pos = [], []
+    for start in range(0, num_communities, batch_size):
+        batch = members[start : start + batch_size]
+        is_edge = rng.random((len(batch), community_size, community_size)) < density
+        # No self-connections
+        is_edge[:, np.arange(community_size), np.arange(community_size)] = False
+        community, i, j = np.nonzero(is_edge)
+        from_pos.append(batch[community, i])
+        to_pos.append(batch[community, j])
+    if not from_pos:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(from_pos), np.concatenate(to_pos)
+
+
+def create_model_edges(persons_df: pl.DataFrame, rng: np.random.Generator) -> pl.DataFrame:
+    """Generate the follows edges for the heavy-tailed or community-structured models"""
+    person_ids = persons_df["id"].to_numpy()
+    num_persons = len(person_ids)
+    if MODEL == "chung-lu":
+        from_pos, to_pos = generate_chung_lu_edges(rng, num_persons, AVG_DEGREE, ZIPF_EXPONENT)
+    elif MODEL == "preferential":
+        from_pos, to_pos = generate_preferential_attachment_edges(
+            rng, num_persons, round(AVG_DEGREE), PA_UNIFORM_FRACTION
+        )
+    else:
+        assert MODEL == "communities", f"Unknown model {MODEL}"
+        num_edges = int(num_persons * AVG_DEGREE)
+        num_communities = (
+            NUM_COMMUNITIES if NUM_COMMUNITIES is not None else num_persons // 1000
+        )
+        community_from, community_to = generate_community_edges(
+            rng, num_persons, num_communities, COMMUNITY_SIZE, COMMUNITY_DENSITY
+        )
+        print(f"Generated {len(community_from)} edges in {num_communities} planted communities")
+        # Uniform random background edges
+        from_pos = np.concatenate([rng.integers(0, num_persons, num_edges), community_from])
+        to_pos = np.concatenate([rng.integers(0, num_persons, num_edges), community_to])
+    edges_df = (
+        pl.DataFrame({"from": person_ids[from_pos], "to": person_ids[to_pos]})
+        # Prevent self-connecting edges
+        .filter(pl.col("to") != pl.col("from"))
+        .unique()
+        .sort(["to", "from"])
+    )
+    print(f"Generated {len(edges_df)} edges with the `{MODEL}` model")
+    return edges_df
+
+
+def print_degree_stats(edges_df: pl.DataFrame, persons_df: pl.DataFrame) -> None:
+    """
+    Print summary statistics of the in-degree (followers) and out-degree (following) distributions.
+      - `top 1% share` is the fraction of all edges held by the 1% highest-degree persons
+      - `tail exponent` is a maximum-likelihood (Hill) estimate of the power-law exponent,
+        fitted on the persons above the 90th percentile of degree
+      - `2-hop paths` is the sum over persons of in-degree * out-degree, i.e. the answer to
+        query 8 (which is what drives path-explosion in query 8 and 9)
+    """
+    person_ids = persons_df["id"].to_numpy()
+    to_pos = np.searchsorted(person_ids, edges_df["to"].to_numpy())
+    from_pos = np.searchsorted(person_ids, edges_df["from"].to_numpy())
+    in_degree = np.bincount(to_pos, minlength=len(person_ids))
+    out_degree = np.bincount(from_pos, minlength=len(person_ids))
+    print(f"Degree statistics for {len(edges_df)} edges over {len(person_ids)} persons")
+    print(
+        f"{'degree':>8} | {'mean':>8} | {'median':>8} | {'p99':>8} | {'max':>10} | "
+        f"{'top 1% share':>12} | {'tail exponent':>13}"
+    )
+    for name, degree in (("in", in_degree), ("out", out_degree)):
+        sorted_degree = np.sort(degree)[::-1]
+        top_share = sorted_degree[: max(len(degree) // 100, 1)].sum() / max(degree.sum(), 1)
+        d_min = max(np.percentile(degree, 90), 1)
+        tail = degree[degree >= d_min]
+        tail_exponent = 1 + len(tail) / max(np.log(tail / (d_min - 0.5)).sum(), 1e-12)
+        print(
+            f"{name:>8} | {degree.mean():>8.2f} | {np.median(degree):>8.0f} | "
+            f"{np.percentile(degree, 99):>8.0f} | {degree.max():>10} | {top_share:>12.1%} | "
+            f"{tail_exponent:>13.2f}"
+        )
+    print(f"2-hop paths (sum of in-degree * out-degree): {int(in_degree @ out_degree)}")
+
+
+def create_uniform_edges(persons_df: pl.DataFrame, seed: int) -> pl.DataFrame:
+    """
+    Generate the follows edges for the `uniform` model: uniform random edges plus super nodes.
+    Random state is local to the call (rather than NumPy's global state), so that it can run
+    alongside other generators in the same process.
+    """
+    edges_df = get_initial_person_edges(persons_df, np.random.RandomState(seed))
     # Generate edges from super nodes
-    super_node_edges_df = create_super_node_edges(persons_df)
+    super_node_edges_df = create_super_node_edges(persons_df, np.random.default_rng(seed))
     # Concatenate edges from original edges_df and super_node_edges_df
-    edges_df = (pl.concat([edges_df, super_node_edges_df]).unique().sort(["to", "from"])).select(
-        "from", "to"
+    return (
+        pl.concat([edges_df, super_node_edges_df])
+        .unique()
+        .sort(["to", "from"])
+        .select("from", "to")
     )
+
+
+def main() -> None:
+    persons_df = read_persons(NODES_PATH, columns=["id"])
+    if MODEL == "uniform":
+        edges_df = create_uniform_edges(persons_df, SEED)
+    else:
+        edges_df = create_model_edges(persons_df, np.random.default_rng(SEED))
+    edges_df = edges_df.select("from", "to")
     # Limit the number of edges
     if NUM < len(edges_df):
         edges_df = edges_df.head(NUM)
         print(f"Limiting edges to {NUM} per the `--num` argument")
+    edges_df = add_edge_properties(edges_df, get_property_rng(SEED))
     # Write nodes
-    edges_df.write_parquet(Path("output/edges") / "follows.parquet")
+    write_parquet(edges_df, Path("output/edges") / "follows.parquet")
     print(f"Wrote {len(edges_df)} edges for {len(persons_df)} persons")
+    print_degree_stats(edges_df, persons_df)
 
 
 if __name__ == "__main__":
@@ -108,15 +498,40 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--num", "-n", type=int, default=int(1E9), help="Number of edges to limit the result to")
     parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    parser.add_argument("--model", type=str, default="uniform", choices=["uniform", "chung-lu", "preferential", "communities"], help="Model used to generate the follows graph")
+    parser.add_argument("--avg_degree", type=float, default=10.0, help="Average number of edges per person (chung-lu, preferential, communities)")
+    parser.add_argument("--zipf_exponent", type=float, default=2.5, help="Power-law exponent of the degree distribution (chung-lu)")
+    parser.add_argument("--pa_uniform_fraction", type=float, default=0.2, help="Fraction of edges attached uniformly rather than preferentially (preferential)")
+    parser.add_argument("--num_communities", type=int, default=None, help="Number of planted communities, defaults to 1 per 1000 persons (communities)")
+    parser.add_argument("--community_size", type=int, default=50, help="Number of persons per planted community (communities)")
+    parser.add_argument("--community_density", type=float, default=0.5, help="Probability of an edge between two members of a community (communities)")
+    parser.add_argument("--streaming", action="store_true", help="Generate edges in bounded-memory chunks of `to` IDs (uniform model)")
+    parser.add_argument("--memory_limit_mb", type=int, default=1024, help="Approximate memory ceiling per chunk when streaming")
+    parser.add_argument("--row_group_size", type=int, default=1_000_000, help="Parquet row group size when streaming")
     args = parser.parse_args()
     # fmt: on
 
     SEED = args.seed
     NUM = args.num
+    MODEL = args.model
+    AVG_DEGREE = args.avg_degree
+    ZIPF_EXPONENT = args.zipf_exponent
+    PA_UNIFORM_FRACTION = args.pa_uniform_fraction
+    NUM_COMMUNITIES = args.num_communities
+    COMMUNITY_SIZE = args.community_size
+    COMMUNITY_DENSITY = args.community_density
+    MEMORY_LIMIT_MB = args.memory_limit_mb
+    ROW_GROUP_SIZE = args.row_group_size
+    if args.streaming and MODEL != "uniform":
+        parser.error("--streaming is only supported for the uniform model")
     NODES_PATH = Path("output/nodes")
     # Create output dir
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
     # Ensure that a global seed is set prior to running main
     np.random.seed(SEED)
-    main()
+    if args.streaming:
+        main_streaming()
+    else:
+        main()
+    update_manifest(Path("output"), "create_edges_follows", vars(args))
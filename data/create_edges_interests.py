@@ -8,54 +8,66 @@ from pathlib import Path
 import numpy as np
 import polars as pl
 
+from common import read_persons, update_manifest, write_parquet
 
-def select_random_ids(df: pl.DataFrame, colname: str, num: int) -> list[int]:
-    """Select random IDs from a column of a dataframe"""
-    connections = list(np.random.choice(df[colname], size=num, replace=False))
-    return connections
+# Persons per batch of random keys (a float64 key per person per interest)
+CHUNK_SIZE = 500_000
 
 
-def main() -> None:
-    interests_df = pl.read_parquet(Path(NODES_PATH) / "interests.parquet").rename(
-        {"id": "interest_id"}
-    )
-    # Read in person IDs
-    persons_df = pl.read_parquet(NODES_PATH / "persons.parquet").select("id")
+def draw_distinct_positions(
+    rng: np.random.Generator, counts: np.ndarray, num_choices: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For each row `i`, draw `counts[i]` distinct positions out of `range(num_choices)`, in bulk.
+      - Every row gets one random key per choice, and the choices with the smallest keys are
+        selected, which is a uniform random subset (the argsort-of-random-keys trick)
+      - Only the `max(counts)` smallest keys per row are ever needed, so they are found with a
+        partial sort rather than a full argsort
+    Returns the row index and the selected position of each draw.
+    """
+    max_count = min(int(counts.max(initial=0)), num_choices)
+    if max_count == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    keys = rng.random((len(counts), num_choices))
+    smallest = np.argpartition(keys, max_count - 1, axis=1)[:, :max_count]
+    order = np.argsort(np.take_along_axis(keys, smallest, axis=1), axis=1)
+    ranked = np.take_along_axis(smallest, order, axis=1)
+    # Keep the first `counts[i]` ranked choices of each row
+    mask = np.arange(max_count) < counts[:, None]
+    rows = np.broadcast_to(np.arange(len(counts))[:, None], mask.shape)[mask]
+    return rows, ranked[mask]
+
+
+def create_interested_in_edges(
+    persons_df: pl.DataFrame, interests_df: pl.DataFrame, seed: int
+) -> pl.DataFrame:
+    """Pick 1-4 distinct interests for each person"""
+    person_ids = persons_df["id"].to_numpy()
+    interest_ids = interests_df["id"].to_numpy()
+    rng = np.random.default_rng(seed)
     # Set a lower and upper bound on the number of interests per person
     lower_bound, upper_bound = 1, 5
-    # Add a column with a random number of interests per person
-    persons_df = persons_df.with_columns(
-        pl.lit(
-            np.random.randint(
-                lower_bound,
-                upper_bound,
-                len(persons_df),
-            )
-        ).alias("num_interests")
-    )
-    # Add a column of random IDs from the interests_df, and explode it within the DataFrame
-    edges_df = (
-        # Take in the column val of num_connections and return a list of IDs from persons_df
-        persons_df.with_columns(
-            pl.col("num_interests")
-            .map_elements(
-                lambda x: select_random_ids(interests_df, "interest_id", x),
-                return_dtype=pl.List(pl.Int64),
-            )
-            .alias("interests")
-        )
-        # Explode the connections column to create a row for each connection
-        .explode("interests")
-        .sort(["id", "interests"])
-        .select(["id", "interests"])
-    )
+    # Draw interests for a fixed number of persons at a time, to bound the size of the random keys
+    edges = []
+    for start in range(0, len(person_ids), CHUNK_SIZE):
+        chunk_ids = person_ids[start : start + CHUNK_SIZE]
+        num_interests = rng.integers(lower_bound, upper_bound, size=len(chunk_ids))
+        rows, positions = draw_distinct_positions(rng, num_interests, len(interest_ids))
+        edges.append(pl.DataFrame({"from": chunk_ids[rows], "to": interest_ids[positions]}))
+    return pl.concat(edges).sort(["from", "to"])
+
+
+def main() -> None:
+    interests_df = pl.read_parquet(Path(NODES_PATH) / "interests.parquet")
+    # Read in person IDs
+    persons_df = read_persons(NODES_PATH, columns=["id"])
+    edges_df = create_interested_in_edges(persons_df, interests_df, SEED)
     # Limit the number of edges
     if NUM < len(edges_df):
         edges_df = edges_df.head(NUM)
         print(f"Limiting edges to {NUM} per the `--num` argument")
     # Write nodes
-    edges_df = edges_df.rename({"id": "from", "interests": "to"})
-    edges_df.write_parquet(Path("output/edges") / "interested_in.parquet")
+    write_parquet(edges_df, Path("output/edges") / "interested_in.parquet")
     print(f"Wrote {len(edges_df)} edges for {len(persons_df)} persons")
 
 
@@ -73,6 +85,5 @@ if __name__ == "__main__":
     # Create output dir
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
-    # Ensure that a global seed is set prior to running main
-    np.random.seed(SEED)
     main()
+    update_manifest(Path("output"), "create_edges_interests", vars(args))
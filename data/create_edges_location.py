@@ -8,36 +8,39 @@ from pathlib import Path
 import numpy as np
 import polars as pl
 
+from common import read_persons, update_manifest, write_parquet
 
-def get_persons_df(filepath: Path) -> pl.DataFrame:
-    # Read in persons data
-    persons_df = pl.read_parquet(filepath).select("id")
+
+def get_persons_df(nodes_path: Path) -> pl.DataFrame:
+    # Read in persons data (single file or sharded)
+    persons_df = read_persons(nodes_path, columns=["id"])
     return persons_df
 
 
-def get_cities_df(filepath: Path) -> pl.DataFrame:
+def get_cities_df(cities_df: pl.DataFrame) -> pl.DataFrame:
     """
     Get only cities with a population of > 1M
     """
-    # Read in cities data and rename the ID column to avoid conflicts
-    residence_loc_df = (
-        pl.read_parquet(filepath)
-        .filter(pl.col("population") >= 1_000_000)
-        .rename({"id": "city_id"})
+    # Rename the ID column to avoid conflicts
+    residence_loc_df = cities_df.filter(pl.col("population") >= 1_000_000).rename(
+        {"id": "city_id"}
     )
     return residence_loc_df
 
 
-def main() -> None:
-    np.random.seed(SEED)
-    persons_df = get_persons_df(NODES_PATH / "persons.parquet")
-    residence_loc_df = get_cities_df(NODES_PATH / "cities.parquet")
+def create_lives_in_edges(
+    persons_df: pl.DataFrame, cities_df: pl.DataFrame, seed: int
+) -> pl.DataFrame:
+    """Pick a residence city for each person, using random state local to the call"""
+    residence_loc_df = get_cities_df(cities_df)
     # Randomly pick a city ID from the list of all cities with population > 1M
-    city_ids = np.random.choice(residence_loc_df["city_id"], size=len(persons_df), replace=True)
+    city_ids = np.random.RandomState(seed).choice(
+        residence_loc_df["city_id"], size=len(persons_df), replace=True
+    )
     # Obtain top 5 most common cities name via a join
     city_ids_df = pl.DataFrame(city_ids).rename({"column_0": "city_id"})
     # Horizontally stack the person IDs and the residence city IDs to create a list of edges
-    edges_df = pl.concat([persons_df, city_ids_df], how="horizontal")
+    edges_df = pl.concat([persons_df.select("id"), city_ids_df], how="horizontal")
     city_counts_df = edges_df.group_by("city_id").len().sort("len", descending=True)
     top_cities_df = (
         city_counts_df.join(residence_loc_df, on="city_id", how="left")
@@ -46,15 +49,20 @@ def main() -> None:
         .head(5)
     )
     top_5 = top_cities_df["city"].to_list()
+    print(f"Generated residence cities for persons. Top 5 common cities are: {', '.join(top_5)}")
+    return edges_df.rename({"city_id": "to", "id": "from"})
+
+
+def main() -> None:
+    persons_df = get_persons_df(NODES_PATH)
+    cities_df = pl.read_parquet(NODES_PATH / "cities.parquet")
+    edges_df = create_lives_in_edges(persons_df, cities_df, SEED)
     # Limit the number of edges
     if NUM < len(edges_df):
         edges_df = edges_df.head(NUM)
         print(f"Limiting edges to {NUM} per the `--num` argument")
     # Write nodes
-    edges_df = edges_df.rename({"city_id": "to", "id": "from"}).write_parquet(
-        Path("output/edges") / "lives_in.parquet",
-    )
-    print(f"Generated residence cities for persons. Top 5 common cities are: {', '.join(top_5)}")
+    write_parquet(edges_df, Path("output/edges") / "lives_in.parquet")
 
 
 if __name__ == "__main__":
@@ -71,6 +79,5 @@ if __name__ == "__main__":
     # Create output dir
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
-    # Ensure that a global seed is set prior to running main
-    np.random.seed(SEED)
     main()
+    update_manifest(Path("output"), "create_edges_location", vars(args))
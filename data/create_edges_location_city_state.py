@@ -6,28 +6,28 @@ from pathlib import Path
 
 import polars as pl
 
+from common import update_manifest, write_parquet
 
-def main() -> None:
-    # Read data from cities file
-    cities_df = (
-        pl.read_parquet(NODES_PATH / "cities.parquet")
-        .rename({"id": "city_id"})
-        .select(["city_id", "city", "state"])
-    )
-    # Read in states from file
-    states_df = (
-        pl.read_parquet(NODES_PATH / "states.parquet")
-        .rename({"id": "state_id"})
-        .select("state_id", "state")
-    )
+
+def create_city_in_edges(cities_df: pl.DataFrame, states_df: pl.DataFrame) -> pl.DataFrame:
+    cities_df = cities_df.rename({"id": "city_id"}).select(["city_id", "city", "state"])
+    states_df = states_df.rename({"id": "state_id"}).select("state_id", "state")
     # Join city and state dataframes on name
     edges_df = (
         states_df.join(cities_df, on="state", how="left")
         .select(["city_id", "state_id"])
         .rename({"city_id": "from", "state_id": "to"})
     )
+    return edges_df
+
+
+def main() -> None:
+    # Read data from cities and states files
+    cities_df = pl.read_parquet(NODES_PATH / "cities.parquet")
+    states_df = pl.read_parquet(NODES_PATH / "states.parquet")
+    edges_df = create_city_in_edges(cities_df, states_df)
     # Write nodes
-    edges_df.write_parquet(Path("output/edges") / "city_in.parquet")
+    write_parquet(edges_df, Path("output/edges") / "city_in.parquet")
     print(f"Wrote {len(edges_df)} edges for {len(cities_df)} cities")
 
 
@@ -37,3 +37,4 @@ if __name__ == "__main__":
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
     main()
+    update_manifest(Path("output"), "create_edges_location_city_state", {})
@@ -6,24 +6,28 @@ from pathlib import Path
 
 import polars as pl
 
+from common import update_manifest, write_parquet
 
-def main() -> None:
-    # Read in states from file
-    states_df = (
-        pl.read_parquet(NODES_PATH / "states.parquet")
-        .rename({"id": "state_id"})
-        .select("state_id", "state", "country")
-    )
-    # Read data from countries file
-    countries_df = pl.read_parquet(NODES_PATH / "countries.parquet").rename({"id": "country_id"})
+
+def create_state_in_edges(states_df: pl.DataFrame, countries_df: pl.DataFrame) -> pl.DataFrame:
+    states_df = states_df.rename({"id": "state_id"}).select("state_id", "state", "country")
+    countries_df = countries_df.rename({"id": "country_id"})
     # Join city and state dataframes on name
     edges_df = (
         countries_df.join(states_df, on="country", how="left")
         .select(["state_id", "country_id"])
         .rename({"state_id": "from", "country_id": "to"})
     )
+    return edges_df
+
+
+def main() -> None:
+    # Read in states and countries from file
+    states_df = pl.read_parquet(NODES_PATH / "states.parquet")
+    countries_df = pl.read_parquet(NODES_PATH / "countries.parquet")
+    edges_df = create_state_in_edges(states_df, countries_df)
     # Write nodes
-    edges_df.write_parquet(Path("output/edges") / "state_in.parquet")
+    write_parquet(edges_df, Path("output/edges") / "state_in.parquet")
     print(f"Wrote {len(edges_df)} edges for {len(states_df)} states")
 
 
@@ -33,3 +37,4 @@ if __name__ == "__main__":
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
     main()
+    update_manifest(Path("output"), "create_edges_location_state_country", {})
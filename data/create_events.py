@@ -0,0 +1,321 @@
+"""
+Generate a time-ordered stream of graph mutations on top of the existing dataset, to drive
+mixed read/write workloads (update throughput, and read-after-write latency).
+
+Events arrive as a Poisson process at `--rate` events/sec starting at `--start`, and each event
+is one of the following (in proportions set by the `--*_fraction` arguments):
+  - `follow`: an existing person follows another person they don't already follow. The person
+    followed is drawn with probability proportional to (followers + 1) ** `--skew`, so a skew of
+    0 is uniform, and higher skews send more of the new follows to the super nodes
+  - `unfollow`: an existing follows edge is removed
+  - `add_person`: a new person joins (with IDs continuing after the current max person ID), and
+    lives in a city drawn uniformly
+  - `move`: an existing person moves to a different city
+  - `add_interest`/`remove_interest`: a person gains an interest they didn't have, or loses one
+    that they had
+
+The stream starts from the state of the base dataset plus all delta batches, and is consistent
+with it: e.g. an unfollow always removes an edge that exists at that point in the stream, and a
+follow never duplicates one. Events are generated in chunks of `--chunk_size`, and each chunk
+is written to `output/events/part-XXXX.parquet` (or `.arrow`, with `--format ipc`), with columns
+  - `seq`, `ts`: position in the stream, and event time
+  - `op`: the event type, as above
+  - `person_id`: the person the event applies to (the follower, for follows/unfollows)
+  - `target_id`: the person followed or unfollowed, the new city (for moves and new persons),
+    or the interest gained or lost
+  - `weight`: the interaction weight of new follows (their `since` is the date of `ts`)
+  - `name`, `gender`, `birthday`, `age`, `isMarried`: the profile of new persons
+"""
+
+import argparse
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from common import (
+    get_delta_path,
+    list_delta_batches,
+    update_manifest,
+    write_parquet,
+)
+from create_delta import get_max_person_id
+from create_nodes_person import generate_profiles_vectorized
+
+OPS = ["follow", "unfollow", "add_person", "move", "add_interest", "remove_interest"]
+
+
+def read_edges(output_path: Path, filename: str) -> pl.DataFrame:
+    """Edges of the base dataset, plus those of all delta batches"""
+    paths = [output_path / "edges" / filename]
+    for batch in list_delta_batches(output_path):
+        paths.append(get_delta_path(output_path, batch) / "edges" / filename)
+    return pl.concat([pl.read_parquet(path, columns=["from", "to"]) for path in paths])
+
+
+def remove_keys(keys: np.ndarray, removed: np.ndarray) -> np.ndarray:
+    # `keys` is sorted, and `removed` is a subset of it
+    return np.delete(keys, np.searchsorted(keys, removed))
+
+
+def insert_keys(keys: np.ndarray, added: np.ndarray) -> np.ndarray:
+    # `keys` is sorted, and `added` is disjoint from it
+    added = np.sort(added)
+    return np.insert(keys, np.searchsorted(keys, added), added)
+
+
+def sample_new_keys(
+    rng: np.random.Generator,
+    keys: np.ndarray,
+    num: int,
+    draw_pairs,
+    key_base: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Draw `num` distinct (source, target) pairs that aren't already in `keys`, where
+    `draw_pairs(size)` draws up to `size` candidate pairs, and a pair's key is
+    `source * key_base + target`. Candidates are oversampled and filtered until enough are left.
+    """
+    sources = np.empty(0, dtype=np.int64)
+    targets = np.empty(0, dtype=np.int64)
+    while len(sources) < num:
+        size = int((num - len(sources)) * 1.2) + 16
+        new_sources, new_targets = draw_pairs(size)
+        sources = np.concatenate([sources, new_sources])
+        targets = np.concatenate([targets, new_targets])
+        pair_keys = sources * key_base + targets
+        # Keep the first occurrence of each new pair, in draw order
+        _, first = np.unique(pair_keys, return_index=True)
+        first = np.sort(first)
+        is_new = np.ones(len(first), dtype=bool)
+        if len(keys):
+            pos = np.searchsorted(keys, pair_keys[first]).clip(max=len(keys) - 1)
+            is_new = keys[pos] != pair_keys[first]
+        sources, targets = sources[first[is_new]], targets[first[is_new]]
+    return sources[:num], targets[:num]
+
+
+class GraphState:
+    """
+    The parts of the graph that events depend on, kept as NumPy arrays indexed by person ID:
+    follows and interests as sorted arrays of `source * key_base + target` keys, the follower
+    count of each person, and the city each person lives in.
+    """
+
+    def __init__(self, output_path: Path, num_events: int) -> None:
+        self.max_person_id = get_max_person_id(output_path)
+        # Upper bound on person IDs over the whole stream
+        self.key_base = self.max_person_id + num_events + 1
+        follows = read_edges(output_path, "follows.parquet")
+        self.follows = np.sort(
+            follows["from"].to_numpy() * self.key_base + follows["to"].to_numpy()
+        )
+        self.num_followers = np.bincount(follows["to"].to_numpy(), minlength=self.key_base)
+        lives_in = read_edges(output_path, "lives_in.parquet")
+        self.city = np.zeros(self.key_base, dtype=np.int64)
+        self.city[lives_in["from"].to_numpy()] = lives_in["to"].to_numpy()
+        self.city_ids = pl.read_parquet(output_path / "nodes" / "cities.parquet")["id"].to_numpy()
+        interests = read_edges(output_path, "interested_in.parquet")
+        self.interest_ids = pl.read_parquet(output_path / "nodes" / "interests.parquet")[
+            "id"
+        ].to_numpy()
+        self.interests = np.sort(
+            interests["from"].to_numpy() * self.key_base + interests["to"].to_numpy()
+        )
+
+
+def create_event_chunk(
+    rng: np.random.Generator,
+    state: GraphState,
+    seq: np.ndarray,
+    ts: np.ndarray,
+    ops: np.ndarray,
+    new_persons: pl.DataFrame,
+) -> pl.DataFrame:
+    """
+    Generate the events for one chunk, given the position, time (in microseconds since the
+    epoch) and op of each event, and update the state.
+    Events within a chunk are drawn against the state at the start of the chunk (new persons
+    take part from the next chunk on), which keeps them consistent: follows and unfollows in
+    the same chunk never touch the same edge, because follows only add edges that aren't in
+    the state and unfollows only remove edges that are.
+    """
+    num_persons = state.max_person_id
+    person_id = np.zeros(len(ops), dtype=np.int64)
+    target_id = np.zeros(len(ops), dtype=np.int64)
+    weight = np.full(len(ops), np.nan)
+    positions = {op: np.flatnonzero(ops == i) for i, op in enumerate(OPS)}
+
+    # Follows, with the person followed drawn with a skew towards persons with many followers
+    follow_weights = state.num_followers[1 : num_persons + 1] + 1.0
+    follow_weights **= SKEW
+    follow_weights /= follow_weights.sum()
+
+    def draw_follows(size: int) -> tuple[np.ndarray, np.ndarray]:
+        sources = rng.integers(1, num_persons + 1, size=size)
+        targets = rng.choice(num_persons, size=size, p=follow_weights) + 1
+        # Prevent self-connecting edges
+        return sources[sources != targets], targets[sources != targets]
+
+    pos = positions["follow"]
+    sources, targets = sample_new_keys(rng, state.follows, len(pos), draw_follows, state.key_base)
+    person_id[pos], target_id[pos] = sources, targets
+    weight[pos] = np.round(rng.random(len(pos)) ** 2, 4)
+    follow_keys = sources * state.key_base + targets
+
+    # Unfollows of existing edges (there may be fewer edges than unfollows in tiny graphs)
+    pos = positions["unfollow"][: len(state.follows)]
+    unfollow_keys = rng.choice(state.follows, size=len(pos), replace=False)
+    person_id[pos], target_id[pos] = np.divmod(unfollow_keys, state.key_base)
+
+    # New persons, each living in a uniformly drawn city
+    pos = positions["add_person"]
+    person_id[pos] = new_persons["id"].to_numpy()
+    target_id[pos] = rng.choice(state.city_ids, size=len(pos))
+
+    # Moves to a different city (drawn from all cities but the current one)
+    pos = positions["move"]
+    movers = rng.integers(1, num_persons + 1, size=len(pos))
+    current = np.searchsorted(state.city_ids, state.city[movers])
+    offsets = rng.integers(1, len(state.city_ids), size=len(pos))
+    person_id[pos] = movers
+    target_id[pos] = state.city_ids[(current + offsets) % len(state.city_ids)]
+
+    # Interests gained, and lost
+    def draw_interests(size: int) -> tuple[np.ndarray, np.ndarray]:
+        return rng.integers(1, num_persons + 1, size=size), rng.choice(state.interest_ids, size)
+
+    pos = positions["add_interest"]
+    sources, targets = sample_new_keys(
+        rng, state.interests, len(pos), draw_interests, state.key_base
+    )
+    person_id[pos], target_id[pos] = sources, targets
+    added_interest_keys = sources * state.key_base + targets
+    pos = positions["remove_interest"][: len(state.interests)]
+    removed_interest_keys = rng.choice(state.interests, size=len(pos), replace=False)
+    person_id[pos], target_id[pos] = np.divmod(removed_interest_keys, state.key_base)
+
+    # Update the state for the next chunk (moves are applied in stream order, so the last wins)
+    state.follows = insert_keys(remove_keys(state.follows, unfollow_keys), follow_keys)
+    np.add.at(state.num_followers, follow_keys % state.key_base, 1)
+    np.subtract.at(state.num_followers, unfollow_keys % state.key_base, 1)
+    state.interests = insert_keys(
+        remove_keys(state.interests, removed_interest_keys), added_interest_keys
+    )
+    for op in ("add_person", "move"):
+        state.city[person_id[positions[op]]] = target_id[positions[op]]
+    state.max_person_id += len(new_persons)
+
+    # Unfollows and interest removals that couldn't be drawn are dropped
+    drawn = np.ones(len(ops), dtype=bool)
+    drawn[positions["unfollow"][len(unfollow_keys) :]] = False
+    drawn[positions["remove_interest"][len(removed_interest_keys) :]] = False
+    events_df = pl.DataFrame(
+        {
+            "seq": seq,
+            "ts": pl.Series(ts).cast(pl.Datetime("us")),
+            "op": np.array(OPS)[ops],
+            "person_id": person_id,
+            "target_id": target_id,
+            "weight": pl.Series(weight, nan_to_null=True),
+        }
+    ).filter(drawn)
+    return events_df.join(
+        new_persons.rename({"id": "person_id"}), on="person_id", how="left", maintain_order="left"
+    )
+
+
+def write_events(events_df: pl.DataFrame, path: Path) -> None:
+    if FORMAT == "ipc":
+        events_df.write_ipc(path.with_suffix(".arrow"), compression="zstd")
+    else:
+        write_parquet(events_df, path.with_suffix(".parquet"))
+
+
+def main() -> None:
+    fractions = np.array(
+        [
+            FOLLOW_FRACTION,
+            UNFOLLOW_FRACTION,
+            NEW_PERSON_FRACTION,
+            MOVE_FRACTION,
+            INTEREST_FRACTION / 2,
+            INTEREST_FRACTION / 2,
+        ]
+    )
+    rng = np.random.default_rng(SEED)
+    state = GraphState(OUTPUT_PATH, NUM_EVENTS)
+    # The op of every event is drawn up front, to generate all new persons at once
+    ops = rng.choice(len(OPS), size=NUM_EVENTS, p=fractions / fractions.sum()).astype(np.uint8)
+    num_new_persons = int((ops == OPS.index("add_person")).sum())
+    persons_df = generate_profiles_vectorized(
+        num_new_persons, np.random.SeedSequence([SEED, 1]), start_id=state.max_person_id + 1
+    )
+    # Poisson arrivals: exponential gaps between events
+    ts = rng.exponential(1e6 / RATE, size=NUM_EVENTS).cumsum().astype(np.int64)
+    ts += (START - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
+    events_path = OUTPUT_PATH / "events"
+    shutil.rmtree(events_path, ignore_errors=True)
+    events_path.mkdir(parents=True)
+    new_person_offset = 0
+    counts = dict.fromkeys(OPS, 0)
+    for chunk, chunk_start in enumerate(range(0, NUM_EVENTS, CHUNK_SIZE)):
+        chunk_end = min(chunk_start + CHUNK_SIZE, NUM_EVENTS)
+        chunk_ops = ops[chunk_start:chunk_end]
+        num_chunk_persons = int((chunk_ops == OPS.index("add_person")).sum())
+        new_persons = persons_df.slice(new_person_offset, num_chunk_persons)
+        new_person_offset += num_chunk_persons
+        events_df = create_event_chunk(
+            rng,
+            state,
+            np.arange(chunk_start, chunk_end),
+            ts[chunk_start:chunk_end],
+            chunk_ops,
+            new_persons,
+        )
+        for op, count in events_df["op"].value_counts().iter_rows():
+            counts[op] += count
+        write_events(events_df, events_path / f"part-{chunk:04d}")
+
+    duration = (ts[-1] - ts[0]) / 1e6 if NUM_EVENTS else 0.0
+    print(f"Wrote {sum(counts.values())} events ({duration:,.0f}s of stream time) to {events_path}")
+    print(", ".join(f"{op}: {count}" for op, count in counts.items()))
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_events", "-n", type=int, default=100_000, help="Number of events to generate")
+    parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Average number of events per second")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2025, 1, 1), help="Time of the start of the stream (ISO format)")
+    parser.add_argument("--skew", type=float, default=1.0, help="Exponent of the skew of new follows towards persons with many followers (0 is uniform)")
+    parser.add_argument("--follow_fraction", type=float, default=0.5, help="Fraction of follow events")
+    parser.add_argument("--unfollow_fraction", type=float, default=0.2, help="Fraction of unfollow events")
+    parser.add_argument("--new_person_fraction", type=float, default=0.05, help="Fraction of new person events")
+    parser.add_argument("--move_fraction", type=float, default=0.1, help="Fraction of events where a person moves to another city")
+    parser.add_argument("--interest_fraction", type=float, default=0.15, help="Fraction of interest events (half gained, half lost)")
+    parser.add_argument("--chunk_size", type=int, default=100_000, help="Number of events per output file")
+    parser.add_argument("--format", type=str, default="parquet", choices=["parquet", "ipc"], help="Output file format")
+    args = parser.parse_args()
+    # fmt: on
+
+    SEED = args.seed
+    NUM_EVENTS = args.num_events
+    RATE = args.rate
+    START = args.start
+    SKEW = args.skew
+    FOLLOW_FRACTION = args.follow_fraction
+    UNFOLLOW_FRACTION = args.unfollow_fraction
+    NEW_PERSON_FRACTION = args.new_person_fraction
+    MOVE_FRACTION = args.move_fraction
+    INTEREST_FRACTION = args.interest_fraction
+    CHUNK_SIZE = args.chunk_size
+    FORMAT = args.format
+    OUTPUT_PATH = Path("output")
+
+    main()
+    update_manifest(OUTPUT_PATH, "create_events", vars(args))
@@ -7,6 +7,8 @@ from pathlib import Path
 
 import polars as pl
 
+from common import update_manifest, write_parquet
+
 
 def main(filename: str) -> pl.DataFrame:
     """
@@ -18,13 +20,13 @@ def main(filename: str) -> pl.DataFrame:
     # Add ID column to function as a primary key
     ids = list(range(1, len(interests_df) + 1))
     interests_df = interests_df.with_columns(pl.Series(ids).alias("id"))
+    interests_df = interests_df.select(pl.col("id"), pl.all().exclude("id"))
     # Write to csv
-    interests_df.select(pl.col("id"), pl.all().exclude("id")).write_parquet(
-        Path("output/nodes") / "interests.parquet",
-    )
+    write_parquet(interests_df, Path("output/nodes") / "interests.parquet")
     print(f"Wrote {interests_df.shape[0]} interests nodes to parquet")
-    return interests
+    return interests_df
 
 
 if __name__ == "__main__":
     main("raw/interests.csv")
+    update_manifest(Path("output"), "create_nodes_interests", {})
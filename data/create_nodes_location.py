@@ -9,6 +9,8 @@ from typing import Any
 
 import polars as pl
 
+from common import update_manifest, write_parquet
+
 City = dict[str, Any]
 
 
@@ -56,54 +58,62 @@ def write_city_nodes(cities_of_interest: pl.DataFrame) -> pl.DataFrame:
     )
     # Add ID column to function as a primary key
     ids = list(range(1, len(city_nodes) + 1))
-    city_nodes = city_nodes.with_columns(pl.Series(ids).alias("id"))
-    # Write to csv
-    city_nodes.select(pl.col("id"), pl.all().exclude("id")).write_parquet(
-        Path("output/nodes") / "cities.parquet",
+    city_nodes = city_nodes.with_columns(pl.Series(ids).alias("id")).select(
+        pl.col("id"), pl.all().exclude("id")
     )
+    # Write to csv
+    write_parquet(city_nodes, Path("output/nodes") / "cities.parquet")
     print(f"Wrote {city_nodes.shape[0]} cities to parquet")
     return city_nodes
 
 
-def write_state_nodes(city_nodes: pl.DataFrame) -> None:
+def write_state_nodes(city_nodes: pl.DataFrame) -> pl.DataFrame:
     # Obtain unique list of states and countries
     state_nodes = city_nodes.select("state", "country").unique().sort(["country", "state"])
     # Add ID column to function as a primary key
     ids = list(range(1, len(state_nodes) + 1))
-    state_nodes = state_nodes.with_columns(pl.Series(ids).alias("id"))
-    # Write to csv
-    state_nodes.select(pl.col("id"), pl.all().exclude("id")).write_parquet(
-        Path("output/nodes") / "states.parquet",
-        compression="snappy",
+    state_nodes = state_nodes.with_columns(pl.Series(ids).alias("id")).select(
+        pl.col("id"), pl.all().exclude("id")
     )
+    # Write to csv
+    write_parquet(state_nodes, Path("output/nodes") / "states.parquet")
     print(f"Wrote {state_nodes.shape[0]} states to parquet")
+    return state_nodes
 
 
-def write_country_nodes(city_nodes: pl.DataFrame) -> None:
+def write_country_nodes(city_nodes: pl.DataFrame) -> pl.DataFrame:
     # Obtain unique list of countries
     country_nodes = city_nodes.select("country").unique().sort("country", descending=False)
     # Add ID column to function as a primary key
     ids = list(range(1, len(country_nodes) + 1))
-    country_nodes = country_nodes.with_columns(pl.Series(ids).alias("id"))
-    # Write to csv
-    country_nodes.select(pl.col("id"), pl.all().exclude("id")).write_parquet(
-        Path("output/nodes") / "countries.parquet",
-        compression="snappy",
+    country_nodes = country_nodes.with_columns(pl.Series(ids).alias("id")).select(
+        pl.col("id"), pl.all().exclude("id")
     )
+    # Write to csv
+    write_parquet(country_nodes, Path("output/nodes") / "countries.parquet")
     print(f"Wrote {country_nodes.shape[0]} countries to parquet")
+    return country_nodes
 
 
-def main(input_file: str) -> None:
+def create_location_nodes(
+    input_file: str, num: int
+) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Write the city, state and country nodes, and return them"""
     world_cities = pl.read_csv(input_file, infer_schema_length=10_000)
     cities_of_interest = get_cities_df(world_cities)
-    if NUM > 0:
-        cities_of_interest = cities_of_interest.head(NUM)
+    if num > 0:
+        cities_of_interest = cities_of_interest.head(num)
     # Cities
     city_nodes = write_city_nodes(cities_of_interest)
     # States
-    write_state_nodes(city_nodes)
+    state_nodes = write_state_nodes(city_nodes)
     # Countries
-    write_country_nodes(city_nodes)
+    country_nodes = write_country_nodes(city_nodes)
+    return city_nodes, state_nodes, country_nodes
+
+
+def main(input_file: str) -> None:
+    create_location_nodes(input_file, NUM)
 
 
 if __name__ == "__main__":
@@ -123,3 +133,4 @@ if __name__ == "__main__":
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
     main(INPUT_FILE)
+    update_manifest(Path("output"), "create_nodes_location", vars(args))
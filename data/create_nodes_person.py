@@ -2,18 +2,37 @@
 Generate fake person profiles and write to parquet.
 A 50-50% male/female profile distribution is used and names are
 generated using the faker library.
+
+Two generation modes are available:
+  - `faker` (default): calls Faker once per field per person, row by row
+  - `vectorized`: draws names from Faker's name pools and all other fields via NumPy arrays,
+    building the Polars frame column-wise (orders of magnitude faster at large scale)
+
+With `--workers`, the ID range is split into fixed-size shards that are generated in a process
+pool (vectorized mode only) and written to a `persons/part-XXXX.parquet` directory.
 """
 
 import argparse
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import polars as pl
 from faker import Faker
+from faker.providers.person.en_US import Provider as PersonProvider
+
+from common import remove_deltas, update_manifest, write_parquet
 
 Profile = dict[str, Any]
 
+BIRTHDAY_START = date(1970, 1, 1)
+BIRTHDAY_END = date(2000, 12, 31)
+EPOCH = date(1970, 1, 1)
+
 
 def generate_fake_profiles(num: int, gender: str = "female") -> list[Profile]:
     """Generate fake profile for either a man or woman"""
@@ -27,9 +46,7 @@ def generate_fake_profiles(num: int, gender: str = "female") -> list[Profile]:
             assert gender == "male", "Please specify a gender of either male or female"
             profile["name"] = f"{fake.first_name_male()} {fake.last_name_male()}"
         profile["gender"] = gender
-        profile["birthday"] = fake.date_between(
-            start_date=date(1970, 1, 1), end_date=date(2000, 12, 31)
-        )
+        profile["birthday"] = fake.date_between(start_date=BIRTHDAY_START, end_date=BIRTHDAY_END)
         profile["age"] = (date.today() - profile["birthday"]).days // 365
         profile["isMarried"] = fake.random_element(elements=(True, False))
         profiles.append(profile)
@@ -50,21 +67,144 @@ def create_person_df(male_profiles: list[Profile], female_profiles: list[Profile
     return persons_df
 
 
-def main() -> None:
-    num_male = NUM // 2
-    num_female = NUM - num_male
-
-    # Generate male profile
+def generate_profiles_faker(num: int, seed: int) -> pl.DataFrame:
+    """
+    Generate `num` person profiles row by row via Faker, seeding the module-level `fake`
+    and `SEED` that the Faker path relies on.
+    """
+    global fake, SEED
+    Faker.seed(seed)
+    fake = Faker()
+    SEED = seed
+    num_male = num // 2
+    num_female = num - num_male
+    # Generate male and female profiles
     female_profiles = generate_fake_profiles(num_female, gender="female")
     male_profiles = generate_fake_profiles(num_male, gender="male")
-
     # Create person dataframe
-    persons_df = create_person_df(female_profiles, male_profiles)
-    # Write nodes
-    persons_df.select(pl.col("id"), pl.all().exclude("id")).write_parquet(
-        Path("output/nodes") / "persons.parquet",
+    return create_person_df(female_profiles, male_profiles)
+
+
+def get_name_pool(names: dict[str, float]) -> tuple[pl.Series, np.ndarray]:
+    """Convert one of Faker's weighted name lists into a name pool and its sampling probabilities"""
+    pool = pl.Series(list(names.keys()), dtype=pl.String)
+    weights = np.fromiter(names.values(), dtype=np.float64, count=len(names))
+    return pool, weights / weights.sum()
+
+
+def draw_names(rng: np.random.Generator, names: dict[str, float], size: int) -> pl.Series:
+    """Draw `size` names (with replacement) from a weighted Faker name pool"""
+    pool, probs = get_name_pool(names)
+    return pool.gather(rng.choice(len(pool), size=size, p=probs))
+
+
+def generate_profiles_vectorized(
+    num: int, seed: int | np.random.SeedSequence, start_id: int = 1
+) -> pl.DataFrame:
+    """
+    Generate `num` person profiles column-wise, without a per-row Python loop.
+    IDs are contiguous, starting at `start_id`.
+      - First/last names are drawn from Faker's en_US name pools, weighted by name frequency
+      - Gender is a shuffled 50-50 split, birthdays are uniform over the same date range as
+        the Faker path, and marital status is a fair coin flip
+    The output has the same schema as the Faker path, and is reproducible for a given seed.
+    """
+    print(f"Generate {num} fake profiles (vectorized).")
+    rng = np.random.default_rng(seed)
+    num_male = num // 2
+    num_female = num - num_male
+    is_female = np.zeros(num, dtype=bool)
+    is_female[:num_female] = True
+    rng.shuffle(is_female)
+    female_idx = np.flatnonzero(is_female)
+    male_idx = np.flatnonzero(~is_female)
+    # Draw first/last names per gender, then scatter them back into person order
+    order = np.argsort(np.concatenate([female_idx, male_idx]), kind="stable")
+    first_names = pl.concat(
+        [
+            draw_names(rng, PersonProvider.first_names_female, num_female),
+            draw_names(rng, PersonProvider.first_names_male, num_male),
+        ]
+    ).gather(order)
+    last_names = draw_names(rng, PersonProvider.last_names, num)
+    # Birthdays are drawn as days since the epoch (both ends inclusive)
+    start = (BIRTHDAY_START - EPOCH).days
+    end = (BIRTHDAY_END - EPOCH).days
+    birthdays = rng.integers(start, end + 1, size=num, dtype=np.int32)
+    ages = ((date.today() - EPOCH).days - birthdays.astype(np.int64)) // 365
+    is_married = rng.random(num) < 0.5
+
+    persons_df = pl.DataFrame(
+        {
+            "id": np.arange(start_id, start_id + num, dtype=np.int64),
+            "first_name": first_names,
+            "last_name": last_names,
+            "is_female": is_female,
+            "birthday": pl.Series(birthdays).cast(pl.Date),
+            "age": ages,
+            "isMarried": is_married,
+        }
+    ).select(
+        "id",
+        pl.concat_str("first_name", "last_name", separator=" ").alias("name"),
+        pl.when("is_female").then(pl.lit("female")).otherwise(pl.lit("male")).alias("gender"),
+        "birthday",
+        "age",
+        "isMarried",
+    )
+    return persons_df
+
+
+def generate_shard(shard: int, start_id: int, num: int, seed: np.random.SeedSequence) -> int:
+    """Generate one shard of persons and write it to its own part file"""
+    persons_df = generate_profiles_vectorized(num, seed, start_id=start_id)
+    write_parquet(persons_df, Path("output/nodes/persons") / f"part-{shard:04d}.parquet")
+    return len(persons_df)
+
+
+def main_sharded() -> None:
+    """
+    Split the ID range into shards of `SHARD_SIZE` persons and generate them in a process pool.
+    Each shard gets its own seed, spawned from `SEED`, so the output only depends on the seed
+    and shard size, and not on the number of workers.
+    """
+    start = time.perf_counter()
+    num_shards = max(-(-NUM // SHARD_SIZE), 1)
+    shard_seeds = np.random.SeedSequence(SEED).spawn(num_shards)
+    starts = [1 + shard * SHARD_SIZE for shard in range(num_shards)]
+    sizes = [min(SHARD_SIZE, NUM - shard * SHARD_SIZE) for shard in range(num_shards)]
+    # Remove outputs from previous runs so that downstream scripts only see this dataset
+    Path("output/nodes/persons.parquet").unlink(missing_ok=True)
+    shutil.rmtree("output/nodes/persons", ignore_errors=True)
+    remove_deltas(Path("output"))
+    Path("output/nodes/persons").mkdir(parents=True)
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        counts = executor.map(generate_shard, range(num_shards), starts, sizes, shard_seeds)
+        total = sum(counts)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Wrote {total} person nodes to {num_shards} parquet shards with {WORKERS} workers "
+        f"in {elapsed:.2f}s ({total / elapsed:,.0f} persons/sec)"
     )
+
+
+def write_persons(persons_df: pl.DataFrame) -> pl.DataFrame:
+    """Write person nodes to a single parquet file, and return them as written"""
+    # Remove any sharded output from a previous `--workers` run
+    shutil.rmtree("output/nodes/persons", ignore_errors=True)
+    remove_deltas(Path("output"))
+    persons_df = persons_df.select(pl.col("id"), pl.all().exclude("id"))
+    write_parquet(persons_df, Path("output/nodes") / "persons.parquet")
     print(f"Wrote {persons_df.shape[0]} person nodes to parquet")
+    return persons_df
+
+
+def main() -> None:
+    if MODE == "vectorized":
+        persons_df = generate_profiles_vectorized(NUM, SEED)
+    else:
+        persons_df = generate_profiles_faker(NUM, SEED)
+    write_persons(persons_df)
 
 
 if __name__ == "__main__":
@@ -72,11 +212,19 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--num", "-n", type=int, default=10_000, help="Number of fake profiles to generate")
     parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    parser.add_argument("--mode", "-m", type=str, default="faker", choices=["faker", "vectorized"], help="Generate profiles row by row via Faker, or column-wise via NumPy")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Generate sharded output in a pool of this many processes (vectorized mode)")
+    parser.add_argument("--shard_size", type=int, default=1_000_000, help="Number of persons per shard when using --workers")
     args = parser.parse_args()
     # fmt: on
 
     SEED = args.seed
     NUM = args.num
+    MODE = args.mode
+    WORKERS = args.workers
+    SHARD_SIZE = args.shard_size
+    if WORKERS is not None and MODE != "vectorized":
+        parser.error("--workers requires --mode vectorized")
     # Create faker object
     Faker.seed(SEED)
     fake = Faker()
@@ -84,4 +232,8 @@ if __name__ == "__main__":
     Path("output/nodes").mkdir(parents=True, exist_ok=True)
     Path("output/edges").mkdir(parents=True, exist_ok=True)
 
-    main()
+    if WORKERS is not None:
+        main_sharded()
+    else:
+        main()
+    update_manifest(Path("output"), "create_nodes_person", vars(args))
@@ -0,0 +1,245 @@
+"""
+Generate the full dataset in a single process, as a DAG of stages.
+
+Each stage is one of the `create_*.py` scripts, called as a function. Stages receive the frames
+produced by the stages they depend on in memory (rather than re-reading them from disk), and
+stages whose dependencies are met run concurrently in a thread pool (Polars and NumPy release
+the GIL for the heavy lifting). Every stage still writes its output file, and the files are
+identical to those written by running the scripts one after another via `generate_data.sh`.
+
+```
+uv run generate_data.py -n 100000
+```
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import polars as pl
+
+import create_edges_follows
+import create_edges_interests
+import create_edges_location
+import create_edges_location_city_state
+import create_edges_location_state_country
+import create_nodes_interests
+import create_nodes_location
+import create_nodes_person
+from common import PARQUET_LAYOUTS, get_peak_rss_mb, update_manifest, write_parquet
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    # Names of the stages whose results are passed (in order) as arguments to `func`
+    deps: list[str] = field(default_factory=list)
+
+
+@dataclass
+class StageResult:
+    name: str
+    elapsed: float
+    output_mb: float
+    peak_rss_mb: float
+
+
+def get_output_mb(result: Any) -> float:
+    """Estimated in-memory size of the frame(s) returned by a stage"""
+    frames = result if isinstance(result, tuple) else (result,)
+    return sum(df.estimated_size("mb") for df in frames if isinstance(df, pl.DataFrame))
+
+
+def persons_stage() -> pl.DataFrame:
+    if MODE == "vectorized":
+        persons_df = create_nodes_person.generate_profiles_vectorized(NUM, SEED)
+    else:
+        persons_df = create_nodes_person.generate_profiles_faker(NUM, SEED)
+    return create_nodes_person.write_persons(persons_df)
+
+
+def locations_stage() -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    return create_nodes_location.create_location_nodes(INPUT_FILE, NUM_LOCATIONS)
+
+
+def interests_stage() -> pl.DataFrame:
+    return create_nodes_interests.main(INTERESTS_FILE)
+
+
+def follows_stage(persons_df: pl.DataFrame) -> pl.DataFrame:
+    # Same steps as `create_edges_follows.main`, on the persons frame passed in memory
+    if create_edges_follows.MODEL == "uniform":
+        edges_df = create_edges_follows.create_uniform_edges(persons_df, SEED)
+    else:
+        edges_df = create_edges_follows.create_model_edges(
+            persons_df, np.random.default_rng(SEED)
+        )
+    edges_df = create_edges_follows.add_edge_properties(
+        edges_df.select("from", "to"), create_edges_follows.get_property_rng(SEED)
+    )
+    write_parquet(edges_df, Path("output/edges") / "follows.parquet")
+    print(f"Wrote {len(edges_df)} edges for {len(persons_df)} persons")
+    create_edges_follows.print_degree_stats(edges_df, persons_df)
+    return edges_df
+
+
+def lives_in_stage(
+    persons_df: pl.DataFrame, locations: tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]
+) -> pl.DataFrame:
+    cities_df, _, _ = locations
+    edges_df = create_edges_location.create_lives_in_edges(persons_df, cities_df, SEED)
+    write_parquet(edges_df, Path("output/edges") / "lives_in.parquet")
+    return edges_df
+
+
+def interested_in_stage(persons_df: pl.DataFrame, interests_df: pl.DataFrame) -> pl.DataFrame:
+    edges_df = create_edges_interests.create_interested_in_edges(persons_df, interests_df, SEED)
+    write_parquet(edges_df, Path("output/edges") / "interested_in.parquet")
+    print(f"Wrote {len(edges_df)} edges for {len(persons_df)} persons")
+    return edges_df
+
+
+def city_in_stage(locations: tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]) -> pl.DataFrame:
+    cities_df, states_df, _ = locations
+    edges_df = create_edges_location_city_state.create_city_in_edges(cities_df, states_df)
+    write_parquet(edges_df, Path("output/edges") / "city_in.parquet")
+    print(f"Wrote {len(edges_df)} edges for {len(cities_df)} cities")
+    return edges_df
+
+
+def state_in_stage(locations: tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]) -> pl.DataFrame:
+    _, states_df, countries_df = locations
+    edges_df = create_edges_location_state_country.create_state_in_edges(states_df, countries_df)
+    write_parquet(edges_df, Path("output/edges") / "state_in.parquet")
+    print(f"Wrote {len(edges_df)} edges for {len(states_df)} states")
+    return edges_df
+
+
+STAGES = [
+    # Nodes
+    Stage("persons", persons_stage),
+    Stage("locations", locations_stage),
+    Stage("interests", interests_stage),
+    # Edges
+    Stage("follows", follows_stage, ["persons"]),
+    Stage("lives_in", lives_in_stage, ["persons", "locations"]),
+    Stage("interested_in", interested_in_stage, ["persons", "interests"]),
+    Stage("city_in", city_in_stage, ["locations"]),
+    Stage("state_in", state_in_stage, ["locations"]),
+]
+
+
+def run_stage(stage: Stage, *args: Any) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = stage.func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_pipeline(stages: list[Stage], workers: int) -> list[StageResult]:
+    """
+    Run the stages in dependency order, submitting each stage as soon as all of its
+    dependencies have finished. Results of a stage are released once every stage that depends
+    on it has finished, so that memory isn't held for the whole run.
+    """
+    results: dict[str, Any] = {}
+    pending = {stage.name: stage for stage in stages}
+    remaining_uses = {stage.name: 0 for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            remaining_uses[dep] += 1
+    running: dict[Future, Stage] = {}
+    stage_results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    args = [results[dep] for dep in stage.deps]
+                    running[executor.submit(run_stage, stage, *args)] = stage
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Unresolvable stage dependencies: {list(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                result, elapsed = future.result()
+                stage_results.append(
+                    StageResult(stage.name, elapsed, get_output_mb(result), get_peak_rss_mb())
+                )
+                results[stage.name] = result
+                for dep in stage.deps:
+                    remaining_uses[dep] -= 1
+                    if remaining_uses[dep] == 0:
+                        del results[dep]
+    return stage_results
+
+
+def print_stage_results(stage_results: list[StageResult], elapsed: float) -> None:
+    """
+    Peak RSS is the high-water mark of the whole process at the time the stage finished,
+    so with concurrent stages it also includes the stages that ran alongside it.
+    """
+    print(f"\n{'stage':>14} | {'time (s)':>9} | {'output (MB)':>11} | {'peak RSS (MB)':>13}")
+    for result in stage_results:
+        print(
+            f"{result.name:>14} | {result.elapsed:>9.2f} | {result.output_mb:>11.1f} | "
+            f"{result.peak_rss_mb:>13.0f}"
+        )
+    print(f"{'total':>14} | {elapsed:>9.2f} | {'':>11} | {get_peak_rss_mb():>13.0f}")
+
+
+def main() -> None:
+    start = time.perf_counter()
+    stage_results = run_pipeline(STAGES, WORKERS)
+    print_stage_results(stage_results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num", "-n", type=int, default=1000, help="Number of person profiles to generate")
+    parser.add_argument("--seed", "-s", type=int, default=0, help="Random seed")
+    parser.add_argument("--mode", "-m", type=str, default="faker", choices=["faker", "vectorized"], help="Generate profiles row by row via Faker, or column-wise via NumPy")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Number of stages to run concurrently")
+    parser.add_argument("--input_file", type=str, default="raw/worldcities.csv", help="Input file for raw location info")
+    parser.add_argument("--num_locations", type=int, default=10_000, help="Limit the number of locations to generate")
+    parser.add_argument("--model", type=str, default="uniform", choices=["uniform", "chung-lu", "preferential", "communities"], help="Model used to generate the follows graph")
+    parser.add_argument("--avg_degree", type=float, default=10.0, help="Average number of edges per person (chung-lu, preferential, communities)")
+    parser.add_argument("--zipf_exponent", type=float, default=2.5, help="Power-law exponent of the degree distribution (chung-lu)")
+    parser.add_argument("--pa_uniform_fraction", type=float, default=0.2, help="Fraction of edges attached uniformly rather than preferentially (preferential)")
+    parser.add_argument("--num_communities", type=int, default=None, help="Number of planted communities, defaults to 1 per 1000 persons (communities)")
+    parser.add_argument("--community_size", type=int, default=50, help="Number of persons per planted community (communities)")
+    parser.add_argument("--community_density", type=float, default=0.5, help="Probability of an edge between two members of a community (communities)")
+    parser.add_argument("--layout", type=str, default=None, choices=list(PARQUET_LAYOUTS), help="Parquet layout of the output files (defaults to $PARQUET_LAYOUT, or `default`)")
+    args = parser.parse_args()
+    # fmt: on
+
+    SEED = args.seed
+    NUM = args.num
+    MODE = args.mode
+    WORKERS = args.workers
+    INPUT_FILE = args.input_file
+    NUM_LOCATIONS = args.num_locations
+    INTERESTS_FILE = "raw/interests.csv"
+    # Module globals of `create_edges_follows.py`, set from its command line arguments when run
+    # as a script
+    create_edges_follows.MODEL = args.model
+    create_edges_follows.AVG_DEGREE = args.avg_degree
+    create_edges_follows.ZIPF_EXPONENT = args.zipf_exponent
+    create_edges_follows.PA_UNIFORM_FRACTION = args.pa_uniform_fraction
+    create_edges_follows.NUM_COMMUNITIES = args.num_communities
+    create_edges_follows.COMMUNITY_SIZE = args.community_size
+    create_edges_follows.COMMUNITY_DENSITY = args.community_density
+    if args.layout is not None:
+        os.environ["PARQUET_LAYOUT"] = args.layout
+    # Create output dirs
+    Path("output/nodes").mkdir(parents=True, exist_ok=True)
+    Path("output/edges").mkdir(parents=True, exist_ok=True)
+
+    main()
+    update_manifest(Path("output"), "generate_data", vars(args))
@@ -7,14 +7,5 @@ cd data
 # Default value is 1000
 echo "Generating $1 samples of data";
 
-# Nodes
-python create_nodes_person.py -n ${1-1000}
-python create_nodes_location.py
-python create_nodes_interests.py
-
-# Edges
-python create_edges_follows.py
-python create_edges_location.py
-python create_edges_interests.py
-python create_edges_location_city_state.py
-python create_edges_location_state_country.py
+# Nodes and edges are generated by a single in-process pipeline (see data/generate_data.py)
+python generate_data.py -n ${1-1000}
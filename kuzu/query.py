@@ -2,6 +2,7 @@
 Run a series of queries on an existing Kùzu database
 """
 import time
+from datetime import date
 from typing import Any
 
 import kuzu
@@ -38,6 +39,41 @@ def run_query2(conn: Connection) -> None:
     return result
 
 
+def has_degrees(conn: Connection) -> bool:
+    "Whether the database was built with materialized degrees (`build_graph.py --degrees`)"
+    response = conn.execute("CALL TABLE_INFO('Person') RETURN name")
+    return "in_degree" in response.get_as_pl()["name"].to_list()
+
+
+def run_query1_precomputed(conn: Connection) -> None:
+    "Who are the top 3 most-followed persons in the network? (materialized degrees)"
+    query = """
+        MATCH (person:Person)
+        RETURN person.id AS personID, person.name AS name, person.in_degree AS numFollowers
+        ORDER BY numFollowers DESC LIMIT 3;
+    """
+    print(f"\nQuery 1 (precomputed):\n {query}")
+    response = conn.execute(query)
+    result = response.get_as_pl()
+    print(f"Top 3 most-followed persons:\n{result}")
+    return result
+
+
+def run_query2_precomputed(conn: Connection) -> None:
+    "In which city does the most-followed person in the network live? (materialized degrees)"
+    query = """
+        MATCH (person:Person)
+        WITH person ORDER BY person.in_degree DESC LIMIT 1
+        MATCH (person) -[:LivesIn]-> (city:City)
+        RETURN person.name AS name, person.in_degree AS numFollowers, city.city AS city, city.state AS state, city.country AS country;
+    """
+    print(f"\nQuery 2 (precomputed):\n {query}")
+    response = conn.execute(query)
+    result = response.get_as_pl()
+    print(f"City in which most-followed person lives:\n{result}")
+    return result
+
+
 def run_query3(conn: Connection, params: list[tuple[str, Any]]) -> None:
     "Which 5 cities in a particular country have the lowest average age in the network?"
     query = """
@@ -166,10 +202,47 @@ def run_query9(conn: Connection, params: list[tuple[str, Any]]) -> None:
     return result
 
 
+def run_query10(conn: Connection, params: list[tuple[str, Any]]) -> None:
+    "Which 5 cities gained the most followers (of persons living there) in a given date window?"
+    query = """
+        MATCH (follower:Person)-[f:Follows]->(person:Person)-[:LivesIn]->(c:City)
+        WHERE f.since >= $start_date AND f.since <= $end_date
+        RETURN c.city AS city, c.country AS country, count(*) AS numFollows
+        ORDER BY numFollows DESC LIMIT 5
+    """
+    print(f"\nQuery 10:\n {query}")
+    response = conn.execute(query, parameters=params)
+    result = response.get_as_pl()
+    print(
+        f"Cities with the most follows created between {params['start_date']} and {params['end_date']}:\n{result}"
+    )
+    return result
+
+
+def run_query11(conn: Connection, params: list[tuple[str, Any]]) -> None:
+    "Which 3 persons have the highest total interaction weight from their strongly-engaged followers?"
+    query = """
+        MATCH (follower:Person)-[f:Follows]->(person:Person)
+        WHERE f.weight >= $min_weight
+        RETURN person.id AS personID, person.name AS name, count(*) AS numFollowers, sum(f.weight) AS totalWeight
+        ORDER BY totalWeight DESC LIMIT 3
+    """
+    print(f"\nQuery 11:\n {query}")
+    response = conn.execute(query, parameters=params)
+    result = response.get_as_pl()
+    print(
+        f"Persons with the highest total weight from followers with weight >= {params['min_weight']}:\n{result}"
+    )
+    return result
+
+
 def main(conn: Connection) -> None:
     start = time.perf_counter()
     _ = run_query1(conn)
     _ = run_query2(conn)
+    if has_degrees(conn):
+        _ = run_query1_precomputed(conn)
+        _ = run_query2_precomputed(conn)
     _ = run_query3(conn, params={"country": "United States"})
     _ = run_query4(conn, params={"age_lower": 30, "age_upper": 40})
     _ = run_query5(
@@ -193,6 +266,10 @@ def main(conn: Connection) -> None:
     )
     _ = run_query8(conn)
     _ = run_query9(conn, params={"age_1": 50, "age_2": 25})
+    _ = run_query10(
+        conn, params={"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)}
+    )
+    _ = run_query11(conn, params={"min_weight": 0.5})
     elapsed = time.perf_counter() - start
     print(f"Queries completed in {elapsed:.4f}s")
 
@@ -7,6 +7,8 @@ Command used:
 uv run pytest benchmark_query.py --benchmark-min-rounds=5 --benchmark-warmup-iterations=5 --benchmark-disable-gc --benchmark-sort=fullname
 ```
 """
+from datetime import date
+
 import pytest
 import real_ladybug as lb
 
@@ -20,35 +22,59 @@ def connection():
     yield conn
 
 
-def test_benchmark_query1(benchmark, connection):
+def test_benchmark_query1(benchmark, connection, golden):
     result = benchmark(query.run_query1, connection)
+    golden.check(1, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
 
-def test_benchmark_query2(benchmark, connection):
+def test_benchmark_query2(benchmark, connection, golden):
     result = benchmark(query.run_query2, connection)
+    golden.check(2, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query1_precomputed(benchmark, connection, golden):
+    if not query.has_degrees(connection):
+        pytest.skip("Build the database with `build_graph.py --degrees`")
+    result = benchmark(query.run_query1_precomputed, connection)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query2_precomputed(benchmark, connection, golden):
+    if not query.has_degrees(connection):
+        pytest.skip("Build the database with `build_graph.py --degrees`")
+    result = benchmark(query.run_query2_precomputed, connection)
+    golden.check(2, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query3(benchmark, connection):
+def test_benchmark_query3(benchmark, connection, golden):
     result = benchmark(query.run_query3, connection, {"country": "United States"})
+    golden.check(3, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query4(benchmark, connection):
+def test_benchmark_query4(benchmark, connection, golden):
     result = benchmark(query.run_query4, connection, {"age_lower": 30, "age_upper": 40})
+    golden.check(4, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
 
-def test_benchmark_query5(benchmark, connection):
+def test_benchmark_query5(benchmark, connection, golden):
     result = benchmark(
         query.run_query5,
         connection,
@@ -59,12 +85,13 @@ def test_benchmark_query5(benchmark, connection):
             "interest": "fine dining",
         },
     )
+    golden.check(5, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query6(benchmark, connection):
+def test_benchmark_query6(benchmark, connection, golden):
     result = benchmark(
         query.run_query6,
         connection,
@@ -73,12 +100,13 @@ def test_benchmark_query6(benchmark, connection):
             "interest": "tennis",
         },
     )
+    golden.check(6, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query7(benchmark, connection):
+def test_benchmark_query7(benchmark, connection, golden):
     result = benchmark(
         query.run_query7,
         connection,
@@ -89,20 +117,43 @@ def test_benchmark_query7(benchmark, connection):
             "interest": "photography",
         },
     )
+    golden.check(7, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query8(benchmark, connection):
+def test_benchmark_query8(benchmark, connection, golden):
     result = benchmark(query.run_query8, connection)
+    golden.check(8, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query9(benchmark, connection):
+def test_benchmark_query9(benchmark, connection, golden):
     result = benchmark(query.run_query9, connection, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
     result = result.to_dicts()
 
     assert len(result) == 1
+
+
+def test_benchmark_query10(benchmark, connection, golden):
+    result = benchmark(
+        query.run_query10,
+        connection,
+        {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    )
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query11(benchmark, connection, golden):
+    result = benchmark(query.run_query11, connection, {"min_weight": 0.5})
+    golden.check(11, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
@@ -1,4 +1,6 @@
+import argparse
 import asyncio
+import json
 import time
 from pathlib import Path
 
@@ -7,6 +9,64 @@ import real_ladybug as lb
 DATA_PATH = Path(__file__).resolve().parents[1] / "data"
 NODES_PATH = DATA_PATH / "output" / "nodes"
 EDGES_PATH = DATA_PATH / "output" / "edges"
+DELTAS_PATH = DATA_PATH / "output" / "deltas"
+# Written by the data generation scripts, see `data/common.py`
+MANIFEST_PATH = DATA_PATH / "output" / "manifest.json"
+
+
+def get_persons_path() -> str:
+    # Persons generated with `--workers` are sharded into a directory of Parquet files
+    shards_path = NODES_PATH / "persons"
+    if shards_path.is_dir():
+        return f"{shards_path}/*.parquet"
+    return f"{NODES_PATH}/persons.parquet"
+
+
+def get_delta_path(batch: int) -> Path:
+    # Incremental batches written by `data/create_delta.py`
+    return DELTAS_PATH / f"batch-{batch:04d}"
+
+
+def get_copy_source(base_path: str, delta_file: str, delta_paths: list[Path]) -> str:
+    """
+    Source of a COPY statement: the base file, plus the same file in each delta batch
+    (passed as a list of paths, which are all read in a single COPY)
+    """
+    paths = [base_path, *(f"{delta_path}/{delta_file}" for delta_path in delta_paths)]
+    if len(paths) == 1:
+        return f"'{base_path}'"
+    return "[" + ", ".join(f"'{path}'" for path in paths) + "]"
+
+
+def get_input_checksums(dirs: list[str]) -> dict[str, str] | None:
+    """
+    Checksums (from the dataset manifest) of the Parquet files under the given directories of
+    `data/output`. Returns None if there's no manifest, or if it's out of date with the files.
+    """
+    if not MANIFEST_PATH.exists():
+        return None
+    manifest_files = json.loads(MANIFEST_PATH.read_text())["files"]
+    checksums = {}
+    for dir_name in dirs:
+        for path in sorted((MANIFEST_PATH.parent / dir_name).rglob("*.parquet")):
+            name = path.relative_to(MANIFEST_PATH.parent).as_posix()
+            entry = manifest_files.get(name, {})
+            stat = path.stat()
+            if (entry.get("bytes"), entry.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                return None
+            checksums[name] = entry["checksum"]
+    return checksums
+
+
+def read_build_manifest(path: Path) -> dict[str, str] | None:
+    # Input files (and their checksums) that the existing database was built from
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["files"]
+
+
+def write_build_manifest(path: Path, checksums: dict[str, str]) -> None:
+    path.write_text(json.dumps({"files": checksums}, indent=2))
 
 
 async def create_person_node_table(conn: lb.AsyncConnection) -> None:
@@ -86,14 +146,60 @@ async def create_interest_node_table(conn: lb.AsyncConnection) -> None:
 
 async def create_edge_tables(conn: lb.AsyncConnection) -> None:
     # Create edge schemas
-    await conn.execute("CREATE REL TABLE Follows(FROM Person TO Person)")
+    await conn.execute("CREATE REL TABLE Follows(FROM Person TO Person, since DATE, weight DOUBLE)")
     await conn.execute("CREATE REL TABLE LivesIn(FROM Person TO City)")
     await conn.execute("CREATE REL TABLE HasInterest(FROM Person TO Interest)")
     await conn.execute("CREATE REL TABLE CityIn(FROM City TO State)")
     await conn.execute("CREATE REL TABLE StateIn(FROM State TO Country)")
 
 
-async def main(conn: lb.AsyncConnection) -> None:
+async def has_degrees(conn: lb.AsyncConnection) -> bool:
+    response = await conn.execute("CALL TABLE_INFO('Person') RETURN name")
+    return "in_degree" in response.get_as_pl()["name"].to_list()
+
+
+async def materialize_degrees(conn: lb.AsyncConnection) -> None:
+    """
+    Store the number of Follows edges into and out of each person as the Person properties
+    `in_degree` and `out_degree`, so that the follower counts are a single column to read
+    """
+    start = time.perf_counter()
+    for column in ("in_degree", "out_degree"):
+        await conn.execute(f"ALTER TABLE Person ADD IF NOT EXISTS {column} INT64 DEFAULT 0")
+    # Reset first, as persons without edges in either direction aren't matched below
+    await conn.execute("MATCH (p:Person) SET p.in_degree = 0, p.out_degree = 0")
+    await conn.execute(
+        "MATCH (p:Person)<-[:Follows]-(:Person) WITH p, count(*) AS degree SET p.in_degree = degree"
+    )
+    await conn.execute(
+        "MATCH (p:Person)-[:Follows]->(:Person) WITH p, count(*) AS degree SET p.out_degree = degree"
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Degrees materialized in {elapsed:.4f}s")
+
+
+async def ingest_delta(conn: lb.AsyncConnection, batch: int) -> None:
+    """Ingest a delta batch into the existing database, without rebuilding it"""
+    delta_path = get_delta_path(batch)
+    if not delta_path.is_dir():
+        raise FileNotFoundError(f"Delta batch {batch} not found at {delta_path}")
+    start = time.perf_counter()
+    # The columns are listed, as the table may also have the materialized degrees (`--degrees`)
+    await conn.execute(
+        "COPY Person(id, name, gender, birthday, age, isMarried) "
+        f"FROM '{delta_path}/nodes/persons.parquet';"
+    )
+    await conn.execute(f"COPY Follows FROM '{delta_path}/edges/follows.parquet';")
+    await conn.execute(f"COPY LivesIn FROM '{delta_path}/edges/lives_in.parquet';")
+    await conn.execute(f"COPY HasInterest FROM '{delta_path}/edges/interested_in.parquet';")
+    elapsed = time.perf_counter() - start
+    print(f"Delta batch {batch} loaded in {elapsed:.4f}s")
+    # Materialized degrees are out of date once new edges are in
+    if await has_degrees(conn):
+        await materialize_degrees(conn)
+
+
+async def main(conn: lb.AsyncConnection, delta_paths: list[Path], degrees: bool = False) -> None:
     nodes_start = time.perf_counter()
     # Nodes
     await create_person_node_table(conn)
@@ -101,7 +207,8 @@ async def main(conn: lb.AsyncConnection) -> None:
     await create_state_node_table(conn)
     await create_country_node_table(conn)
     await create_interest_node_table(conn)
-    await conn.execute(f"COPY Person FROM '{NODES_PATH}/persons.parquet';")
+    persons_source = get_copy_source(get_persons_path(), "nodes/persons.parquet", delta_paths)
+    await conn.execute(f"COPY Person FROM {persons_source};")
     await conn.execute(f"COPY City FROM '{NODES_PATH}/cities.parquet';")
     await conn.execute(f"COPY State FROM '{NODES_PATH}/states.parquet';")
     await conn.execute(f"COPY Country FROM '{NODES_PATH}/countries.parquet';")
@@ -112,24 +219,70 @@ async def main(conn: lb.AsyncConnection) -> None:
     edges_start = time.perf_counter()
     # Edges
     await create_edge_tables(conn)
-    await conn.execute(f"COPY Follows FROM '{EDGES_PATH}/follows.parquet';")
-    await conn.execute(f"COPY LivesIn FROM '{EDGES_PATH}/lives_in.parquet';")
-    await conn.execute(f"COPY HasInterest FROM '{EDGES_PATH}/interested_in.parquet';")
+    for table, filename in (
+        ("Follows", "follows.parquet"),
+        ("LivesIn", "lives_in.parquet"),
+        ("HasInterest", "interested_in.parquet"),
+    ):
+        source = get_copy_source(f"{EDGES_PATH}/{filename}", f"edges/{filename}", delta_paths)
+        await conn.execute(f"COPY {table} FROM {source};")
     await conn.execute(f"COPY CityIn FROM '{EDGES_PATH}/city_in.parquet';")
     await conn.execute(f"COPY StateIn FROM '{EDGES_PATH}/state_in.parquet';")
     edges_elapsed = time.perf_counter() - edges_start
     print(f"Edges loaded in {edges_elapsed:.4f}s")
+    if degrees:
+        await materialize_degrees(conn)
 
     print("Successfully loaded nodes and edges into Ladybug")
 
 
 if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--with_deltas", action="store_true", help="Rebuild from scratch, including all delta batches")
+    parser.add_argument("--delta", type=int, default=None, help="Ingest this delta batch into the existing database")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the database was built from the same files")
+    parser.add_argument("--degrees", action="store_true", help="Materialize the in/out-degree of each person in Follows as Person properties")
+    args = parser.parse_args()
+    # fmt: on
+
     DB_NAME = "social_network.lbdb"
-    # Delete database file each time till we have MERGE FROM available in Ladybug
     db_path = Path(f"./{DB_NAME}")
-    db_path.unlink(missing_ok=True)
-    # Create database
-    db = lb.Database(DB_NAME)
-    CONNECTION = lb.AsyncConnection(db)
-
-    asyncio.run(main(CONNECTION))
+    # Input files that the database was built from, compared with the dataset manifest
+    build_manifest_path = Path(f"./{DB_NAME}.manifest.json")
+    built_from = read_build_manifest(build_manifest_path)
+    if args.delta is not None:
+        if not db_path.exists():
+            parser.error(f"--delta requires an existing database at {db_path}")
+        delta_checksums = get_input_checksums([f"deltas/{get_delta_path(args.delta).name}"])
+        if delta_checksums and delta_checksums.items() <= (built_from or {}).items():
+            print(f"Delta batch {args.delta} is already in {DB_NAME}, skipping")
+        else:
+            db = lb.Database(DB_NAME)
+            CONNECTION = lb.AsyncConnection(db)
+            asyncio.run(ingest_delta(CONNECTION, args.delta))
+            if built_from is not None and delta_checksums is not None:
+                write_build_manifest(build_manifest_path, built_from | delta_checksums)
+            else:
+                build_manifest_path.unlink(missing_ok=True)
+    else:
+        delta_paths = sorted(DELTAS_PATH.glob("batch-*")) if args.with_deltas else []
+        input_dirs = ["nodes", "edges", *(f"deltas/{path.name}" for path in delta_paths)]
+        checksums = get_input_checksums(input_dirs)
+        up_to_date = checksums is not None and checksums == built_from and db_path.exists()
+        if up_to_date and not args.force:
+            print(f"{DB_NAME} was built from the same files, skipping rebuild (use --force)")
+            if args.degrees:
+                db = lb.Database(DB_NAME)
+                CONNECTION = lb.AsyncConnection(db)
+                asyncio.run(materialize_degrees(CONNECTION))
+        else:
+            build_manifest_path.unlink(missing_ok=True)
+            # Delete database file each time till we have MERGE FROM available in Ladybug
+            db_path.unlink(missing_ok=True)
+            # Create database
+            db = lb.Database(DB_NAME)
+            CONNECTION = lb.AsyncConnection(db)
+            asyncio.run(main(CONNECTION, delta_paths, args.degrees))
+            if checksums is not None:
+                write_build_manifest(build_manifest_path, checksums)
@@ -0,0 +1,149 @@
+"""
+Incremental ingest into the Lance datasets: the throughput of appending (or merging, with
+`--upsert`) every delta batch into the datasets, and the query latency on the base datasets,
+right after the ingest, and after compacting the fragments that it leaves behind.
+
+The queries are timed both on the in-memory engine (where the fragments only affect the load
+time) and on the datasets on disk (`query.NamespaceEngine`, which scans the fragments).
+
+Runs on a copy of `graph_lance`, so that the datasets built by `build_graph.py` stay as they are.
+Generate delta batches with `data/create_delta.py` first.
+
+```
+uv run benchmark_ingest.py --rounds 5
+uv run benchmark_ingest.py --upsert
+```
+"""
+
+import argparse
+import io
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import lance
+import pyarrow.parquet as pq
+
+import build_graph
+import query
+
+# Queries timed after each stage, with the parameters used by `benchmark_query.py`
+QUERIES = {
+    1: (query.run_query1, None),
+    5: (
+        query.run_query5,
+        {"gender": "male", "city": "London", "country": "United Kingdom", "interest": "Fine Dining"},
+    ),
+    7: (
+        query.run_query7,
+        {"country": "United States", "age_lower": 23, "age_upper": 30, "interest": "Photography"},
+    ),
+    10: (query.run_query10, {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)}),
+}
+# Files of each delta batch
+DELTA_FILES = (
+    "nodes/persons.parquet",
+    "edges/follows.parquet",
+    "edges/lives_in.parquet",
+    "edges/interested_in.parquet",
+)
+
+
+def time_query(engine: Any, query_id: int) -> float:
+    """Fastest of ROUNDS runs of the query, in ms"""
+    run_query, params = QUERIES[query_id]
+    args = (engine,) if params is None else (engine, params)
+    times = []
+    for _ in range(ROUNDS):
+        # The queries print their results
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run_query(*args)
+            times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def measure(root: Path) -> dict[str, int | float]:
+    paths = sorted(root.glob("*.lance"))
+    measurements = {
+        "fragments": sum(len(lance.dataset(str(path)).get_fragments()) for path in paths),
+    }
+    start = time.perf_counter()
+    engine = query.CypherEngine(query.build_config(), query.load_datasets(root))
+    measurements["load (ms)"] = (time.perf_counter() - start) * 1000
+    for query_id in QUERIES:
+        measurements[f"q{query_id} in memory (ms)"] = time_query(engine, query_id)
+    engine = query.NamespaceEngine(query.build_config(), root)
+    for query_id in QUERIES:
+        measurements[f"q{query_id} on disk (ms)"] = time_query(engine, query_id)
+    return measurements
+
+
+def format_value(value: int | float) -> str:
+    return f"{value:>10,.1f}" if isinstance(value, float) else f"{value:>10,}"
+
+
+def print_measurements(stages: dict[str, dict[str, int | float]]) -> None:
+    print(f"\n{'':>22} | " + " | ".join(f"{stage:>10}" for stage in stages))
+    for name in next(iter(stages.values())):
+        values = " | ".join(format_value(measurements[name]) for measurements in stages.values())
+        print(f"{name:>22} | {values}")
+
+
+def main() -> None:
+    delta_paths = sorted(build_graph.DELTAS_ROOT.glob("batch-*"))
+    if not delta_paths:
+        raise SystemExit("No delta batches found, generate them with `data/create_delta.py`")
+    rows = sum(
+        pq.ParquetFile(path / delta_file).metadata.num_rows
+        for path in delta_paths
+        for delta_file in DELTA_FILES
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / query.GRAPH_ROOT.name
+        shutil.copytree(query.GRAPH_ROOT, root)
+        build_graph.GRAPH_ROOT = root
+        stages = {"base": measure(root)}
+
+        start = time.perf_counter()
+        for path in delta_paths:
+            build_graph.ingest_delta(int(path.name.removeprefix("batch-")), UPSERT)
+        elapsed = time.perf_counter() - start
+        mode = "Upserted" if UPSERT else "Appended"
+        print(
+            f"{mode} {rows:,} rows from {len(delta_paths)} delta batches in {elapsed:.3f}s "
+            f"({rows / elapsed:,.0f} rows/s)"
+        )
+        stages["ingested"] = measure(root)
+
+        build_graph.compact_datasets()
+        stages["compacted"] = measure(root)
+
+    print_measurements(stages)
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--upsert", action="store_true", help="Merge the delta batches by key instead of appending them")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of runs of each query (the fastest is reported)")
+    parser.add_argument("--batch_size", "-b", type=int, default=1_000_000, help="Rows per record batch streamed from Parquet to Lance")
+    parser.add_argument("--max_rows_per_file", type=int, default=1024 * 1024, help="Maximum rows per Lance data file (and compacted fragment)")
+    parser.add_argument("--max_rows_per_group", type=int, default=1024, help="Maximum rows per row group in a Lance data file")
+    args = parser.parse_args()
+    # fmt: on
+
+    if not query.GRAPH_ROOT.is_dir():
+        raise RuntimeError(f"Missing {query.GRAPH_ROOT}. Run build_graph.py first.")
+    UPSERT = args.upsert
+    ROUNDS = args.rounds
+    # Module globals of `build_graph.py`, set from its command line arguments when run as a script
+    build_graph.BATCH_SIZE = args.batch_size
+    build_graph.MAX_ROWS_PER_FILE = args.max_rows_per_file
+    build_graph.MAX_ROWS_PER_GROUP = args.max_rows_per_group
+    main()
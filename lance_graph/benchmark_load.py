@@ -0,0 +1,92 @@
+"""
+Startup cost of the Lance Graph benchmarks: the time and memory taken to load the datasets and
+build the `CypherEngine`, when reading every column (the default), only the columns that the
+queries reference (`query.py --projected`), or memory-mapping a snapshot of the tables
+(`query.py --snapshot`).
+
+Each load runs in a fresh process, since the peak RSS of a process never goes down, and the
+cold-start time to the first result is measured from the start of that process: starting the
+interpreter and importing the modules, loading, building the engine and running a first query.
+
+```
+uv run benchmark_load.py --rounds 3
+```
+"""
+
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+import query
+
+MODES = ("full", "projected", "snapshot")
+
+
+def measure(mode: str) -> dict[str, float]:
+    start = time.perf_counter()
+    columns = query.WORKLOAD_COLUMNS if mode == "projected" else None
+    if mode == "snapshot":
+        datasets = query.load_snapshot(query.GRAPH_ROOT)
+    else:
+        datasets = query.load_datasets(query.GRAPH_ROOT, columns)
+    engine = query.CypherEngine(query.build_config(), datasets)
+    elapsed = time.perf_counter() - start
+    # The queries print their results
+    with redirect_stdout(io.StringIO()):
+        query.run_query3(engine, {"country": "United States"})
+    return {
+        "seconds": elapsed,
+        # Wall-clock time, to compare with the start of the process in `run_in_subprocess`
+        "first_result": time.time(),
+        "data_mb": sum(table.nbytes for table in datasets.values()) / 2**20,
+        "peak_rss_mb": query.get_peak_rss_mb(),
+    }
+
+
+def run_in_subprocess(mode: str) -> dict[str, float]:
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", mode], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    result["first_result"] -= start
+    return result
+
+
+def main() -> None:
+    # Written by the first run, or if the datasets changed since the snapshot was taken
+    run_in_subprocess("snapshot")
+    print(
+        f"{'mode':>10} | {'time (s)':>9} | {'first result (s)':>16} | {'Arrow data (MB)':>15} | "
+        f"{'peak RSS (MB)':>13}"
+    )
+    for mode in MODES:
+        # Fastest of the rounds, as the first one may also pay for reading the files from disk
+        results = [run_in_subprocess(mode) for _ in range(ROUNDS)]
+        best = min(results, key=lambda result: result["first_result"])
+        print(
+            f"{mode:>10} | {best['seconds']:>9.3f} | {best['first_result']:>16.3f} | "
+            f"{best['data_mb']:>15.0f} | {best['peak_rss_mb']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3, help="Number of loads per mode (the fastest is reported)")
+    parser.add_argument("--measure", type=str, choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # fmt: on
+
+    if not query.GRAPH_ROOT.is_dir():
+        raise RuntimeError(f"Missing {query.GRAPH_ROOT}. Run build_graph.py first.")
+    if args.measure is not None:
+        # Runs in the subprocess started by `run_in_subprocess`
+        print(json.dumps(measure(args.measure)))
+    else:
+        ROUNDS = args.rounds
+        main()
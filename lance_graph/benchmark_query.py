@@ -1,52 +1,145 @@
 """Benchmarks for Lance Graph queries (via `pytest-benchmark`)."""
 
+import shutil
+from datetime import date
+
+import lance
 import pytest
 
 import query
 
 
 @pytest.fixture(scope="session")
-def graph_context():
+def datasets():
+    # Loaded once and shared by the in-memory engines
     if not query.GRAPH_ROOT.is_dir():
         raise RuntimeError("Missing graph_lance data. Run build_graph.py first.")
-    cfg = query.build_config()
-    datasets = query.load_datasets(query.GRAPH_ROOT)
-    return query.CypherEngine(cfg, datasets)
+    return query.load_datasets(query.GRAPH_ROOT)
+
+
+@pytest.fixture(scope="session")
+def graph_context(datasets):
+    return query.CypherEngine(query.build_config(), datasets)
+
 
+@pytest.fixture(scope="session")
+def factorized_context(graph_context, datasets):
+    # Same engine, with count-only 2-hop path queries rewritten into degree products
+    return query.FactorizedEngine(graph_context, datasets)
+
+
+@pytest.fixture(scope="session")
+def indexed_context():
+    # Queries the datasets on disk, so that filters use the scalar indexes
+    if not query.has_indexes(query.GRAPH_ROOT):
+        pytest.skip("Build the datasets with `build_graph.py --indexes`")
+    return query.NamespaceEngine(query.build_config(), query.GRAPH_ROOT)
+
+
+@pytest.fixture(scope="session")
+def unindexed_context(tmp_path_factory):
+    # Queries a copy of the same datasets on disk with the indexes dropped, which separates the
+    # gain of the indexes from that of scanning on disk rather than in memory
+    if not query.has_indexes(query.GRAPH_ROOT):
+        pytest.skip("Build the datasets with `build_graph.py --indexes`")
+    root = tmp_path_factory.mktemp("unindexed") / query.GRAPH_ROOT.name
+    shutil.copytree(query.GRAPH_ROOT, root)
+    for name in query.NODE_LABELS + query.REL_TYPES:
+        dataset = lance.dataset(str(root / f"{name}.lance"))
+        for index in dataset.describe_indices():
+            dataset.drop_index(index.name)
+    return query.NamespaceEngine(query.build_config(), root)
+
+
+def clustered_engine(follows: str) -> query.NamespaceEngine:
+    # Queries the datasets on disk, reading FOLLOWS from its copy sorted by destination
+    # (FOLLOWS) or by source (FOLLOWS_BY_SRC)
+    if not query.has_clustered_follows(query.GRAPH_ROOT):
+        pytest.skip("Build the datasets with `build_graph.py --clustered`")
+    return query.NamespaceEngine(query.build_config(), query.GRAPH_ROOT, follows=follows)
+
+
+@pytest.fixture(scope="session")
+def by_dst_context():
+    return clustered_engine("FOLLOWS")
 
-def test_benchmark_query1(benchmark, graph_context):
+
+@pytest.fixture(scope="session")
+def by_src_context():
+    return clustered_engine(query.FOLLOWS_BY_SRC)
+
+
+@pytest.fixture(scope="session")
+def prepared_context(datasets):
+    # Parses each query once, and binds the parameters to the parsed query on each call
+    return query.PreparedEngine(query.build_config(), datasets)
+
+
+@pytest.fixture(scope="session")
+def planning_context(datasets):
+    # Only plans the queries, to split their latency into planning and execution
+    return query.PlanningEngine(query.build_config(), datasets)
+
+
+def test_benchmark_query1(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(query.run_query1, engine)
+    golden.check(1, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
 
-def test_benchmark_query2(benchmark, graph_context):
+def test_benchmark_query2(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(query.run_query2, engine)
+    golden.check(2, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query3(benchmark, graph_context):
+def test_benchmark_query1_precomputed(benchmark, graph_context, golden):
+    if not query.has_degrees(query.GRAPH_ROOT):
+        pytest.skip("Build the datasets with `build_graph.py --degrees`")
+    engine = graph_context
+    result = benchmark(query.run_query1_precomputed, engine)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query2_precomputed(benchmark, graph_context, golden):
+    if not query.has_degrees(query.GRAPH_ROOT):
+        pytest.skip("Build the datasets with `build_graph.py --degrees`")
+    engine = graph_context
+    result = benchmark(query.run_query2_precomputed, engine)
+    golden.check(2, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query3(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(query.run_query3, engine, {"country": "United States"})
+    golden.check(3, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query4(benchmark, graph_context):
+def test_benchmark_query4(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(query.run_query4, engine, {"age_lower": 30, "age_upper": 40})
+    golden.check(4, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
 
-def test_benchmark_query5(benchmark, graph_context):
+def test_benchmark_query5(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(
         query.run_query5,
@@ -58,12 +151,49 @@ def test_benchmark_query5(benchmark, graph_context):
             "interest": "Fine Dining",
         },
     )
+    golden.check(5, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query5_indexed(benchmark, indexed_context, golden):
+    engine = indexed_context
+    result = benchmark(
+        query.run_query5,
+        engine,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "Fine Dining",
+        },
+    )
+    golden.check(5, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query5_unindexed(benchmark, unindexed_context, golden):
+    engine = unindexed_context
+    result = benchmark(
+        query.run_query5,
+        engine,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "Fine Dining",
+        },
+    )
+    golden.check(5, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query6(benchmark, graph_context):
+def test_benchmark_query6(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(
         query.run_query6,
@@ -73,12 +203,13 @@ def test_benchmark_query6(benchmark, graph_context):
             "interest": "Tennis",
         },
     )
+    golden.check(6, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query7(benchmark, graph_context):
+def test_benchmark_query7(benchmark, graph_context, golden):
     engine = graph_context
     result = benchmark(
         query.run_query7,
@@ -90,22 +221,288 @@ def test_benchmark_query7(benchmark, graph_context):
             "interest": "Photography",
         },
     )
+    golden.check(7, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query8(benchmark, graph_context):
+def test_benchmark_query7_indexed(benchmark, indexed_context, golden):
+    engine = indexed_context
+    result = benchmark(
+        query.run_query7,
+        engine,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "Photography",
+        },
+    )
+    golden.check(7, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query7_unindexed(benchmark, unindexed_context, golden):
+    engine = unindexed_context
+    result = benchmark(
+        query.run_query7,
+        engine,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "Photography",
+        },
+    )
+    golden.check(7, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8(benchmark, graph_context, golden):
+    engine = graph_context
+    result = benchmark(query.run_query8, engine)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9(benchmark, graph_context, golden):
     engine = graph_context
+    result = benchmark(query.run_query9, engine, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8_factorized(benchmark, factorized_context, golden):
+    engine = factorized_context
     result = benchmark(query.run_query8, engine)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9_factorized(benchmark, factorized_context, golden):
+    engine = factorized_context
+    result = benchmark(query.run_query9, engine, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query9(benchmark, graph_context):
+def test_benchmark_query10(benchmark, graph_context, golden):
+    engine = graph_context
+    result = benchmark(
+        query.run_query10,
+        engine,
+        {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    )
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query11(benchmark, graph_context, golden):
     engine = graph_context
+    result = benchmark(query.run_query11, engine, {"min_weight": 0.5})
+    golden.check(11, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query1_by_dst(benchmark, by_dst_context, golden):
+    engine = by_dst_context
+    result = benchmark(query.run_query1, engine)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query1_by_src(benchmark, by_src_context, golden):
+    engine = by_src_context
+    result = benchmark(query.run_query1, engine)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query8_by_dst(benchmark, by_dst_context, golden):
+    engine = by_dst_context
+    result = benchmark(query.run_query8, engine)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8_by_src(benchmark, by_src_context, golden):
+    engine = by_src_context
+    result = benchmark(query.run_query8, engine)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9_by_dst(benchmark, by_dst_context, golden):
+    engine = by_dst_context
+    result = benchmark(query.run_query9, engine, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9_by_src(benchmark, by_src_context, golden):
+    engine = by_src_context
     result = benchmark(query.run_query9, engine, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query3_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(query.run_query3, engine, {"country": "United States"})
+    golden.check(3, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query4_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(query.run_query4, engine, {"age_lower": 30, "age_upper": 40})
+    golden.check(4, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query5_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(
+        query.run_query5,
+        engine,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "Fine Dining",
+        },
+    )
+    golden.check(5, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query6_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(
+        query.run_query6,
+        engine,
+        {
+            "gender": "female",
+            "interest": "Tennis",
+        },
+    )
+    golden.check(6, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query7_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(
+        query.run_query7,
+        engine,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "Photography",
+        },
+    )
+    golden.check(7, result)
     result = result.to_dicts()
 
     assert len(result) == 1
+
+
+def test_benchmark_query10_prepared(benchmark, prepared_context, golden):
+    engine = prepared_context
+    result = benchmark(
+        query.run_query10,
+        engine,
+        {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    )
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query3_planning(benchmark, planning_context):
+    engine = planning_context
+    benchmark(query.run_query3, engine, {"country": "United States"})
+
+
+def test_benchmark_query4_planning(benchmark, planning_context):
+    engine = planning_context
+    benchmark(query.run_query4, engine, {"age_lower": 30, "age_upper": 40})
+
+
+def test_benchmark_query5_planning(benchmark, planning_context):
+    engine = planning_context
+    benchmark(
+        query.run_query5,
+        engine,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "Fine Dining",
+        },
+    )
+
+
+def test_benchmark_query6_planning(benchmark, planning_context):
+    engine = planning_context
+    benchmark(
+        query.run_query6,
+        engine,
+        {
+            "gender": "female",
+            "interest": "Tennis",
+        },
+    )
+
+
+def test_benchmark_query7_planning(benchmark, planning_context):
+    engine = planning_context
+    benchmark(
+        query.run_query7,
+        engine,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "Photography",
+        },
+    )
@@ -4,36 +4,145 @@ Builds Lance datasets for the benchmark graph from Parquet inputs.
 Reads node/edge Parquet files under `data/output`, normalizes edge endpoint
 columns to `src`/`dst`, casts them to the referenced node id types, and writes
 one Lance dataset per label/relationship into `lance_graph/graph_lance`.
+
+The conversion is streamed: record batches (`--batch_size` rows) flow from
+Parquet through the renames, casts and null checks into `lance.write_dataset`,
+so memory use is bounded by the batch size rather than by the size of the files.
+
+Delta batches (from `data/create_delta.py`) can either be included in a full
+rebuild (`--with_deltas`), or appended to the existing datasets (`--delta N`),
+or merged into them by key (`--delta N --upsert`). Each append or merge is a new
+version of the datasets, and `--compact` merges the small fragments it leaves.
+
+With `--indexes`, Lance scalar indexes are created on the columns that the queries
+filter on, which `query.py --indexed` uses by scanning the datasets on disk.
+
+With `--clustered`, FOLLOWS is sorted by destination and a copy sorted by source is
+written next to it (`FOLLOWS_BY_SRC`), which `query.py --indexed --clustered` picks from
+depending on the direction that each query expands the edges in.
 """
 
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+import argparse
+import json
+import resource
+import shutil
+import sys
 import time
 
 import lance
+import numpy as np
 import pyarrow as pa
 import pyarrow.compute as pc
-import pyarrow.parquet as pq
+import pyarrow.dataset as ds
 
 SCRIPT_ROOT = Path(__file__).resolve().parent
 REPO_ROOT = SCRIPT_ROOT.parent
 GRAPH_ROOT = SCRIPT_ROOT / "graph_lance"
 NODES_ROOT = REPO_ROOT / "data" / "output" / "nodes"
 EDGES_ROOT = REPO_ROOT / "data" / "output" / "edges"
+DELTAS_ROOT = REPO_ROOT / "data" / "output" / "deltas"
+# Written by the data generation scripts, see `data/common.py`
+MANIFEST_PATH = REPO_ROOT / "data" / "output" / "manifest.json"
+# Input files that the datasets in GRAPH_ROOT were built from
+BUILD_MANIFEST_PATH = SCRIPT_ROOT / "graph_lance.manifest.json"
+# Arrow IPC copies of the datasets loaded by `query.py --snapshot`, removed on every write
+SNAPSHOT_ROOT = SCRIPT_ROOT / "graph_lance.snapshot"
+# Materialized degrees of each person in FOLLOWS (`--degrees`), and the edge column they count
+DEGREE_COLUMNS = {"in_degree": "dst", "out_degree": "src"}
+# Keys that delta rows are merged on with `--upsert`: a row whose key matches an existing row
+# replaces it (a person lives in a single city, so LIVES_IN is keyed on the person)
+UPSERT_KEYS: dict[str, list[str]] = {
+    "Person": ["id"],
+    "FOLLOWS": ["src", "dst"],
+    "LIVES_IN": ["src"],
+    "HAS_INTEREST": ["src", "dst"],
+}
+# Copy of FOLLOWS clustered by source (`--clustered`), and the sort keys of both copies
+FOLLOWS_BY_SRC = "FOLLOWS_BY_SRC"
+CLUSTER_KEYS = {"FOLLOWS": ("dst", "src"), FOLLOWS_BY_SRC: ("src", "dst")}
+# Scalar indexes on the columns that queries 3-7 filter on (`--indexes`): BTree for ranges and
+# many distinct values, bitmap for strings with few distinct values
+SCALAR_INDEXES: dict[str, dict[str, str]] = {
+    "Person": {"age": "BTREE", "gender": "BITMAP"},
+    "City": {"city": "BTREE", "country": "BITMAP"},
+    "State": {"country": "BITMAP"},
+    "Interest": {"interest": "BITMAP"},
+}
+
+
+# Transforms applied to each record batch on its way from Parquet to Lance
+Transform = Callable[[pa.RecordBatch], pa.RecordBatch]
 
 
 # --- simple helpers ---
 
 
-def write_lance(table: pa.Table, name: str) -> str:
-    GRAPH_ROOT.mkdir(parents=True, exist_ok=True)
-    path = GRAPH_ROOT / f"{name}.lance"
-    lance.write_dataset(table, str(path), mode="overwrite")
-    return str(path)
+def get_persons_path() -> Path:
+    # Persons generated with `--workers` are sharded into a directory of Parquet files,
+    # which are read as a single dataset
+    shards_path = NODES_ROOT / "persons"
+    if shards_path.is_dir():
+        return shards_path
+    return NODES_ROOT / "persons.parquet"
+
+
+def get_delta_path(batch: int) -> Path:
+    # Incremental batches written by `data/create_delta.py`
+    return DELTAS_ROOT / f"batch-{batch:04d}"
+
+
+def get_peak_rss_mb() -> float:
+    """Peak resident set size of the current process, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is reported in bytes on macOS, and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / 2**20
+    return peak / 2**10
+
+
+def get_input_checksums(dirs: list[str]) -> dict[str, str] | None:
+    """
+    Checksums (from the dataset manifest) of the Parquet files under the given directories of
+    `data/output`. Returns None if there's no manifest, or if it's out of date with the files.
+    """
+    if not MANIFEST_PATH.exists():
+        return None
+    manifest_files = json.loads(MANIFEST_PATH.read_text())["files"]
+    checksums = {}
+    for dir_name in dirs:
+        for path in sorted((MANIFEST_PATH.parent / dir_name).rglob("*.parquet")):
+            name = path.relative_to(MANIFEST_PATH.parent).as_posix()
+            entry = manifest_files.get(name, {})
+            stat = path.stat()
+            if (entry.get("bytes"), entry.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                return None
+            checksums[name] = entry["checksum"]
+    return checksums
+
+
+def read_build_manifest(path: Path) -> dict[str, str] | None:
+    # Input files (and their checksums) that the existing datasets were built from
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["files"]
+
+
+def write_build_manifest(path: Path, checksums: dict[str, str]) -> None:
+    path.write_text(json.dumps({"files": checksums}, indent=2))
+
 
+def remove_snapshot() -> None:
+    # The snapshot of the tables would be out of date once the datasets are written to
+    shutil.rmtree(SNAPSHOT_ROOT, ignore_errors=True)
 
-def require_column(t: pa.Table, col: str, where: str) -> None:
-    if col not in t.column_names:
-        raise ValueError(f"Missing column '{col}' in {where}. Found: {t.column_names}")
+
+def require_column(batch: pa.RecordBatch, col: str, where: str) -> None:
+    if col not in batch.column_names:
+        raise ValueError(f"Missing column '{col}' in {where}. Found: {batch.column_names}")
 
 
 def assert_no_nulls(arr: pa.Array, where: str) -> None:
@@ -47,28 +156,28 @@ def cast_to(arr: pa.Array, typ: pa.DataType) -> pa.Array:
     return pc.cast(arr, typ)
 
 
-def normalize_columns(t: pa.Table, where: str) -> pa.Table:
+def normalize_columns(batch: pa.RecordBatch, where: str) -> pa.RecordBatch:
     """
     Column names are case-insensitive in lance-graph's internals
     due to DataFusion, so we lowercase all column names here.
     """
     # DataFusion lowercases unquoted identifiers during planning, so we
     # lowercase columns here to avoid "No field named ..." errors on camelCase.
-    names = t.column_names
+    names = batch.column_names
     lower = [name.lower() for name in names]
     if len(set(lower)) != len(lower):
         raise ValueError(f"Lowercasing column names would create duplicates in {where}: {names}")
     if lower != names:
-        t = t.rename_columns(lower)
-    return t
+        batch = batch.rename_columns(lower)
+    return batch
 
 
-def normalize_edge_columns(t: pa.Table, where: str) -> pa.Table:
+def normalize_edge_columns(batch: pa.RecordBatch, where: str) -> pa.RecordBatch:
     """
     Column names are case-insensitive in lance-graph's internals
     due to DataFusion, so we lowercase all column names here.
     """
-    names = t.column_names
+    names = batch.column_names
     if "from" in names and "src" in names:
         raise ValueError(f"Both 'from' and 'src' present in {where}")
     if "to" in names and "dst" in names:
@@ -83,106 +192,465 @@ def normalize_edge_columns(t: pa.Table, where: str) -> pa.Table:
                 new_names.append("dst")
             else:
                 new_names.append(name)
-        t = t.rename_columns(new_names)
-    return t
-
-
-def load_nodes(path: Path, id_col: str = "id") -> tuple[pa.Table, pa.DataType]:
-    t = pq.read_table(path)
-    t = normalize_columns(t, str(path))
-    require_column(t, id_col, path)
-    assert_no_nulls(t[id_col], f"{path}:{id_col}")
-    return t, t.schema.field(id_col).type
-
-
-def load_edges(path: Path, src_type: pa.DataType, dst_type: pa.DataType) -> pa.Table:
-    t = pq.read_table(path)
-    t = normalize_columns(t, str(path))
-    t = normalize_edge_columns(t, str(path))
-
-    require_column(t, "src", path)
-    require_column(t, "dst", path)
-
-    # cast to match node id types
-    src = cast_to(t["src"], src_type)
-    dst = cast_to(t["dst"], dst_type)
-    assert_no_nulls(src, f"{path}:src")
-    assert_no_nulls(dst, f"{path}:dst")
-
-    # replace columns (preserve any extra edge props)
-    cols = []
-    for name in t.column_names:
-        if name == "src":
-            cols.append(src)
-        elif name == "dst":
-            cols.append(dst)
-        else:
-            cols.append(t[name])
-    return pa.table(cols, names=t.column_names)
+        batch = batch.rename_columns(new_names)
+    return batch
 
 
-def main() -> None:
-    start = time.perf_counter()
+# --- streaming conversion ---
 
-    # ---- load nodes (capture the id type per label) ----
-    persons, person_id_type = load_nodes(NODES_ROOT / "persons.parquet")
-    cities, city_id_type = load_nodes(NODES_ROOT / "cities.parquet")
-    states, state_id_type = load_nodes(NODES_ROOT / "states.parquet")
-    countries, country_id_type = load_nodes(NODES_ROOT / "countries.parquet")
-    interests, interest_id_type = load_nodes(NODES_ROOT / "interests.parquet")
-
-    write_lance(persons, "Person")
-    print(f"Node table Person complete ({persons.num_rows:,} rows)")
-    write_lance(cities, "City")
-    print(f"Node table City complete ({cities.num_rows:,} rows)")
-    write_lance(states, "State")
-    print(f"Node table State complete ({states.num_rows:,} rows)")
-    write_lance(countries, "Country")
-    print(f"Node table Country complete ({countries.num_rows:,} rows)")
-    write_lance(interests, "Interest")
-    print(f"Node table Interest complete ({interests.num_rows:,} rows)")
-
-    # ---- load edges (cast src/dst to referenced node id types) ----
-    follows = load_edges(
-        EDGES_ROOT / "follows.parquet",
-        person_id_type,
-        person_id_type,
-    )
-    lives_in = load_edges(
-        EDGES_ROOT / "lives_in.parquet",
-        person_id_type,
-        city_id_type,
-    )
-    city_in = load_edges(
-        EDGES_ROOT / "city_in.parquet",
-        city_id_type,
-        state_id_type,
+
+def get_sources(
+    path: Path, delta_file: str = "", delta_paths: list[Path] | None = None
+) -> list[Path]:
+    # Delta batches use the same file names as the base dataset
+    return [path, *(delta_path / delta_file for delta_path in delta_paths or [])]
+
+
+def stream_parquet(paths: list[Path], *transforms: Transform) -> pa.RecordBatchReader:
+    """
+    Read Parquet files (or directories of them) one record batch of up to BATCH_SIZE rows at a
+    time, passing each batch through the transforms, so that only a few batches are in memory at
+    once however large the files are.
+    """
+    datasets = [ds.dataset(str(path), format="parquet") for path in paths]
+
+    def transform(batch: pa.RecordBatch) -> pa.RecordBatch:
+        for func in transforms:
+            batch = func(batch)
+        return batch
+
+    # The transforms decide the output schema, so run them on an empty batch to get it
+    schema = transform(pa.RecordBatch.from_pylist([], schema=datasets[0].schema)).schema
+    batches = (
+        transform(batch)
+        for dataset in datasets
+        for batch in dataset.to_batches(batch_size=BATCH_SIZE)
     )
-    state_in = load_edges(
-        EDGES_ROOT / "state_in.parquet",
-        state_id_type,
-        country_id_type,
+    return pa.RecordBatchReader.from_batches(schema, batches)
+
+
+def convert_nodes(where: str, id_col: str = "id") -> Transform:
+    def convert(batch: pa.RecordBatch) -> pa.RecordBatch:
+        batch = normalize_columns(batch, where)
+        require_column(batch, id_col, where)
+        assert_no_nulls(batch[id_col], f"{where}:{id_col}")
+        return batch
+
+    return convert
+
+
+def convert_edges(where: str, src_type: pa.DataType, dst_type: pa.DataType) -> Transform:
+    def convert(batch: pa.RecordBatch) -> pa.RecordBatch:
+        batch = normalize_columns(batch, where)
+        batch = normalize_edge_columns(batch, where)
+        require_column(batch, "src", where)
+        require_column(batch, "dst", where)
+
+        # cast to match node id types
+        src = cast_to(batch["src"], src_type)
+        dst = cast_to(batch["dst"], dst_type)
+        assert_no_nulls(src, f"{where}:src")
+        assert_no_nulls(dst, f"{where}:dst")
+
+        # replace columns (preserve any extra edge props)
+        cols = []
+        for name in batch.column_names:
+            if name == "src":
+                cols.append(src)
+            elif name == "dst":
+                cols.append(dst)
+            else:
+                cols.append(batch[name])
+        return pa.RecordBatch.from_arrays(cols, names=batch.column_names)
+
+    return convert
+
+
+def align_to(schema: pa.Schema) -> Transform:
+    """Appends must match the existing schema exactly (e.g. the node id types)"""
+
+    def align(batch: pa.RecordBatch) -> pa.RecordBatch:
+        # Materialized degrees of new rows are counted once all the edges are in
+        for name in DEGREE_COLUMNS:
+            if name in schema.names and name not in batch.column_names:
+                batch = batch.append_column(name, pa.array(np.zeros(batch.num_rows, np.int64)))
+        return batch.select(schema.names).cast(schema)
+
+    return align
+
+
+def write_lance(reader: pa.RecordBatchReader, name: str, mode: str = "overwrite") -> int:
+    """Write (or append) a stream of record batches to a Lance dataset, returning the row count"""
+    GRAPH_ROOT.mkdir(parents=True, exist_ok=True)
+    rows = 0
+
+    def count(batches: pa.RecordBatchReader) -> Iterator[pa.RecordBatch]:
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    lance.write_dataset(
+        pa.RecordBatchReader.from_batches(reader.schema, count(reader)),
+        str(GRAPH_ROOT / f"{name}.lance"),
+        mode=mode,
+        max_rows_per_file=MAX_ROWS_PER_FILE,
+        max_rows_per_group=MAX_ROWS_PER_GROUP,
     )
-    has_interest = load_edges(
-        EDGES_ROOT / "interested_in.parquet",
-        person_id_type,
-        interest_id_type,
+    return rows
+
+
+@dataclass
+class WriteResult:
+    kind: str
+    name: str
+    rows: int
+    elapsed: float
+
+
+def report(result: WriteResult, action: str = "complete") -> None:
+    rate = result.rows / result.elapsed
+    print(f"{result.kind} table {result.name} {action} ({result.rows:,} rows, {rate:,.0f} rows/s)")
+
+
+def get_id_type(paths: list[Path]) -> pa.DataType:
+    """Type of the id column of a node table, from the Parquet schema (without reading any rows)"""
+    return stream_parquet(paths, convert_nodes(str(paths[0]))).schema.field("id").type
+
+
+def write_nodes(paths: list[Path], name: str) -> WriteResult:
+    start = time.perf_counter()
+    rows = write_lance(stream_parquet(paths, convert_nodes(str(paths[0]))), name)
+    result = WriteResult("Node", name, rows, time.perf_counter() - start)
+    report(result)
+    return result
+
+
+def write_edges(
+    paths: list[Path], src_type: pa.DataType, dst_type: pa.DataType, name: str
+) -> WriteResult:
+    """Convert a relationship table, casting src/dst to the referenced node id types"""
+    start = time.perf_counter()
+    reader = stream_parquet(paths, convert_edges(str(paths[0]), src_type, dst_type))
+    rows = write_lance(reader, name)
+    result = WriteResult("Relationship", name, rows, time.perf_counter() - start)
+    report(result)
+    return result
+
+
+def print_write_results(results: list[WriteResult], elapsed: float) -> None:
+    """
+    With concurrent writes, the wall-clock time is less than the sum of the per-dataset times
+    (which also get longer, since the writes share the cores and the disk).
+    """
+    print(f"\n{'dataset':>14} | {'time (s)':>9} | {'rows':>13} | {'rows/s':>13}")
+    for result in results:
+        print(
+            f"{result.name:>14} | {result.elapsed:>9.2f} | {result.rows:>13,} | "
+            f"{result.rows / result.elapsed:>13,.0f}"
+        )
+    total = sum(result.elapsed for result in results)
+    print(f"{'sum':>14} | {total:>9.2f} |")
+    print(f"{'wall-clock':>14} | {elapsed:>9.2f} | ({WORKERS} workers)")
+
+
+def append_lance(path: Path, name: str, convert: Transform) -> int:
+    schema = lance.dataset(str(GRAPH_ROOT / f"{name}.lance")).schema
+    reader = stream_parquet([path], convert, align_to(schema))
+    return write_lance(reader, name, mode="append")
+
+
+def upsert_lance(path: Path, name: str, convert: Transform) -> tuple[int, int]:
+    """Merge a file into an existing dataset by UPSERT_KEYS, returning the inserted/updated counts"""
+    dataset = lance.dataset(str(GRAPH_ROOT / f"{name}.lance"))
+    reader = stream_parquet([path], convert, align_to(dataset.schema))
+    stats = (
+        dataset.merge_insert(UPSERT_KEYS[name])
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(reader)
     )
+    return stats["num_inserted_rows"], stats["num_updated_rows"]
+
+
+def compact_datasets() -> None:
+    """Rewrite the small fragments left by appends into fragments of up to MAX_ROWS_PER_FILE rows"""
+    remove_snapshot()
+    start = time.perf_counter()
+    for path in sorted(GRAPH_ROOT.glob("*.lance")):
+        dataset = lance.dataset(str(path))
+        # Indexes are remapped to the rewritten fragments as part of the compaction
+        metrics = dataset.optimize.compact_files(target_rows_per_fragment=MAX_ROWS_PER_FILE)
+        if metrics.fragments_removed:
+            print(
+                f"{path.stem}: compacted {metrics.fragments_removed} fragments into "
+                f"{metrics.fragments_added}"
+            )
+    elapsed = time.perf_counter() - start
+    print(f"Datasets compacted in {elapsed:.3f}s")
+
+
+def has_indexes() -> bool:
+    return bool(lance.dataset(str(GRAPH_ROOT / "Person.lance")).describe_indices())
+
+
+def create_indexes(names: list[str] | None = None) -> None:
+    """Create (or replace) the scalar indexes of the given datasets (all of them by default)"""
+    start = time.perf_counter()
+    for name in names or list(SCALAR_INDEXES):
+        dataset = lance.dataset(str(GRAPH_ROOT / f"{name}.lance"))
+        for column, index_type in SCALAR_INDEXES[name].items():
+            dataset.create_scalar_index(column, index_type=index_type, replace=True)
+    elapsed = time.perf_counter() - start
+    print(f"Scalar indexes created in {elapsed:.3f}s")
+
+
+def has_clustered_follows() -> bool:
+    return (GRAPH_ROOT / f"{FOLLOWS_BY_SRC}.lance").is_dir()
+
+
+def cluster_follows() -> None:
+    """
+    Rewrite FOLLOWS sorted by (dst, src), and write a copy of it sorted by (src, dst), so that
+    the edges into and out of each person are contiguous. Only the endpoint columns are sorted
+    in memory: the rows are then taken from the dataset in sorted order, BATCH_SIZE at a time.
+    """
+    remove_snapshot()
+    start = time.perf_counter()
+    follows = lance.dataset(str(GRAPH_ROOT / "FOLLOWS.lance"))
+    endpoints = follows.to_table(columns=["src", "dst"])
+    for name, (primary, secondary) in CLUSTER_KEYS.items():
+        # `lexsort` sorts by its last key first
+        order = np.lexsort((endpoints[secondary].to_numpy(), endpoints[primary].to_numpy()))
+
+        def take_sorted(order: np.ndarray = order) -> Iterator[pa.RecordBatch]:
+            for offset in range(0, len(order), BATCH_SIZE):
+                yield from follows.take(order[offset : offset + BATCH_SIZE]).to_batches()
+
+        # The overwrite of FOLLOWS is a new version of it, so the version being read stays intact
+        write_lance(pa.RecordBatchReader.from_batches(follows.schema, take_sorted()), name)
+    elapsed = time.perf_counter() - start
+    print(f"FOLLOWS clustered by destination and by source in {elapsed:.3f}s")
+
+
+def has_degrees() -> bool:
+    return "in_degree" in lance.dataset(str(GRAPH_ROOT / "Person.lance")).schema.names
 
-    write_lance(follows, "FOLLOWS")
-    print(f"Relationship table FOLLOWS complete ({follows.num_rows:,} rows)")
-    write_lance(lives_in, "LIVES_IN")
-    print(f"Relationship table LIVES_IN complete ({lives_in.num_rows:,} rows)")
-    write_lance(city_in, "CITY_IN")
-    print(f"Relationship table CITY_IN complete ({city_in.num_rows:,} rows)")
-    write_lance(state_in, "STATE_IN")
-    print(f"Relationship table STATE_IN complete ({state_in.num_rows:,} rows)")
-    write_lance(has_interest, "HAS_INTEREST")
-    print(f"Relationship table HAS_INTEREST complete ({has_interest.num_rows:,} rows)")
 
+def count_degrees(person_ids: np.ndarray) -> dict[str, np.ndarray]:
+    """Number of FOLLOWS edges into and out of each person, counted one batch of edges at a time"""
+    # Edge endpoints are looked up in the sorted person ids, which (unlike a hash set) is only
+    # built once for all the batches
+    order = np.argsort(person_ids, kind="stable")
+    sorted_ids = person_ids[order]
+    degrees = {name: np.zeros(len(person_ids), dtype=np.int64) for name in DEGREE_COLUMNS}
+    follows = lance.dataset(str(GRAPH_ROOT / "FOLLOWS.lance"))
+    for batch in follows.to_batches(columns=["src", "dst"], batch_size=BATCH_SIZE):
+        for name, endpoint in DEGREE_COLUMNS.items():
+            rows = order[np.searchsorted(sorted_ids, batch[endpoint].to_numpy())]
+            degrees[name] += np.bincount(rows, minlength=len(person_ids))
+    return degrees
+
+
+def materialize_degrees() -> None:
+    """Add (or replace) the degrees as columns of the existing Person dataset"""
+    remove_snapshot()
+    start = time.perf_counter()
+    indexed = has_indexes()
+    persons = lance.dataset(str(GRAPH_ROOT / "Person.lance"))
+    degrees = count_degrees(persons.to_table(columns=["id"])["id"].to_numpy())
+    kept = [name for name in persons.schema.names if name not in DEGREE_COLUMNS]
+
+    def add_degrees() -> Iterator[pa.RecordBatch]:
+        # Batches are scanned in row order, so each one takes the next slice of the degrees
+        offset = 0
+        for batch in persons.to_batches(columns=kept, batch_size=BATCH_SIZE):
+            for name, degree in degrees.items():
+                values = degree[offset : offset + batch.num_rows]
+                batch = batch.append_column(name, pa.array(values))
+            offset += batch.num_rows
+            yield batch
+
+    schema = pa.schema([persons.schema.field(name) for name in kept])
+    for name in DEGREE_COLUMNS:
+        schema = schema.append(pa.field(name, pa.int64()))
+    # The overwrite is a new version of the dataset, so the version being read stays intact
+    write_lance(pa.RecordBatchReader.from_batches(schema, add_degrees()), "Person")
     elapsed = time.perf_counter() - start
-    print(f"Wrote Lance datasets to: {GRAPH_ROOT.resolve()}\nTime taken: {elapsed:.3f}s")
+    print(f"Degrees materialized in {elapsed:.3f}s")
+    # Overwriting the dataset drops its indexes
+    if indexed:
+        create_indexes(["Person"])
+
+
+def ingest_delta(batch: int, upsert: bool = False) -> None:
+    """
+    Append (or merge, with `upsert`) a delta batch into the existing Lance datasets, without
+    rebuilding them
+    """
+    delta_path = get_delta_path(batch)
+    if not delta_path.is_dir():
+        raise FileNotFoundError(f"Delta batch {batch} not found at {delta_path}")
+    remove_snapshot()
+    start = time.perf_counter()
+
+    def get_existing_id_type(name: str) -> pa.DataType:
+        return lance.dataset(str(GRAPH_ROOT / f"{name}.lance")).schema.field("id").type
+
+    person_id_type = get_existing_id_type("Person")
+    city_id_type = get_existing_id_type("City")
+    interest_id_type = get_existing_id_type("Interest")
+    clustered = has_clustered_follows()
+    degrees = has_degrees()
+    indexed = has_indexes()
+    path = delta_path / "nodes" / "persons.parquet"
+    tables = [("Node", "Person", path, convert_nodes(str(path)))]
+    for file_name, dst_type, name in (
+        ("follows.parquet", person_id_type, "FOLLOWS"),
+        ("lives_in.parquet", city_id_type, "LIVES_IN"),
+        ("interested_in.parquet", interest_id_type, "HAS_INTEREST"),
+    ):
+        path = delta_path / "edges" / file_name
+        tables.append(
+            ("Relationship", name, path, convert_edges(str(path), person_id_type, dst_type))
+        )
+    for kind, name, path, convert in tables:
+        table_start = time.perf_counter()
+        if upsert:
+            inserted, updated = upsert_lance(path, name, convert)
+            rows, action = inserted + updated, f"upserted, {updated:,} rows updated"
+        else:
+            rows, action = append_lance(path, name, convert), "appended"
+        report(WriteResult(kind, name, rows, time.perf_counter() - table_start), action)
+
+    elapsed = time.perf_counter() - start
+    print(f"Delta batch {batch} loaded in {elapsed:.3f}s")
+    # New edges are appended after the sorted ones, and aren't in the copy sorted by source
+    if clustered:
+        cluster_follows()
+    # Materialized degrees are out of date once new edges are in
+    if degrees:
+        materialize_degrees()
+    # Appended rows are scanned rather than looked up until they're added to the indexes
+    if indexed:
+        start = time.perf_counter()
+        lance.dataset(str(GRAPH_ROOT / "Person.lance")).optimize.optimize_indices()
+        elapsed = time.perf_counter() - start
+        print(f"Scalar indexes updated in {elapsed:.3f}s")
+
+
+def main(
+    delta_paths: list[Path], degrees: bool = False, indexes: bool = False, clustered: bool = False
+) -> None:
+    remove_snapshot()
+    start = time.perf_counter()
+
+    node_sources = {
+        "Person": get_sources(get_persons_path(), "nodes/persons.parquet", delta_paths),
+        "City": get_sources(NODES_ROOT / "cities.parquet"),
+        "State": get_sources(NODES_ROOT / "states.parquet"),
+        "Country": get_sources(NODES_ROOT / "countries.parquet"),
+        "Interest": get_sources(NODES_ROOT / "interests.parquet"),
+    }
+    # The id types come from the Parquet schemas, so that the edges (cast to the id types of
+    # their nodes) don't have to wait for the nodes to be written
+    id_types = {label: get_id_type(paths) for label, paths in node_sources.items()}
+    edge_sources = {
+        "FOLLOWS": ("follows.parquet", "Person", "Person", True),
+        "LIVES_IN": ("lives_in.parquet", "Person", "City", True),
+        "CITY_IN": ("city_in.parquet", "City", "State", False),
+        "STATE_IN": ("state_in.parquet", "State", "Country", False),
+        "HAS_INTEREST": ("interested_in.parquet", "Person", "Interest", True),
+    }
+
+    # Every dataset is independent of the others, so they're all written concurrently. The
+    # threads spend most of their time in Arrow and Lance, which release the GIL.
+    write_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        # Edges first, as they're the largest datasets and shouldn't be the last ones to start
+        futures = []
+        for name, (file_name, src_label, dst_label, with_deltas) in edge_sources.items():
+            sources = get_sources(
+                EDGES_ROOT / file_name, f"edges/{file_name}", delta_paths if with_deltas else None
+            )
+            futures.append(
+                executor.submit(
+                    write_edges, sources, id_types[src_label], id_types[dst_label], name
+                )
+            )
+        for label, paths in node_sources.items():
+            futures.append(executor.submit(write_nodes, paths, label))
+        results = [future.result() for future in futures]
+    print_write_results(results, time.perf_counter() - write_start)
+
+    if clustered:
+        cluster_follows()
+    else:
+        # A copy sorted by source left by an earlier build would be out of date
+        shutil.rmtree(GRAPH_ROOT / f"{FOLLOWS_BY_SRC}.lance", ignore_errors=True)
+    if degrees:
+        materialize_degrees()
+    if indexes:
+        create_indexes()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Wrote Lance datasets to: {GRAPH_ROOT.resolve()}\n"
+        f"Time taken: {elapsed:.3f}s (peak RSS {get_peak_rss_mb():.0f} MB)"
+    )
 
 
 if __name__ == "__main__":
-    main()
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--with_deltas", action="store_true", help="Rebuild from scratch, including all delta batches")
+    parser.add_argument("--delta", type=int, default=None, help="Append this delta batch to the existing datasets")
+    parser.add_argument("--upsert", action="store_true", help="With --delta, merge the batch into the datasets by key instead of appending it")
+    parser.add_argument("--compact", action="store_true", help="Compact the fragments of the datasets (after ingesting --delta, if given)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the datasets were built from the same files")
+    parser.add_argument("--degrees", action="store_true", help="Materialize the in/out-degree of each person in FOLLOWS as Person columns")
+    parser.add_argument("--indexes", action="store_true", help="Create scalar indexes on the columns that the queries filter on")
+    parser.add_argument("--clustered", action="store_true", help="Sort FOLLOWS by destination, and write a copy of it sorted by source")
+    parser.add_argument("--batch_size", "-b", type=int, default=1_000_000, help="Rows per record batch streamed from Parquet to Lance")
+    parser.add_argument("--max_rows_per_file", type=int, default=1024 * 1024, help="Maximum rows per Lance data file")
+    parser.add_argument("--max_rows_per_group", type=int, default=1024, help="Maximum rows per row group in a Lance data file")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Number of datasets to write concurrently")
+    args = parser.parse_args()
+    # fmt: on
+
+    BATCH_SIZE = args.batch_size
+    MAX_ROWS_PER_FILE = args.max_rows_per_file
+    MAX_ROWS_PER_GROUP = args.max_rows_per_group
+    WORKERS = args.workers
+
+    built_from = read_build_manifest(BUILD_MANIFEST_PATH)
+    if args.delta is not None:
+        delta_checksums = get_input_checksums([f"deltas/{get_delta_path(args.delta).name}"])
+        if delta_checksums and delta_checksums.items() <= (built_from or {}).items():
+            print(f"Delta batch {args.delta} is already in {GRAPH_ROOT}, skipping")
+        else:
+            ingest_delta(args.delta, args.upsert)
+            if built_from is not None and delta_checksums is not None:
+                write_build_manifest(BUILD_MANIFEST_PATH, built_from | delta_checksums)
+            else:
+                BUILD_MANIFEST_PATH.unlink(missing_ok=True)
+    else:
+        delta_paths = sorted(DELTAS_ROOT.glob("batch-*")) if args.with_deltas else []
+        input_dirs = ["nodes", "edges", *(f"deltas/{path.name}" for path in delta_paths)]
+        checksums = get_input_checksums(input_dirs)
+        up_to_date = checksums is not None and checksums == built_from and GRAPH_ROOT.is_dir()
+        if up_to_date and not args.force:
+            print(f"{GRAPH_ROOT} was built from the same files, skipping rebuild (use --force)")
+            if args.clustered:
+                cluster_follows()
+            if args.degrees:
+                materialize_degrees()
+            if args.indexes:
+                create_indexes()
+        else:
+            BUILD_MANIFEST_PATH.unlink(missing_ok=True)
+            main(delta_paths, args.degrees, args.indexes, args.clustered)
+            if checksums is not None:
+                write_build_manifest(BUILD_MANIFEST_PATH, checksums)
+    if args.compact:
+        compact_datasets()
@@ -8,6 +8,7 @@ uv run pytest benchmark_query.py --benchmark-min-rounds=5 --benchmark-warmup-ite
 ```
 """
 import os
+from datetime import date
 
 import pytest
 from dotenv import load_dotenv
@@ -28,64 +29,108 @@ def session():
             yield session
 
 
-def test_benchmark_query1(benchmark, session):
+def test_benchmark_query1(benchmark, session, golden):
     result = benchmark(query.run_query1, session)
+    golden.check(1, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
 
-def test_benchmark_query2(benchmark, session):
+def test_benchmark_query2(benchmark, session, golden):
     result = benchmark(query.run_query2, session)
+    golden.check(2, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query3(benchmark, session):
+def test_benchmark_query1_precomputed(benchmark, session, golden):
+    if not query.has_degrees(session):
+        pytest.skip("Build the database with `build_graph.py --degrees`")
+    result = benchmark(query.run_query1_precomputed, session)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query2_precomputed(benchmark, session, golden):
+    if not query.has_degrees(session):
+        pytest.skip("Build the database with `build_graph.py --degrees`")
+    result = benchmark(query.run_query2_precomputed, session)
+    golden.check(2, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query3(benchmark, session, golden):
     result = benchmark(query.run_query3, session, "United States")
+    golden.check(3, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query4(benchmark, session):
+def test_benchmark_query4(benchmark, session, golden):
     result = benchmark(query.run_query4, session, 30, 40)
+    golden.check(4, result)
     result = result.to_dicts()
 
     assert len(result) == 3
 
-def test_benchmark_query5(benchmark, session):
+def test_benchmark_query5(benchmark, session, golden):
     result = benchmark(query.run_query5, session, "male", "London", "United Kingdom", "fine dining")
+    golden.check(5, result)
     result = result.to_dicts()
 
     assert len(result) == 1
-    # assert result[0]["numPersons"] == 52
 
 
-def test_benchmark_query6(benchmark, session):
+def test_benchmark_query6(benchmark, session, golden):
     result = benchmark(query.run_query6, session, "female", "tennis")
+    golden.check(6, result)
     result = result.to_dicts()
 
     assert len(result) == 5
 
 
-def test_benchmark_query7(benchmark, session):
+def test_benchmark_query7(benchmark, session, golden):
     result = benchmark(query.run_query7, session, "United States", 23, 30, "photography")
+    golden.check(7, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query8(benchmark, session):
+def test_benchmark_query8(benchmark, session, golden):
     result = benchmark(query.run_query8, session)
+    golden.check(8, result)
     result = result.to_dicts()
 
     assert len(result) == 1
 
 
-def test_benchmark_query9(benchmark, session):
+def test_benchmark_query9(benchmark, session, golden):
     result = benchmark(query.run_query9, session, 50, 25)
+    golden.check(9, result)
     result = result.to_dicts()
 
     assert len(result) == 1
+
+
+def test_benchmark_query10(benchmark, session, golden):
+    result = benchmark(query.run_query10, session, date(2020, 1, 1), date(2020, 12, 31))
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query11(benchmark, session, golden):
+    result = benchmark(query.run_query11, session, 0.5)
+    golden.check(11, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
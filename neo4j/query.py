@@ -3,6 +3,7 @@ Run a series of queries on the Neo4j database
 """
 import os
 import time
+from datetime import date
 
 import polars as pl
 from dotenv import load_dotenv
@@ -45,6 +46,41 @@ def run_query2(session: Session) -> None:
     return result
 
 
+def has_degrees(session: Session) -> bool:
+    "Whether the database was built with materialized degrees (`build_graph.py --degrees`)"
+    response = session.run("MATCH (p:Person) WHERE p.in_degree IS NOT NULL RETURN p LIMIT 1")
+    return response.single() is not None
+
+
+def run_query1_precomputed(session: Session) -> None:
+    "Who are the top 3 most-followed persons in the network? (materialized degrees)"
+    query = """
+        MATCH (person:Person)
+        RETURN person.personID AS personID, person.name AS name, person.in_degree AS numFollowers
+        ORDER BY numFollowers DESC LIMIT 3
+    """
+    print(f"\nQuery 1 (precomputed):\n {query}")
+    response = session.run(query)
+    result = pl.from_dicts(response.data())
+    print(f"Top 3 most-followed persons:\n{result}")
+    return result
+
+
+def run_query2_precomputed(session: Session) -> None:
+    "In which city does the most-followed person in the network live? (materialized degrees)"
+    query = """
+        MATCH (person:Person)
+        WITH person ORDER BY person.in_degree DESC LIMIT 1
+        MATCH (person) -[:LIVES_IN]-> (city:City)
+        RETURN person.name AS name, person.in_degree AS numFollowers, city.city AS city, city.state AS state, city.country AS country
+    """
+    print(f"\nQuery 2 (precomputed):\n {query}")
+    response = session.run(query)
+    result = pl.from_dicts(response.data())
+    print(f"City in which most-followed person lives:\n{result}")
+    return result
+
+
 def run_query3(session: Session, country: str) -> None:
     "Which 5 cities in a particular country have the lowest average age in the network?"
     query = """
@@ -176,6 +212,38 @@ def run_query9(session: Session, age_1: int, age_2: int) -> None:
     return result
 
 
+def run_query10(session: Session, start_date: date, end_date: date) -> None:
+    "Which 5 cities gained the most followers (of persons living there) in a given date window?"
+    query = """
+        MATCH (follower:Person)-[f:FOLLOWS]->(person:Person)-[:LIVES_IN]->(c:City)
+        WHERE f.since >= $start_date AND f.since <= $end_date
+        RETURN c.city AS city, c.country AS country, count(*) AS numFollows
+        ORDER BY numFollows DESC LIMIT 5
+    """
+    print(f"\nQuery 10:\n {query}")
+    response = session.run(query, start_date=start_date, end_date=end_date)
+    result = pl.from_dicts(response.data())
+    print(f"Cities with the most follows created between {start_date} and {end_date}:\n{result}")
+    return result
+
+
+def run_query11(session: Session, min_weight: float) -> None:
+    "Which 3 persons have the highest total interaction weight from their strongly-engaged followers?"
+    query = """
+        MATCH (follower:Person)-[f:FOLLOWS]->(person:Person)
+        WHERE f.weight >= $min_weight
+        RETURN person.personID AS personID, person.name AS name, count(*) AS numFollowers, sum(f.weight) AS totalWeight
+        ORDER BY totalWeight DESC LIMIT 3
+    """
+    print(f"\nQuery 11:\n {query}")
+    response = session.run(query, min_weight=min_weight)
+    result = pl.from_dicts(response.data())
+    print(
+        f"Persons with the highest total weight from followers with weight >= {min_weight}:\n{result}"
+    )
+    return result
+
+
 def main() -> None:
     with GraphDatabase.driver(URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) as driver:
         with driver.session(database="neo4j") as session:
@@ -183,6 +251,9 @@ def main() -> None:
             # fmt: off
             _ = run_query1(session)
             _ = run_query2(session)
+            if has_degrees(session):
+                _ = run_query1_precomputed(session)
+                _ = run_query2_precomputed(session)
             _ = run_query3(session, country="United States")
             _ = run_query4(session, age_lower=30, age_upper=40)
             _ = run_query5(session, gender="male", city="London", country="United Kingdom", interest="fine dining")
@@ -190,6 +261,8 @@ def main() -> None:
             _ = run_query7(session, country="United States", age_lower=23, age_upper=30, interest="photography")
             _ = run_query8(session)
             _ = run_query9(session, age_1=50, age_2=25)
+            _ = run_query10(session, start_date=date(2020, 1, 1), end_date=date(2020, 12, 31))
+            _ = run_query11(session, min_weight=0.5)
             # fmt: on
             elapsed = time.perf_counter() - start
             print(f"Neo4j query script completed in {elapsed:.6f}s")
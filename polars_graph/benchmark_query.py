@@ -0,0 +1,156 @@
+"""
+Use the `pytest-benchmark` library benchmark queries with warmup and iterations.
+`uv add pytest-benchmark`
+
+Command used:
+```
+uv run pytest benchmark_query.py --benchmark-min-rounds=5 --benchmark-warmup-iterations=5 --benchmark-disable-gc --benchmark-sort=fullname
+```
+
+Set `POLARS_ENGINE_AFFINITY=streaming` to benchmark the streaming engine.
+"""
+from datetime import date
+
+import pytest
+
+import query
+
+
+@pytest.fixture(scope="session")
+def tables():
+    if not query.EDGES_ROOT.is_dir():
+        raise RuntimeError("Missing Parquet data. Generate the dataset in data/ first.")
+    return query.scan_tables(query.NODES_ROOT, query.EDGES_ROOT)
+
+
+def test_benchmark_query1(benchmark, tables, golden):
+    result = benchmark(query.run_query1, tables)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query2(benchmark, tables, golden):
+    result = benchmark(query.run_query2, tables)
+    golden.check(2, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query3(benchmark, tables, golden):
+    result = benchmark(query.run_query3, tables, {"country": "United States"})
+    golden.check(3, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query4(benchmark, tables, golden):
+    result = benchmark(query.run_query4, tables, {"age_lower": 30, "age_upper": 40})
+    golden.check(4, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query5(benchmark, tables, golden):
+    result = benchmark(
+        query.run_query5,
+        tables,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "fine dining",
+        },
+    )
+    golden.check(5, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query6(benchmark, tables, golden):
+    result = benchmark(
+        query.run_query6,
+        tables,
+        {
+            "gender": "female",
+            "interest": "tennis"
+        },
+    )
+    golden.check(6, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query7(benchmark, tables, golden):
+    result = benchmark(
+        query.run_query7,
+        tables,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "photography",
+        },
+    )
+    golden.check(7, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8(benchmark, tables, golden):
+    result = benchmark(query.run_query8, tables)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9(benchmark, tables, golden):
+    result = benchmark(query.run_query9, tables, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8_factorized(benchmark, tables, golden):
+    result = benchmark(query.run_query8_factorized, tables)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9_factorized(benchmark, tables, golden):
+    result = benchmark(query.run_query9_factorized, tables, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query10(benchmark, tables, golden):
+    result = benchmark(
+        query.run_query10,
+        tables,
+        {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    )
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query11(benchmark, tables, golden):
+    result = benchmark(query.run_query11, tables, {"min_weight": 0.5})
+    golden.check(11, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
@@ -0,0 +1,432 @@
+"""
+Run the benchmark queries as Polars `LazyFrame` plans over the generated Parquet files.
+
+There is no graph database or build step: each query scans the node/edge Parquet files under
+`data/output` lazily, so Polars pushes the projections (only the columns a query uses) and
+predicates (filters on ages, genders, dates and weights) into the Parquet reader, and traverses
+the graph with joins on the edge tables, followed by group-bys and top-k selections.
+
+Pass `--streaming` (or set `POLARS_ENGINE_AFFINITY=streaming`) to run the plans on the
+streaming engine instead of the in-memory one, and `--factorized` to count the 2-hop paths of
+queries 8 and 9 as degree products instead of self-joins.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+SCRIPT_ROOT = Path(__file__).resolve().parent
+NODES_ROOT = SCRIPT_ROOT.parent / "data" / "output" / "nodes"
+EDGES_ROOT = SCRIPT_ROOT.parent / "data" / "output" / "edges"
+
+
+@dataclass
+class Tables:
+    # Nodes
+    persons: pl.LazyFrame
+    cities: pl.LazyFrame
+    states: pl.LazyFrame
+    countries: pl.LazyFrame
+    interests: pl.LazyFrame
+    # Edges, as `from`/`to` node IDs
+    follows: pl.LazyFrame
+    lives_in: pl.LazyFrame
+    has_interest: pl.LazyFrame
+    city_in: pl.LazyFrame
+    state_in: pl.LazyFrame
+
+
+def get_persons_path(nodes_root: Path) -> str:
+    # Persons generated with `--workers` are sharded into a directory of Parquet files
+    shards_path = nodes_root / "persons"
+    if shards_path.is_dir():
+        return f"{shards_path}/*.parquet"
+    return f"{nodes_root}/persons.parquet"
+
+
+def scan_tables(nodes_root: Path, edges_root: Path) -> Tables:
+    # Nothing is read here: every query plan starts from these scans
+    return Tables(
+        persons=pl.scan_parquet(get_persons_path(nodes_root)),
+        cities=pl.scan_parquet(nodes_root / "cities.parquet"),
+        states=pl.scan_parquet(nodes_root / "states.parquet"),
+        countries=pl.scan_parquet(nodes_root / "countries.parquet"),
+        interests=pl.scan_parquet(nodes_root / "interests.parquet"),
+        follows=pl.scan_parquet(edges_root / "follows.parquet"),
+        lives_in=pl.scan_parquet(edges_root / "lives_in.parquet"),
+        has_interest=pl.scan_parquet(edges_root / "interested_in.parquet"),
+        city_in=pl.scan_parquet(edges_root / "city_in.parquet"),
+        state_in=pl.scan_parquet(edges_root / "state_in.parquet"),
+    )
+
+
+def city_countries(tables: Tables) -> pl.LazyFrame:
+    "Country of each city, via (City)-[:CityIn]->(State)-[:StateIn]->(Country)"
+    return (
+        tables.city_in.rename({"from": "city_id", "to": "state_id"})
+        .join(tables.state_in.rename({"from": "state_id", "to": "country_id"}), on="state_id")
+        .join(tables.countries.rename({"id": "country_id"}), on="country_id")
+        .select("city_id", "state_id", "country")
+    )
+
+
+def persons_with_interest(tables: Tables, interest: str) -> pl.LazyFrame:
+    # Interests are matched case-insensitively, like `lower(i.interest) = lower($interest)`
+    interests = tables.interests.filter(
+        pl.col("interest").str.to_lowercase() == interest.lower()
+    ).select("id")
+    return tables.has_interest.join(interests, left_on="to", right_on="id").select(
+        pl.col("from").alias("person_id")
+    )
+
+
+def run_query1(tables: Tables) -> pl.DataFrame:
+    "Who are the top 3 most-followed persons in the network?"
+    print("\nQuery 1:\n group follows by person followed, top 3, then join names")
+    result = (
+        tables.follows.group_by("to")
+        .agg(pl.len().cast(pl.Int64).alias("numFollowers"))
+        .top_k(3, by="numFollowers")
+        .join(tables.persons.select("id", "name"), left_on="to", right_on="id")
+        .select(pl.col("to").alias("personID"), "name", "numFollowers")
+        .sort("numFollowers", descending=True)
+        .collect()
+    )
+    print(f"Top 3 most-followed persons:\n{result}")
+    return result
+
+
+def run_query2(tables: Tables) -> pl.DataFrame:
+    "In which city does the most-followed person in the network live?"
+    print("\nQuery 2:\n group follows by person followed, top 1, then join its city")
+    result = (
+        tables.follows.group_by("to")
+        .agg(pl.len().cast(pl.Int64).alias("numFollowers"))
+        .top_k(1, by="numFollowers")
+        .join(tables.persons.select("id", "name"), left_on="to", right_on="id")
+        .join(tables.lives_in.rename({"from": "to", "to": "city_id"}), on="to")
+        .join(
+            tables.cities.select("id", "city", "state", "country"),
+            left_on="city_id",
+            right_on="id",
+        )
+        .select("name", "numFollowers", "city", "state", "country")
+        .collect()
+    )
+    print(f"City in which most-followed person lives:\n{result}")
+    return result
+
+
+def run_query3(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 5 cities in a particular country have the lowest average age in the network?"
+    print("\nQuery 3:\n join persons to cities in a country, average age per city, bottom 5")
+    cities = city_countries(tables).filter(pl.col("country") == params["country"])
+    result = (
+        tables.lives_in.join(cities, left_on="to", right_on="city_id")
+        .join(tables.persons.select("id", "age"), left_on="from", right_on="id")
+        # Grouped on the city name like `c.city`, so cities that share a name are one group
+        .join(tables.cities.select("id", "city"), left_on="to", right_on="id")
+        .group_by("city")
+        .agg(pl.col("age").mean().alias("averageAge"))
+        .bottom_k(5, by="averageAge")
+        .select("city", "averageAge")
+        .sort("averageAge")
+        .collect()
+    )
+    print(f"Cities with lowest average age in {params['country']}:\n{result}")
+    return result
+
+
+def run_query4(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "How many persons between a certain age range are in each country?"
+    print("\nQuery 4:\n persons in an age range joined to their country, count per country, top 3")
+    persons = tables.persons.filter(
+        pl.col("age").is_between(params["age_lower"], params["age_upper"])
+    ).select("id")
+    result = (
+        persons.join(tables.lives_in, left_on="id", right_on="from")
+        .join(city_countries(tables), left_on="to", right_on="city_id")
+        .group_by("country")
+        .agg(pl.len().cast(pl.Int64).alias("personCounts"))
+        .top_k(3, by="personCounts")
+        .select(pl.col("country").alias("countries"), "personCounts")
+        .sort("personCounts", descending=True)
+        .collect()
+    )
+    print(
+        f"Persons between ages {params['age_lower']}-{params['age_upper']} in each country:\n{result}"
+    )
+    return result
+
+
+def run_query5(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "How many men in a particular city have an interest in the same thing?"
+    print("\nQuery 5:\n persons with an interest, filtered by gender and city, count")
+    persons = tables.persons.filter(
+        pl.col("gender").str.to_lowercase() == params["gender"].lower()
+    ).select("id")
+    cities = tables.cities.filter(
+        (pl.col("city") == params["city"]) & (pl.col("country") == params["country"])
+    ).select("id")
+    result = (
+        persons_with_interest(tables, params["interest"])
+        .join(persons, left_on="person_id", right_on="id")
+        .join(tables.lives_in, left_on="person_id", right_on="from")
+        .join(cities, left_on="to", right_on="id")
+        .select(pl.len().cast(pl.Int64).alias("numPersons"))
+        .collect()
+    )
+    print(
+        f"Number of {params['gender']} users in {params['city']}, {params['country']} who have an interest in {params['interest']}:\n{result}"
+    )
+    return result
+
+
+def run_query6(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "Which city has the maximum number of people of a particular gender that share a particular interest"
+    print("\nQuery 6:\n persons with an interest and gender, count per city, top 5")
+    persons = tables.persons.filter(
+        pl.col("gender").str.to_lowercase() == params["gender"].lower()
+    ).select("id")
+    result = (
+        persons_with_interest(tables, params["interest"])
+        .join(persons, left_on="person_id", right_on="id")
+        .join(tables.lives_in, left_on="person_id", right_on="from")
+        # Grouped on `c.city, c.country` rather than on the city node
+        .join(tables.cities.select("id", "city", "country"), left_on="to", right_on="id")
+        .group_by("city", "country")
+        .agg(pl.len().cast(pl.Int64).alias("numPersons"))
+        .top_k(5, by="numPersons")
+        .select("numPersons", "city", "country")
+        .sort("numPersons", descending=True)
+        .collect()
+    )
+    print(
+        f"City with the most {params['gender']} users who have an interest in {params['interest']}:\n{result}"
+    )
+    return result
+
+
+def run_query7(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "Which U.S. state has the maximum number of persons between a specified age who enjoy a particular interest?"
+    print("\nQuery 7:\n persons with an interest in an age range and country, count per state, top 1")
+    persons = tables.persons.filter(
+        pl.col("age").is_between(params["age_lower"], params["age_upper"])
+    ).select("id")
+    cities = city_countries(tables).filter(pl.col("country") == params["country"])
+    result = (
+        persons_with_interest(tables, params["interest"])
+        .join(persons, left_on="person_id", right_on="id")
+        .join(tables.lives_in, left_on="person_id", right_on="from")
+        .join(cities, left_on="to", right_on="city_id")
+        .group_by("state_id")
+        .agg(pl.len().cast(pl.Int64).alias("numPersons"))
+        .top_k(1, by="numPersons")
+        .join(tables.states.select("id", "state", "country"), left_on="state_id", right_on="id")
+        .select("numPersons", "state", "country")
+        .collect()
+    )
+    print(
+        f"""
+        State in {params['country']} with the most users between ages {params['age_lower']}-{params['age_upper']} who have an interest in {params['interest']}:\n{result}
+        """
+    )
+    return result
+
+
+def run_query8(tables: Tables) -> pl.DataFrame:
+    "How many second-degree paths exist in the graph?"
+    print("\nQuery 8:\n self-join of follows on the middle person, count of paths")
+    edges = tables.follows.select("from", "to")
+    result = (
+        edges.join(edges, left_on="to", right_on="from")
+        .select(pl.len().cast(pl.Int64).alias("numPaths"))
+        .collect()
+    )
+    print(
+        f"""
+        Number of second-degree paths:\n{result}
+        """
+    )
+    return result
+
+
+def run_query9(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "How many paths exist in the graph through persons below a certain age to persons above a certain age?"
+    print(
+        "\nQuery 9:\n self-join of follows on the middle persons below age_1, to persons above "
+        "age_2, count of paths"
+    )
+    younger = tables.persons.filter(pl.col("age") < params["age_1"]).select("id")
+    older = tables.persons.filter(pl.col("age") > params["age_2"]).select("id")
+    edges = tables.follows.select("from", "to")
+    first = edges.join(younger, left_on="to", right_on="id", how="semi")
+    second = edges.join(older, left_on="to", right_on="id", how="semi")
+    result = (
+        first.join(second, left_on="to", right_on="from")
+        .select(pl.len().cast(pl.Int64).alias("numPaths"))
+        .collect()
+    )
+    print(
+        f"""
+        Number of paths through persons below {params['age_1']} to persons above {params['age_2']}:\n{result}
+        """
+    )
+    return result
+
+
+def run_query8_factorized(tables: Tables) -> pl.DataFrame:
+    "How many second-degree paths exist in the graph? (degree products)"
+    print("\nQuery 8:\n in-degree and out-degree per person joined, sum of products")
+    in_degree = tables.follows.group_by("to").agg(pl.len().alias("in_degree"))
+    out_degree = tables.follows.group_by("from").agg(pl.len().alias("out_degree"))
+    result = (
+        in_degree.join(out_degree, left_on="to", right_on="from")
+        .select(
+            (pl.col("in_degree").cast(pl.Int64) * pl.col("out_degree")).sum().alias("numPaths")
+        )
+        .collect()
+    )
+    print(
+        f"""
+        Number of second-degree paths:\n{result}
+        """
+    )
+    return result
+
+
+def run_query9_factorized(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "How many paths exist in the graph through persons below a certain age to persons above a certain age? (degree products)"
+    print(
+        "\nQuery 9:\n in-degree of persons below age_1 joined with their out-degree to "
+        "persons above age_2, sum of products"
+    )
+    younger = tables.persons.filter(pl.col("age") < params["age_1"]).select("id")
+    older = tables.persons.filter(pl.col("age") > params["age_2"]).select("id")
+    in_degree = (
+        tables.follows.join(younger, left_on="to", right_on="id")
+        .group_by("to")
+        .agg(pl.len().alias("in_degree"))
+    )
+    out_degree = (
+        tables.follows.join(younger, left_on="from", right_on="id")
+        .join(older, left_on="to", right_on="id")
+        .group_by("from")
+        .agg(pl.len().alias("out_degree"))
+    )
+    result = (
+        in_degree.join(out_degree, left_on="to", right_on="from")
+        .select(
+            (pl.col("in_degree").cast(pl.Int64) * pl.col("out_degree")).sum().alias("numPaths")
+        )
+        .collect()
+    )
+    print(
+        f"""
+        Number of paths through persons below {params['age_1']} to persons above {params['age_2']}:\n{result}
+        """
+    )
+    return result
+
+
+def run_query10(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 5 cities gained the most followers (of persons living there) in a given date window?"
+    print("\nQuery 10:\n follows edges in a date window joined to the city of the person followed, top 5")
+    result = (
+        tables.follows.filter(pl.col("since").is_between(params["start_date"], params["end_date"]))
+        .join(tables.lives_in.rename({"from": "to", "to": "city_id"}), on="to")
+        # Grouped on `c.city, c.country` rather than on the city node
+        .join(tables.cities.select("id", "city", "country"), left_on="city_id", right_on="id")
+        .group_by("city", "country")
+        .agg(pl.len().cast(pl.Int64).alias("numFollows"))
+        .top_k(5, by="numFollows")
+        .select("city", "country", "numFollows")
+        .sort("numFollows", descending=True)
+        .collect()
+    )
+    print(
+        f"Cities with the most follows created between {params['start_date']} and {params['end_date']}:\n{result}"
+    )
+    return result
+
+
+def run_query11(tables: Tables, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 3 persons have the highest total interaction weight from their strongly-engaged followers?"
+    print("\nQuery 11:\n follows edges above a weight, summed per person followed, top 3")
+    result = (
+        tables.follows.filter(pl.col("weight") >= params["min_weight"])
+        .group_by("to")
+        .agg(
+            pl.len().cast(pl.Int64).alias("numFollowers"),
+            pl.col("weight").sum().alias("totalWeight"),
+        )
+        .top_k(3, by="totalWeight")
+        .join(tables.persons.select("id", "name"), left_on="to", right_on="id")
+        .select(pl.col("to").alias("personID"), "name", "numFollowers", "totalWeight")
+        .sort("totalWeight", descending=True)
+        .collect()
+    )
+    print(
+        f"Persons with the highest total weight from followers with weight >= {params['min_weight']}:\n{result}"
+    )
+    return result
+
+
+def main(tables: Tables) -> None:
+    start = time.perf_counter()
+    _ = run_query1(tables)
+    _ = run_query2(tables)
+    _ = run_query3(tables, params={"country": "United States"})
+    _ = run_query4(tables, params={"age_lower": 30, "age_upper": 40})
+    _ = run_query5(
+        tables,
+        params={
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "fine dining",
+        },
+    )
+    _ = run_query6(tables, params={"gender": "female", "interest": "tennis"})
+    _ = run_query7(
+        tables,
+        params={
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "photography",
+        },
+    )
+    if FACTORIZED:
+        _ = run_query8_factorized(tables)
+        _ = run_query9_factorized(tables, params={"age_1": 50, "age_2": 25})
+    else:
+        _ = run_query8(tables)
+        _ = run_query9(tables, params={"age_1": 50, "age_2": 25})
+    _ = run_query10(
+        tables, params={"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)}
+    )
+    _ = run_query11(tables, params={"min_weight": 0.5})
+    elapsed = time.perf_counter() - start
+    print(f"Queries completed in {elapsed:.4f}s")
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streaming", action="store_true", help="Run the query plans on the streaming engine")
+    parser.add_argument("--factorized", action="store_true", help="Count the 2-hop paths of queries 8 and 9 as degree products")
+    args = parser.parse_args()
+    # fmt: on
+
+    FACTORIZED = args.factorized
+    if not EDGES_ROOT.is_dir():
+        raise RuntimeError(f"Missing {EDGES_ROOT}. Generate the dataset in data/ first.")
+    if args.streaming:
+        pl.Config.set_engine_affinity("streaming")
+    main(scan_tables(NODES_ROOT, EDGES_ROOT))
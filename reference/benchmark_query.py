@@ -0,0 +1,138 @@
+"""
+Use the `pytest-benchmark` library benchmark queries with warmup and iterations.
+`uv add pytest-benchmark`
+
+Command used:
+```
+uv run pytest benchmark_query.py --benchmark-min-rounds=5 --benchmark-warmup-iterations=5 --benchmark-disable-gc --benchmark-sort=fullname
+```
+"""
+from datetime import date
+
+import pytest
+
+import query
+
+
+@pytest.fixture(scope="session")
+def graph():
+    if not query.GRAPH_ROOT.is_dir():
+        raise RuntimeError("Missing graph_npy data. Run build_graph.py first.")
+    return query.load_graph(query.GRAPH_ROOT)
+
+
+def test_benchmark_query1(benchmark, graph, golden):
+    result = benchmark(query.run_query1, graph)
+    golden.check(1, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query2(benchmark, graph, golden):
+    result = benchmark(query.run_query2, graph)
+    golden.check(2, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query3(benchmark, graph, golden):
+    result = benchmark(query.run_query3, graph, {"country": "United States"})
+    golden.check(3, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query4(benchmark, graph, golden):
+    result = benchmark(query.run_query4, graph, {"age_lower": 30, "age_upper": 40})
+    golden.check(4, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
+
+
+def test_benchmark_query5(benchmark, graph, golden):
+    result = benchmark(
+        query.run_query5,
+        graph,
+        {
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "fine dining",
+        },
+    )
+    golden.check(5, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query6(benchmark, graph, golden):
+    result = benchmark(
+        query.run_query6,
+        graph,
+        {
+            "gender": "female",
+            "interest": "tennis"
+        },
+    )
+    golden.check(6, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query7(benchmark, graph, golden):
+    result = benchmark(
+        query.run_query7,
+        graph,
+        {
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "photography",
+        },
+    )
+    golden.check(7, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query8(benchmark, graph, golden):
+    result = benchmark(query.run_query8, graph)
+    golden.check(8, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query9(benchmark, graph, golden):
+    result = benchmark(query.run_query9, graph, {"age_1": 50, "age_2": 25})
+    golden.check(9, result)
+    result = result.to_dicts()
+
+    assert len(result) == 1
+
+
+def test_benchmark_query10(benchmark, graph, golden):
+    result = benchmark(
+        query.run_query10,
+        graph,
+        {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    )
+    golden.check(10, result)
+    result = result.to_dicts()
+
+    assert len(result) == 5
+
+
+def test_benchmark_query11(benchmark, graph, golden):
+    result = benchmark(query.run_query11, graph, {"min_weight": 0.5})
+    golden.check(11, result)
+    result = result.to_dicts()
+
+    assert len(result) == 3
@@ -0,0 +1,233 @@
+"""
+Builds the NumPy arrays of the reference engine from the Parquet inputs.
+
+Reads the node/edge Parquet files under `data/output`, maps node IDs to dense indexes (the
+position of the node in ID order), and writes one `.npy` file per array into
+`reference/graph_npy`, which `query.py` memory-maps:
+  - Follows edges as CSR (`follows_out_indptr`/`follows_out_indices`, by source) and CSC
+    (`follows_in_indptr`/`follows_in_indices`, by target) adjacency arrays, with the `since`
+    and `weight` edge properties in CSR order
+  - HasInterest edges as CSR (person -> interests) and CSC (interest -> persons) arrays
+  - LivesIn, CityIn and StateIn as one index per source node (every node has one)
+  - Node properties as one array per property (strings of persons as Arrow-style offsets
+    and UTF-8 bytes, so that they can be memory-mapped too)
+"""
+
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pyarrow as pa
+
+SCRIPT_ROOT = Path(__file__).resolve().parent
+GRAPH_ROOT = SCRIPT_ROOT / "graph_npy"
+NODES_ROOT = SCRIPT_ROOT.parent / "data" / "output" / "nodes"
+EDGES_ROOT = SCRIPT_ROOT.parent / "data" / "output" / "edges"
+DELTAS_ROOT = SCRIPT_ROOT.parent / "data" / "output" / "deltas"
+# Written by the data generation scripts, see `data/common.py`
+MANIFEST_PATH = SCRIPT_ROOT.parent / "data" / "output" / "manifest.json"
+# Input files that the arrays in GRAPH_ROOT were built from
+BUILD_MANIFEST_PATH = SCRIPT_ROOT / "graph_npy.manifest.json"
+
+
+def get_persons_path() -> str:
+    # Persons generated with `--workers` are sharded into a directory of Parquet files
+    shards_path = NODES_ROOT / "persons"
+    if shards_path.is_dir():
+        return f"{shards_path}/*.parquet"
+    return f"{NODES_ROOT}/persons.parquet"
+
+
+def read_with_deltas(path: Path | str, delta_file: str, delta_paths: list[Path]) -> pl.DataFrame:
+    # Delta batches use the same file names as the base dataset
+    paths = [path, *(delta_path / delta_file for delta_path in delta_paths)]
+    return pl.concat([pl.read_parquet(path) for path in paths])
+
+
+def get_input_checksums(dirs: list[str]) -> dict[str, str] | None:
+    """
+    Checksums (from the dataset manifest) of the Parquet files under the given directories of
+    `data/output`. Returns None if there's no manifest, or if it's out of date with the files.
+    """
+    if not MANIFEST_PATH.exists():
+        return None
+    manifest_files = json.loads(MANIFEST_PATH.read_text())["files"]
+    checksums = {}
+    for dir_name in dirs:
+        for path in sorted((MANIFEST_PATH.parent / dir_name).rglob("*.parquet")):
+            name = path.relative_to(MANIFEST_PATH.parent).as_posix()
+            entry = manifest_files.get(name, {})
+            stat = path.stat()
+            if (entry.get("bytes"), entry.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                return None
+            checksums[name] = entry["checksum"]
+    return checksums
+
+
+def read_build_manifest(path: Path) -> dict[str, str] | None:
+    # Input files (and their checksums) that the existing arrays were built from
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())["files"]
+
+
+def write_build_manifest(path: Path, checksums: dict[str, str]) -> None:
+    path.write_text(json.dumps({"files": checksums}, indent=2))
+
+
+def save(name: str, arr: np.ndarray) -> None:
+    np.save(GRAPH_ROOT / f"{name}.npy", arr)
+
+
+def to_index(ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Dense indexes of `values` in the sorted node IDs `ids`"""
+    index = np.searchsorted(ids, values).clip(max=len(ids) - 1)
+    if not np.array_equal(ids[index], values):
+        raise ValueError("Edges reference node IDs that don't exist")
+    return index
+
+
+def get_index_dtype(num_nodes: int) -> type:
+    return np.int32 if num_nodes < 2**31 else np.int64
+
+
+def build_adjacency(
+    src: np.ndarray, dst: np.ndarray, num_src: int, dtype: type
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compressed adjacency (CSR) of the edges by source: the neighbours of source `i` are
+    `indices[indptr[i]:indptr[i + 1]]`, in increasing order. Also returns the permutation
+    from input edge order to CSR order, to reorder edge properties.
+    """
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(num_src + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_src), out=indptr[1:])
+    return indptr, dst[order].astype(dtype), order
+
+
+def save_strings(name: str, values: pl.Series) -> None:
+    """Save strings as Arrow-style `<name>_offsets` and `<name>_data` (UTF-8 bytes) arrays"""
+    arr = values.rechunk().to_arrow().cast(pa.large_string())
+    _, offsets, data = arr.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[arr.offset : arr.offset + len(arr) + 1]
+    save(f"{name}_offsets", offsets - offsets[0])
+    save(f"{name}_data", np.frombuffer(data, dtype=np.uint8)[offsets[0] : offsets[-1]])
+
+
+def main(delta_paths: list[Path]) -> None:
+    start = time.perf_counter()
+    shutil.rmtree(GRAPH_ROOT, ignore_errors=True)
+    GRAPH_ROOT.mkdir(parents=True)
+
+    # ---- nodes ----
+    persons = read_with_deltas(get_persons_path(), "nodes/persons.parquet", delta_paths).sort("id")
+    person_ids = persons["id"].to_numpy()
+    num_persons = len(person_ids)
+    person_dtype = get_index_dtype(num_persons)
+    save("person_id", person_ids)
+    save("person_age", persons["age"].to_numpy())
+    # Genders are stored as codes into the sorted distinct genders
+    save("gender_name", np.array(persons["gender"].unique().sort().to_list()))
+    save("person_gender", (persons["gender"].rank("dense") - 1).to_numpy().astype(np.uint8))
+    save_strings("person_name", persons["name"])
+    print(f"Persons complete ({num_persons:,} rows)")
+
+    cities = pl.read_parquet(NODES_ROOT / "cities.parquet").sort("id")
+    states = pl.read_parquet(NODES_ROOT / "states.parquet").sort("id")
+    countries = pl.read_parquet(NODES_ROOT / "countries.parquet").sort("id")
+    interests = pl.read_parquet(NODES_ROOT / "interests.parquet").sort("id")
+    city_ids, state_ids = cities["id"].to_numpy(), states["id"].to_numpy()
+    country_ids, interest_ids = countries["id"].to_numpy(), interests["id"].to_numpy()
+    save("city_name", np.array(cities["city"].to_list()))
+    save("state_name", np.array(states["state"].to_list()))
+    save("country_name", np.array(countries["country"].to_list()))
+    save("interest_name", np.array(interests["interest"].to_list()))
+    print(
+        f"Locations and interests complete ({len(cities):,} cities, {len(states):,} states, "
+        f"{len(countries):,} countries, {len(interests):,} interests)"
+    )
+
+    # ---- edges ----
+    follows = read_with_deltas(EDGES_ROOT / "follows.parquet", "edges/follows.parquet", delta_paths)
+    src = to_index(person_ids, follows["from"].to_numpy())
+    dst = to_index(person_ids, follows["to"].to_numpy())
+    indptr, indices, order = build_adjacency(src, dst, num_persons, person_dtype)
+    save("follows_out_indptr", indptr)
+    save("follows_out_indices", indices)
+    save("follows_since", follows["since"].to_numpy()[order])
+    save("follows_weight", follows["weight"].to_numpy()[order])
+    indptr, indices, _ = build_adjacency(dst, src, num_persons, person_dtype)
+    save("follows_in_indptr", indptr)
+    save("follows_in_indices", indices)
+    print(f"Follows complete ({len(follows):,} edges)")
+
+    lives_in = read_with_deltas(
+        EDGES_ROOT / "lives_in.parquet", "edges/lives_in.parquet", delta_paths
+    )
+    person_city = np.full(num_persons, -1, dtype=np.int32)
+    person_city[to_index(person_ids, lives_in["from"].to_numpy())] = to_index(
+        city_ids, lives_in["to"].to_numpy()
+    )
+    # The queries index the city arrays with `person_city`, where -1 would silently wrap around
+    # to the last city
+    if (person_city < 0).any():
+        raise ValueError(
+            f"{int((person_city < 0).sum()):,} persons have no LivesIn edge; the reference "
+            "engine requires every person to live in a city"
+        )
+    save("person_city", person_city)
+    print(f"LivesIn complete ({len(lives_in):,} edges)")
+
+    has_interest = read_with_deltas(
+        EDGES_ROOT / "interested_in.parquet", "edges/interested_in.parquet", delta_paths
+    )
+    src = to_index(person_ids, has_interest["from"].to_numpy())
+    dst = to_index(interest_ids, has_interest["to"].to_numpy())
+    indptr, indices, _ = build_adjacency(src, dst, num_persons, np.int32)
+    save("interest_out_indptr", indptr)
+    save("interest_out_indices", indices)
+    indptr, indices, _ = build_adjacency(dst, src, len(interest_ids), person_dtype)
+    save("interest_in_indptr", indptr)
+    save("interest_in_indices", indices)
+    print(f"HasInterest complete ({len(has_interest):,} edges)")
+
+    for name, src_ids, dst_ids in (
+        ("city_in", city_ids, state_ids),
+        ("state_in", state_ids, country_ids),
+    ):
+        edges = pl.read_parquet(EDGES_ROOT / f"{name}.parquet")
+        parent = np.full(len(src_ids), -1, dtype=np.int32)
+        parent[to_index(src_ids, edges["from"].to_numpy())] = to_index(
+            dst_ids, edges["to"].to_numpy()
+        )
+        save("city_state" if name == "city_in" else "state_country", parent)
+        print(f"{name} complete ({len(edges):,} edges)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote NumPy arrays to: {GRAPH_ROOT.resolve()}\nTime taken: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--with_deltas", action="store_true", help="Build from the base dataset and all delta batches")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the arrays were built from the same files")
+    args = parser.parse_args()
+    # fmt: on
+
+    built_from = read_build_manifest(BUILD_MANIFEST_PATH)
+    delta_paths = sorted(DELTAS_ROOT.glob("batch-*")) if args.with_deltas else []
+    input_dirs = ["nodes", "edges", *(f"deltas/{path.name}" for path in delta_paths)]
+    checksums = get_input_checksums(input_dirs)
+    up_to_date = checksums is not None and checksums == built_from and GRAPH_ROOT.is_dir()
+    if up_to_date and not args.force:
+        print(f"{GRAPH_ROOT} was built from the same files, skipping rebuild (use --force)")
+    else:
+        BUILD_MANIFEST_PATH.unlink(missing_ok=True)
+        main(delta_paths)
+        if checksums is not None:
+            write_build_manifest(BUILD_MANIFEST_PATH, checksums)
@@ -0,0 +1,378 @@
+"""
+Run the benchmark queries on the memory-mapped NumPy arrays of the reference engine.
+
+Each query is hand-written as vectorized NumPy over the CSR/CSC adjacency arrays built by
+`build_graph.py`, with no query planning or interpretation, so its time is a lower bound on
+what a general-purpose engine can do on the same hardware. For example, the number of
+second-degree paths (query 8) is the sum over persons of in-degree * out-degree.
+"""
+
+import time
+from dataclasses import dataclass, fields
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import polars as pl
+
+SCRIPT_ROOT = Path(__file__).resolve().parent
+GRAPH_ROOT = SCRIPT_ROOT / "graph_npy"
+
+
+@dataclass
+class Graph:
+    # Persons, by dense index (position in ID order)
+    person_id: np.ndarray
+    person_age: np.ndarray
+    person_gender: np.ndarray
+    person_name_offsets: np.ndarray
+    person_name_data: np.ndarray
+    person_city: np.ndarray
+    gender_name: np.ndarray
+    # Locations and interests, by dense index
+    city_name: np.ndarray
+    city_state: np.ndarray
+    state_name: np.ndarray
+    state_country: np.ndarray
+    country_name: np.ndarray
+    interest_name: np.ndarray
+    # Follows: CSR by follower (with edge properties in CSR order), and CSC by person followed
+    follows_out_indptr: np.ndarray
+    follows_out_indices: np.ndarray
+    follows_since: np.ndarray
+    follows_weight: np.ndarray
+    follows_in_indptr: np.ndarray
+    follows_in_indices: np.ndarray
+    # HasInterest: CSR by person, and CSC by interest
+    interest_out_indptr: np.ndarray
+    interest_out_indices: np.ndarray
+    interest_in_indptr: np.ndarray
+    interest_in_indices: np.ndarray
+
+    def person_name(self, index: int) -> str:
+        start, end = self.person_name_offsets[index], self.person_name_offsets[index + 1]
+        return self.person_name_data[start:end].tobytes().decode()
+
+
+def load_graph(root: Path) -> Graph:
+    # Memory-map every array, so that loading is instant and pages are read on first use
+    return Graph(
+        **{f.name: np.load(root / f"{f.name}.npy", mmap_mode="r") for f in fields(Graph)}
+    )
+
+
+def top_k(values: np.ndarray, k: int, descending: bool = True) -> np.ndarray:
+    """Indexes of the top `k` values, in order (ties are broken by lowest index)"""
+    keys = -values if descending else values
+    if k < len(keys):
+        # Every index tied with the k-th value is a candidate, for a deterministic tie-break
+        candidates = np.flatnonzero(keys <= np.partition(keys, k - 1)[k - 1])
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.lexsort((candidates, keys[candidates]))][:k]
+
+
+def person_country(graph: Graph) -> np.ndarray:
+    return graph.state_country[graph.city_state[graph.person_city]]
+
+
+def city_groups(graph: Graph, by_country: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Group of each city, and the first city of each group. The Cypher queries group on `c.city`
+    (and `c.country`) rather than on the city node, so cities that share a name (in the same
+    country) are counted as one.
+    """
+    _, keys = np.unique(graph.city_name, return_inverse=True)
+    if by_country:
+        keys = keys * len(graph.country_name) + graph.state_country[graph.city_state]
+    _, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+    return groups, first
+
+
+def persons_with_interest(graph: Graph, interest: str) -> np.ndarray:
+    # Interests are matched case-insensitively, like `lower(i.interest) = lower($interest)`
+    indptr, indices = graph.interest_in_indptr, graph.interest_in_indices
+    matches = np.flatnonzero(np.char.lower(graph.interest_name) == interest.lower())
+    return np.concatenate(
+        [indices[indptr[i] : indptr[i + 1]] for i in matches] or [indices[:0]]
+    )
+
+
+def gender_code(graph: Graph, gender: str) -> int:
+    matches = np.flatnonzero(np.char.lower(graph.gender_name) == gender.lower())
+    return int(matches[0]) if len(matches) else -1
+
+
+def run_query1(graph: Graph) -> pl.DataFrame:
+    "Who are the top 3 most-followed persons in the network?"
+    print("\nQuery 1:\n in-degree of each person from the CSC offsets, top 3")
+    num_followers = np.diff(graph.follows_in_indptr)
+    top = top_k(num_followers, 3)
+    result = pl.DataFrame(
+        {
+            "personID": graph.person_id[top],
+            "name": [graph.person_name(i) for i in top],
+            "numFollowers": num_followers[top],
+        }
+    )
+    print(f"Top 3 most-followed persons:\n{result}")
+    return result
+
+
+def run_query2(graph: Graph) -> pl.DataFrame:
+    "In which city does the most-followed person in the network live?"
+    print("\nQuery 2:\n in-degree of each person from the CSC offsets, top 1, then its city")
+    num_followers = np.diff(graph.follows_in_indptr)
+    person = top_k(num_followers, 1)[0]
+    city = graph.person_city[person]
+    state = graph.city_state[city]
+    result = pl.DataFrame(
+        {
+            "name": [graph.person_name(person)],
+            "numFollowers": [num_followers[person]],
+            "city": [graph.city_name[city]],
+            "state": [graph.state_name[state]],
+            "country": [graph.country_name[graph.state_country[state]]],
+        }
+    )
+    print(f"City in which most-followed person lives:\n{result}")
+    return result
+
+
+def run_query3(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 5 cities in a particular country have the lowest average age in the network?"
+    print("\nQuery 3:\n average age per city of the persons in a country, bottom 5")
+    country = np.flatnonzero(graph.country_name == params["country"])
+    in_country = np.isin(person_country(graph), country)
+    groups, first = city_groups(graph)
+    cities = groups[graph.person_city[in_country]]
+    num_groups = len(first)
+    counts = np.bincount(cities, minlength=num_groups)
+    age_sums = np.bincount(cities, weights=graph.person_age[in_country], minlength=num_groups)
+    has_persons = np.flatnonzero(counts)
+    average_age = age_sums[has_persons] / counts[has_persons]
+    top = top_k(average_age, 5, descending=False)
+    result = pl.DataFrame(
+        {"city": graph.city_name[first[has_persons[top]]], "averageAge": average_age[top]}
+    )
+    print(f"Cities with lowest average age in {params['country']}:\n{result}")
+    return result
+
+
+def run_query4(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "How many persons between a certain age range are in each country?"
+    print("\nQuery 4:\n persons in an age range per country, top 3")
+    age = graph.person_age
+    in_range = (age >= params["age_lower"]) & (age <= params["age_upper"])
+    counts = np.bincount(person_country(graph)[in_range], minlength=len(graph.country_name))
+    top = top_k(counts, 3)
+    top = top[counts[top] > 0]
+    result = pl.DataFrame({"countries": graph.country_name[top], "personCounts": counts[top]})
+    print(
+        f"Persons between ages {params['age_lower']}-{params['age_upper']} in each country:\n{result}"
+    )
+    return result
+
+
+def run_query5(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "How many men in a particular city have an interest in the same thing?"
+    print("\nQuery 5:\n persons with an interest (CSC), filtered by gender and city")
+    persons = persons_with_interest(graph, params["interest"])
+    city_country = graph.state_country[graph.city_state]
+    cities = np.flatnonzero(
+        (graph.city_name == params["city"])
+        & np.isin(city_country, np.flatnonzero(graph.country_name == params["country"]))
+    )
+    is_match = (graph.person_gender[persons] == gender_code(graph, params["gender"])) & np.isin(
+        graph.person_city[persons], cities
+    )
+    result = pl.DataFrame({"numPersons": [int(is_match.sum())]})
+    print(
+        f"Number of {params['gender']} users in {params['city']}, {params['country']} who have an interest in {params['interest']}:\n{result}"
+    )
+    return result
+
+
+def run_query6(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "Which city has the maximum number of people of a particular gender that share a particular interest"
+    print("\nQuery 6:\n persons with an interest (CSC) and gender, per city, top 5")
+    persons = persons_with_interest(graph, params["interest"])
+    persons = persons[graph.person_gender[persons] == gender_code(graph, params["gender"])]
+    groups, first = city_groups(graph, by_country=True)
+    counts = np.bincount(groups[graph.person_city[persons]], minlength=len(first))
+    top = top_k(counts, 5)
+    top = top[counts[top] > 0]
+    cities = first[top]
+    result = pl.DataFrame(
+        {
+            "numPersons": counts[top],
+            "city": graph.city_name[cities],
+            "country": graph.country_name[graph.state_country[graph.city_state[cities]]],
+        }
+    )
+    print(
+        f"City with the most {params['gender']} users who have an interest in {params['interest']}:\n{result}"
+    )
+    return result
+
+
+def run_query7(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "Which U.S. state has the maximum number of persons between a specified age who enjoy a particular interest?"
+    print("\nQuery 7:\n persons with an interest (CSC) in an age range and country, per state, top 1")
+    persons = persons_with_interest(graph, params["interest"])
+    age = graph.person_age[persons]
+    states = graph.city_state[graph.person_city[persons]]
+    country = np.flatnonzero(graph.country_name == params["country"])
+    is_match = (
+        (age >= params["age_lower"])
+        & (age <= params["age_upper"])
+        & np.isin(graph.state_country[states], country)
+    )
+    counts = np.bincount(states[is_match], minlength=len(graph.state_name))
+    top = top_k(counts, 1)
+    top = top[counts[top] > 0]
+    result = pl.DataFrame(
+        {
+            "numPersons": counts[top],
+            "state": graph.state_name[top],
+            "country": graph.country_name[graph.state_country[top]],
+        }
+    )
+    print(
+        f"""
+        State in {params['country']} with the most users between ages {params['age_lower']}-{params['age_upper']} who have an interest in {params['interest']}:\n{result}
+        """
+    )
+    return result
+
+
+def run_query8(graph: Graph) -> pl.DataFrame:
+    "How many second-degree paths exist in the graph?"
+    print("\nQuery 8:\n sum over persons b of in_degree(b) * out_degree(b)")
+    in_degree = np.diff(graph.follows_in_indptr)
+    out_degree = np.diff(graph.follows_out_indptr)
+    result = pl.DataFrame({"numPaths": [int(in_degree @ out_degree)]})
+    print(
+        f"""
+        Number of second-degree paths:\n{result}
+        """
+    )
+    return result
+
+
+def run_query9(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "How many paths exist in the graph through persons below a certain age to persons above a certain age?"
+    print(
+        "\nQuery 9:\n sum over persons b below age_1 of in_degree(b) * "
+        "(number of persons followed by b above age_2)"
+    )
+    indptr = graph.follows_out_indptr
+    # Out-degree of each person, counting only the persons followed above age_2 (the
+    # predicate is evaluated per person, and gathered per edge as 1 byte rather than 8)
+    is_older = (graph.person_age > params["age_2"])[graph.follows_out_indices]
+    older_cumsum = np.concatenate([[0], np.cumsum(is_older)])
+    older_out_degree = older_cumsum[indptr[1:]] - older_cumsum[indptr[:-1]]
+    in_degree = np.diff(graph.follows_in_indptr)
+    is_younger = graph.person_age < params["age_1"]
+    result = pl.DataFrame(
+        {"numPaths": [int(in_degree[is_younger] @ older_out_degree[is_younger])]}
+    )
+    print(
+        f"""
+        Number of paths through persons below {params['age_1']} to persons above {params['age_2']}:\n{result}
+        """
+    )
+    return result
+
+
+def run_query10(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 5 cities gained the most followers (of persons living there) in a given date window?"
+    print("\nQuery 10:\n follows edges in a date window, per city of the person followed, top 5")
+    since = graph.follows_since
+    in_window = (since >= np.datetime64(params["start_date"])) & (
+        since <= np.datetime64(params["end_date"])
+    )
+    groups, first = city_groups(graph, by_country=True)
+    cities = groups[graph.person_city[graph.follows_out_indices[in_window]]]
+    counts = np.bincount(cities, minlength=len(first))
+    top = top_k(counts, 5)
+    top = top[counts[top] > 0]
+    cities = first[top]
+    result = pl.DataFrame(
+        {
+            "city": graph.city_name[cities],
+            "country": graph.country_name[graph.state_country[graph.city_state[cities]]],
+            "numFollows": counts[top],
+        }
+    )
+    print(
+        f"Cities with the most follows created between {params['start_date']} and {params['end_date']}:\n{result}"
+    )
+    return result
+
+
+def run_query11(graph: Graph, params: dict[str, Any]) -> pl.DataFrame:
+    "Which 3 persons have the highest total interaction weight from their strongly-engaged followers?"
+    print("\nQuery 11:\n sum of follows weights above a threshold per person followed, top 3")
+    weight = graph.follows_weight
+    is_strong = weight >= params["min_weight"]
+    persons = graph.follows_out_indices[is_strong]
+    num_persons = len(graph.person_id)
+    total_weight = np.bincount(persons, weights=weight[is_strong], minlength=num_persons)
+    num_followers = np.bincount(persons, minlength=num_persons)
+    top = top_k(total_weight, 3)
+    top = top[num_followers[top] > 0]
+    result = pl.DataFrame(
+        {
+            "personID": graph.person_id[top],
+            "name": [graph.person_name(i) for i in top],
+            "numFollowers": num_followers[top],
+            "totalWeight": total_weight[top],
+        }
+    )
+    print(
+        f"Persons with the highest total weight from followers with weight >= {params['min_weight']}:\n{result}"
+    )
+    return result
+
+
+def main(graph: Graph) -> None:
+    start = time.perf_counter()
+    _ = run_query1(graph)
+    _ = run_query2(graph)
+    _ = run_query3(graph, params={"country": "United States"})
+    _ = run_query4(graph, params={"age_lower": 30, "age_upper": 40})
+    _ = run_query5(
+        graph,
+        params={
+            "gender": "male",
+            "city": "London",
+            "country": "United Kingdom",
+            "interest": "fine dining",
+        },
+    )
+    _ = run_query6(graph, params={"gender": "female", "interest": "tennis"})
+    _ = run_query7(
+        graph,
+        params={
+            "country": "United States",
+            "age_lower": 23,
+            "age_upper": 30,
+            "interest": "photography",
+        },
+    )
+    _ = run_query8(graph)
+    _ = run_query9(graph, params={"age_1": 50, "age_2": 25})
+    _ = run_query10(
+        graph, params={"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)}
+    )
+    _ = run_query11(graph, params={"min_weight": 0.5})
+    elapsed = time.perf_counter() - start
+    print(f"Queries completed in {elapsed:.4f}s")
+
+
+if __name__ == "__main__":
+    if not GRAPH_ROOT.is_dir():
+        raise RuntimeError(f"Missing {GRAPH_ROOT}. Run build_graph.py first.")
+    main(load_graph(GRAPH_ROOT))
@@ -0,0 +1,320 @@
+"""
+Golden (known-correct) query results, used by each system's `benchmark_query.py` to check the
+values of every benchmarked result, not just its row count.
+
+Golden results are keyed on the input files that a system's database was built from (their
+checksums in the dataset manifest, see `data/common.py`), so they're computed once per dataset:
+either by the reference engine (`reference/`), or by majority agreement across several systems.
+
+```
+uv run golden.py
+uv run golden.py --systems reference kuzu ladybug lance_graph
+```
+
+Top-k results are compared tie-aware: rows whose sort key ties may come back in any order, and
+the rows tied at the k-th value (where the engine breaks the tie arbitrarily) are only compared
+on their sort key.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import io
+import json
+import math
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable
+
+import polars as pl
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Written by the data generation scripts, see `data/common.py`
+MANIFEST_PATH = REPO_ROOT / "data" / "output" / "manifest.json"
+GOLDEN_PATH = REPO_ROOT / "data" / "output" / "golden"
+# Input files that each system's database was built from, written by its `build_graph.py`.
+# Systems without one (Neo4j, and Polars, which scans the files directly) are assumed to be built
+# from the base dataset.
+BUILD_MANIFESTS = {
+    "kuzu": REPO_ROOT / "kuzu" / "social_network.kuzu.manifest.json",
+    "ladybug": REPO_ROOT / "ladybug" / "social_network.lbdb.manifest.json",
+    "lance_graph": REPO_ROOT / "lance_graph" / "graph_lance.manifest.json",
+    "reference": REPO_ROOT / "reference" / "graph_npy.manifest.json",
+}
+# Floats (averages, sums of weights) differ in the last digits across engines
+REL_TOLERANCE = 1e-6
+
+# Parameters used by each system's `benchmark_query.py`
+QUERY_PARAMS: dict[int, dict[str, Any] | None] = {
+    1: None,
+    2: None,
+    3: {"country": "United States"},
+    4: {"age_lower": 30, "age_upper": 40},
+    5: {"gender": "male", "city": "London", "country": "United Kingdom", "interest": "fine dining"},
+    6: {"gender": "female", "interest": "tennis"},
+    7: {"country": "United States", "age_lower": 23, "age_upper": 30, "interest": "photography"},
+    8: None,
+    9: {"age_1": 50, "age_2": 25},
+    10: {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    11: {"min_weight": 0.5},
+}
+# Sort key of the top-k queries (`ORDER BY ... LIMIT k`)
+TOP_K: dict[int, str] = {
+    1: "numFollowers",
+    2: "numFollowers",
+    3: "averageAge",
+    4: "personCounts",
+    6: "numPersons",
+    7: "numPersons",
+    10: "numFollows",
+    11: "totalWeight",
+}
+
+
+def get_base_checksums() -> dict[str, str]:
+    """Checksums of the base dataset (`nodes` and `edges`) from the dataset manifest"""
+    manifest_files = json.loads(MANIFEST_PATH.read_text())["files"]
+    return {
+        name: entry["checksum"]
+        for name, entry in sorted(manifest_files.items())
+        if name.startswith(("nodes/", "edges/")) and name.endswith(".parquet")
+    }
+
+
+def get_dataset_key(system: str) -> str | None:
+    """
+    Key of the dataset that the system's database was built from (a hash of the input file
+    checksums), or None if there's no dataset manifest to key on.
+    """
+    build_manifest_path = BUILD_MANIFESTS.get(system)
+    if build_manifest_path is not None and build_manifest_path.exists():
+        checksums = json.loads(build_manifest_path.read_text())["files"]
+    elif MANIFEST_PATH.exists():
+        checksums = get_base_checksums()
+    else:
+        return None
+    encoded = json.dumps(checksums, sort_keys=True).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def to_golden(result: pl.DataFrame) -> dict[str, Any]:
+    return {"columns": result.columns, "rows": [list(row) for row in result.rows()]}
+
+
+def values_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=REL_TOLERANCE)
+    return a == b
+
+
+def rows_equal(a: list[Any] | tuple[Any, ...], b: list[Any] | tuple[Any, ...]) -> bool:
+    return all(values_equal(x, y) for x, y in zip(a, b))
+
+
+def compare_result(query_id: int, result: pl.DataFrame, expected: dict[str, Any]) -> str | None:
+    """Compare a query result with the golden one, returning a description of the first mismatch"""
+    columns = expected["columns"]
+    missing = [column for column in columns if column not in result.columns]
+    if missing:
+        return f"missing columns {missing} (got {result.columns})"
+    rows = result.select(columns).rows()
+    golden = [tuple(row) for row in expected["rows"]]
+    if len(rows) != len(golden):
+        return f"expected {len(golden)} rows, got {len(rows)}"
+    if query_id not in TOP_K:
+        for i, (row, golden_row) in enumerate(zip(rows, golden)):
+            if not rows_equal(row, golden_row):
+                return f"row {i} is {row}, expected {golden_row}"
+        return None
+
+    key = TOP_K[query_id]
+    key_index = columns.index(key)
+    for i, (row, golden_row) in enumerate(zip(rows, golden)):
+        if not values_equal(row[key_index], golden_row[key_index]):
+            return f"row {i} has {key}={row[key_index]}, expected {golden_row[key_index]}"
+    # Runs of rows tied on the sort key, except for the run tied with the k-th row: which of the
+    # tied rows make it into the top k is up to the engine
+    start = 0
+    while start < len(golden):
+        end = start + 1
+        while end < len(golden) and values_equal(golden[end][key_index], golden[start][key_index]):
+            end += 1
+        if values_equal(golden[start][key_index], golden[-1][key_index]):
+            break
+        unmatched = list(golden[start:end])
+        for row in rows[start:end]:
+            match = next((g for g in unmatched if rows_equal(row, g)), None)
+            if match is None:
+                return f"unexpected row {row} among rows with {key}={row[key_index]}"
+            unmatched.remove(match)
+        start = end
+    return None
+
+
+@dataclass
+class GoldenResults:
+    key: str
+    systems: list[str]
+    queries: dict[str, dict[str, Any]]
+
+    def check(self, query_id: int, result: pl.DataFrame) -> None:
+        expected = self.queries.get(str(query_id))
+        if expected is None:
+            raise AssertionError(f"No golden result for query {query_id} in dataset {self.key}")
+        mismatch = compare_result(query_id, result, expected)
+        if mismatch is not None:
+            # The systems that agreed on this query's result (all of them in older golden files)
+            systems = expected.get("systems", self.systems)
+            raise AssertionError(
+                f"Query {query_id} doesn't match the golden result ({', '.join(systems)}): "
+                f"{mismatch}"
+            )
+
+
+def load_golden(system: str) -> GoldenResults | None:
+    """Golden results for the dataset that the system was built from, or None if not computed yet"""
+    key = get_dataset_key(system)
+    if key is None or not (GOLDEN_PATH / f"{key}.json").exists():
+        return None
+    golden = json.loads((GOLDEN_PATH / f"{key}.json").read_text())
+    return GoldenResults(key, golden["systems"], golden["queries"])
+
+
+# --- Computing golden results ---
+
+
+def load_query_module(system: str) -> ModuleType:
+    """Import `<system>/query.py` as a module (raises ImportError if the system isn't installed)"""
+    spec = importlib.util.spec_from_file_location(
+        f"{system}_query", REPO_ROOT / system / "query.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def connect_kuzu(module: ModuleType) -> Any:
+    import kuzu
+
+    db_path = REPO_ROOT / "kuzu" / "social_network.kuzu"
+    return kuzu.Connection(kuzu.Database(str(db_path), read_only=True))
+
+
+def connect_ladybug(module: ModuleType) -> Any:
+    import real_ladybug as lb
+
+    db_path = REPO_ROOT / "ladybug" / "social_network.lbdb"
+    return lb.Connection(lb.Database(str(db_path), read_only=True))
+
+
+def connect_lance(module: ModuleType) -> Any:
+    return module.CypherEngine(module.build_config(), module.load_datasets(module.GRAPH_ROOT))
+
+
+def connect_reference(module: ModuleType) -> Any:
+    return module.load_graph(module.GRAPH_ROOT)
+
+
+def connect_polars(module: ModuleType) -> Any:
+    return module.scan_tables(module.NODES_ROOT, module.EDGES_ROOT)
+
+
+CONNECTORS: dict[str, Callable[[ModuleType], Any]] = {
+    "reference": connect_reference,
+    "kuzu": connect_kuzu,
+    "ladybug": connect_ladybug,
+    "lance_graph": connect_lance,
+    "polars_graph": connect_polars,
+}
+
+
+def run_queries(system: str) -> dict[int, pl.DataFrame]:
+    module = load_query_module(system)
+    context = CONNECTORS[system](module)
+    results = {}
+    for query_id, params in QUERY_PARAMS.items():
+        run_query = getattr(module, f"run_query{query_id}")
+        # The queries print their results
+        with redirect_stdout(io.StringIO()):
+            results[query_id] = run_query(context) if params is None else run_query(context, params)
+    return results
+
+
+def find_majority(
+    query_id: int, results: dict[str, pl.DataFrame]
+) -> tuple[pl.DataFrame, list[str]] | None:
+    """The result that more than half of the systems agree with, and those systems, if any"""
+    for result in results.values():
+        expected = to_golden(result)
+        agreeing = [
+            system
+            for system, other in results.items()
+            if compare_result(query_id, other, expected) is None
+        ]
+        if 2 * len(agreeing) > len(results):
+            return result, agreeing
+    return None
+
+
+def main() -> None:
+    keys = {system: get_dataset_key(system) for system in SYSTEMS}
+    key = keys[SYSTEMS[0]]
+    if key is None:
+        raise SystemExit(f"Missing {MANIFEST_PATH}, run the data generation scripts first")
+    output_path = GOLDEN_PATH / f"{key}.json"
+    if output_path.exists() and not FORCE:
+        print(f"Golden results for dataset {key} already exist: {output_path} (use --force)")
+        return
+
+    results_by_system = {}
+    for system in SYSTEMS:
+        if keys[system] != key:
+            print(f"Skipping {system}: built from different files than {SYSTEMS[0]}")
+            continue
+        try:
+            results_by_system[system] = run_queries(system)
+        except ImportError:
+            print(f"Skipping {system}: not installed")
+            continue
+        print(f"Ran queries on {system}")
+    if not results_by_system:
+        raise SystemExit("No systems to compute golden results with")
+
+    queries = {}
+    for query_id in QUERY_PARAMS:
+        results = {system: results[query_id] for system, results in results_by_system.items()}
+        majority = find_majority(query_id, results)
+        if majority is None:
+            print(f"Query {query_id}: no majority agreement, skipping")
+            for system, result in results.items():
+                print(f"  {system}: {result.rows()}")
+            continue
+        result, agreeing = majority
+        queries[str(query_id)] = {
+            "params": QUERY_PARAMS[query_id],
+            # Only the systems that agreed, not the ones outvoted on this query
+            "systems": agreeing,
+            **to_golden(result),
+        }
+
+    GOLDEN_PATH.mkdir(parents=True, exist_ok=True)
+    golden = {"systems": list(results_by_system), "queries": queries}
+    output_path.write_text(json.dumps(golden, indent=2, default=str))
+    print(f"Wrote golden results for {len(queries)} queries to: {output_path}")
+
+
+if __name__ == "__main__":
+    # fmt: off
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--systems", type=str, nargs="+", default=["reference"], choices=list(CONNECTORS), help="Systems to compute golden results with (by majority agreement if several)")
+    parser.add_argument("--force", action="store_true", help="Recompute existing golden results")
+    args = parser.parse_args()
+    # fmt: on
+
+    SYSTEMS = args.systems
+    FORCE = args.force
+
+    main()